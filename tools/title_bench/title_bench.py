@@ -0,0 +1,328 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function
+"""
+#########################################################
+#                                                       #
+#  AGP - Advanced Graphics Renderer                     #
+#  Version: 3.5.0                                       #
+#  Created by Lululla (https://github.com/Belfagor2005) #
+#  License: CC BY-NC-SA 4.0                             #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0    #
+#                                                       #
+#  Last Modified: "18:14 - 20250512"                    #
+#                                                       #
+#  Credits:                                             #
+#  - Original concept by Lululla                        #
+#  - Poster renderer                                    #
+#  - Backdrop renderer                                  #
+#  - Poster EMC renderer                                #
+#  - InfoEvents renderer                                #
+#  - Star rating renderer                               #
+#  - Parental control renderer                          #
+#  - Genre detection and renderer                       #
+#                                                       #
+#  - Advanced download management system                #
+#  - Atomic file operations                             #
+#  - Thread-safe resource locking                       #
+#  - TMDB API integration                               #
+#  - TVDB API integration                               #
+#  - OMDB API integration                               #
+#  - FANART API integration                             #
+#  - IMDB API integration                               #
+#  - ELCINEMA API integration                           #
+#  - GOOGLE API integration                             #
+#  - PROGRAMMETV integration                            #
+#  - MOLOTOV API integration                            #
+#  - Advanced caching system                            #
+#  - Fully configurable via AGP Setup Plugin            #
+#                                                       #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+__author__ = "Lululla"
+__copyright__ = "AGP Team"
+
+# Standard library
+from argparse import ArgumentParser
+from ast import FunctionDef, get_source_segment, parse, walk
+from gzip import open as gzip_open
+from json import dump, load
+from logging import StreamHandler, WARNING
+from lzma import open as lzma_open
+from os import _exit
+from os.path import abspath, dirname, exists, join
+from re import sub
+from sys import modules, path, stdout
+from textwrap import dedent
+from time import perf_counter
+from types import ModuleType
+from unicodedata import normalize
+from xml.etree.ElementTree import iterparse
+
+
+"""
+Title-cleaning benchmark and regression harness.
+
+Runs the title cleaners used to build API queries and artwork file names
+(convtext, clean_for_tvdb, clean_for_tvdb_optimized, cleanText and the
+download thread UNAC) over a corpus of EPG titles, outside enigma2:
+
+	python3 tools/title_bench/title_bench.py
+	python3 tools/title_bench/title_bench.py --repeat 20 --functions convtext
+	python3 tools/title_bench/title_bench.py --update-golden
+	python3 tools/title_bench/title_bench.py --import-xmltv epg.xml.gz
+
+Every run prints titles/s and microseconds per title for each function
+(cold and warm for the memoized ones) and compares the outputs with the
+golden file: any difference is listed and the exit code is 1, so a
+cleaning change that alters file names never goes unnoticed.
+Run --update-golden only after reviewing the differences.
+
+The shipped corpus is a hand-written seed of decorated broadcast titles
+followed by about 3000 film titles from IMDb (ggplot2 "movies" dataset);
+--import-xmltv appends the unique <title> values of real guides (.xml,
+.xml.gz, .xml.xz).
+"""
+
+HERE = dirname(abspath(__file__))
+PYTHON_ROOT = join(dirname(dirname(HERE)), "usr", "lib", "enigma2", "python")
+DEFAULT_CORPUS = join(HERE, "corpus.txt")
+DEFAULT_GOLDEN = join(HERE, "golden.json")
+MAX_DIFFS = 25
+
+# Configuration values read by the text modules at import
+CONFIG_VALUES = {
+	"osd.language": "en_GB",
+	"skin.primary_skin": "skin.xml"
+}
+
+
+class _ConfigNode:
+	"""Permissive stand-in for the enigma2 config tree"""
+
+	def __init__(self, name=""):
+		self._name = name
+
+	def __getattr__(self, attr):
+		if attr.startswith("__"):
+			raise AttributeError(attr)
+		if attr == "value":
+			return CONFIG_VALUES.get(self._name, "")
+		return _ConfigNode(f"{self._name}.{attr}" if self._name else attr)
+
+
+def _install_stubs():
+	"""Make the renderer modules importable without enigma2"""
+	enigma = ModuleType("enigma")
+	enigma.getDesktop = lambda screen: None
+	modules.setdefault("enigma", enigma)
+
+	if PYTHON_ROOT not in path:
+		path.insert(0, PYTHON_ROOT)
+	import Components
+	components_config = ModuleType("Components.config")
+	components_config.config = _ConfigNode()
+	modules["Components.config"] = components_config
+	Components.config = components_config
+
+
+def _load_unac():
+	"""
+	UNAC lives on the download thread, whose module needs PIL, requests
+	and twisted: compile the method on its own from the source file
+	"""
+	source_path = join(PYTHON_ROOT, "Components", "Renderer", "AgpDownloadThread.py")
+	with open(source_path, encoding="utf-8") as f:
+		source = f.read()
+	for node in walk(parse(source)):
+		if isinstance(node, FunctionDef) and node.name == "UNAC":
+			segment = get_source_segment(source, node)
+			namespace = {"normalize": normalize, "sub": sub}
+			# The segment keeps the class indentation after its first line
+			exec(compile(dedent("\t" + segment), source_path, "exec"), namespace)
+			unac = namespace["UNAC"]
+			return lambda text: unac(None, text)
+	raise LookupError(f"UNAC not found in {source_path}")
+
+
+def load_functions():
+	"""Return [(name, function, cache_clear or None)] in report order"""
+	_install_stubs()
+	from Components.Renderer import Agp_lib, Agp_Utils
+	# Keep the report readable: the log file still gets everything
+	for handler in Agp_Utils.logger.handlers:
+		if type(handler) is StreamHandler:
+			handler.setLevel(WARNING)
+	return [
+		("convtext", Agp_lib.convtext, Agp_lib._convtext_cached.cache_clear),
+		("clean_for_tvdb", Agp_Utils.clean_for_tvdb, Agp_Utils._clean_for_tvdb_cached.cache_clear),
+		("clean_for_tvdb_optimized", Agp_Utils.clean_for_tvdb_optimized, None),
+		("cleanText", Agp_Utils.cleanText, None),
+		("UNAC", _load_unac(), None)
+	]
+
+
+def load_corpus(corpus_path):
+	titles = []
+	seen = set()
+	with open(corpus_path, encoding="utf-8") as f:
+		for line in f:
+			title = line.rstrip("\r\n")
+			if not title.strip() or title.startswith("#") or title in seen:
+				continue
+			seen.add(title)
+			titles.append(title)
+	return titles
+
+
+def _open_guide(filename):
+	if filename.endswith(".gz"):
+		return gzip_open(filename, "rb")
+	if filename.endswith(".xz"):
+		return lzma_open(filename, "rb")
+	return open(filename, "rb")
+
+
+def import_xmltv(corpus_path, filenames):
+	"""Append the unique programme titles of XMLTV guides to the corpus"""
+	known = set(load_corpus(corpus_path)) if exists(corpus_path) else set()
+	added = []
+	for filename in filenames:
+		with _open_guide(filename) as f:
+			for _, element in iterparse(f):
+				if element.tag == "title" and element.text:
+					title = " ".join(element.text.split())
+					if title and not title.startswith("#") and title not in known:
+						known.add(title)
+						added.append(title)
+				elif element.tag == "programme":
+					element.clear()
+	if added:
+		with open(corpus_path, "a", encoding="utf-8") as f:
+			f.write("\n".join(added) + "\n")
+	print(f"Imported {len(added)} new titles into {corpus_path}")
+
+
+def _timed(function, titles, repeat):
+	"""Best of repeat passes, in seconds, plus the outputs of the last one"""
+	best = None
+	for _ in range(repeat):
+		start = perf_counter()
+		outputs = [function(title) for title in titles]
+		elapsed = perf_counter() - start
+		best = elapsed if best is None else min(best, elapsed)
+	return best, outputs
+
+
+def _rate(titles, seconds):
+	seconds = max(seconds, 1e-9)
+	return f"{len(titles) / seconds:>12,.0f} titles/s {seconds * 1e6 / len(titles):>9.2f} us/title"
+
+
+def run(functions, titles, repeat):
+	"""Time every function, return {name: [outputs]}"""
+	results = {}
+	total = 0.0
+	print(f"{len(titles)} titles, best of {repeat}")
+	for name, function, cache_clear in functions:
+		if cache_clear is not None:
+			cache_clear()
+			cold, outputs = _timed(function, titles, 1)
+			warm, _ = _timed(function, titles, repeat)
+			print(f"{name:<26} cold {_rate(titles, cold)}")
+			print(f"{'':<26} warm {_rate(titles, warm)}")
+			# Uncached cost for the overall figure
+			total += cold
+		else:
+			elapsed, outputs = _timed(function, titles, repeat)
+			print(f"{name:<26}      {_rate(titles, elapsed)}")
+			total += elapsed
+		results[name] = outputs
+	print(f"{'all functions':<26}      {_rate(titles, total)}")
+	return results
+
+
+def compare(results, titles, golden):
+	"""Print the differences with the golden outputs, return their count"""
+	diffs = 0
+	missing = 0
+	for index, title in enumerate(titles):
+		expected = golden.get(title)
+		if expected is None:
+			missing += 1
+			continue
+		for name, outputs in results.items():
+			if name in expected and expected[name] != outputs[index]:
+				diffs += 1
+				if diffs <= MAX_DIFFS:
+					print(f"DIFF {name}({title!r}):\n  golden: {expected[name]!r}\n  now:    {outputs[index]!r}")
+	if diffs > MAX_DIFFS:
+		print(f"... {diffs - MAX_DIFFS} more differences")
+	if missing:
+		print(f"{missing} titles have no golden output (run --update-golden)")
+	print(f"{diffs} differences against the golden file")
+	return diffs
+
+
+def update_golden(golden_path, results, titles):
+	golden = {}
+	if exists(golden_path):
+		with open(golden_path, encoding="utf-8") as f:
+			golden = load(f)
+	for index, title in enumerate(titles):
+		entry = golden.setdefault(title, {})
+		for name, outputs in results.items():
+			entry[name] = outputs[index]
+	with open(golden_path, "w", encoding="utf-8") as f:
+		dump(golden, f, ensure_ascii=False, indent=1, sort_keys=True)
+		f.write("\n")
+	print(f"Golden file updated: {golden_path} ({len(golden)} titles)")
+
+
+def main():
+	parser = ArgumentParser(description="Benchmark and regression check for the title cleaners")
+	parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="title corpus, one title per line")
+	parser.add_argument("--golden", default=DEFAULT_GOLDEN, help="golden outputs (JSON)")
+	parser.add_argument("--update-golden", action="store_true", help="store the current outputs as golden")
+	parser.add_argument("--repeat", type=int, default=5, help="timed passes per function (best is reported)")
+	parser.add_argument("--functions", help="comma separated subset of functions to run")
+	parser.add_argument("--import-xmltv", nargs="+", metavar="FILE", help="add the titles of XMLTV guides to the corpus and exit")
+	args = parser.parse_args()
+
+	if args.import_xmltv:
+		import_xmltv(args.corpus, args.import_xmltv)
+		return 0
+
+	functions = load_functions()
+	if args.functions:
+		wanted = {name.strip() for name in args.functions.split(",")}
+		unknown = wanted - {name for name, _, _ in functions}
+		if unknown:
+			parser.error(f"unknown functions: {', '.join(sorted(unknown))}")
+		functions = [item for item in functions if item[0] in wanted]
+
+	titles = load_corpus(args.corpus)
+	if not titles:
+		parser.error(f"empty corpus: {args.corpus}")
+	results = run(functions, titles, max(1, args.repeat))
+
+	if args.update_golden:
+		update_golden(args.golden, results, titles)
+		return 0
+	if not exists(args.golden):
+		print(f"No golden file at {args.golden} (run --update-golden)")
+		return 1
+	with open(args.golden, encoding="utf-8") as f:
+		golden = load(f)
+	return 1 if compare(results, titles, golden) else 0
+
+
+if __name__ == "__main__":
+	code = main()
+	stdout.flush()
+	# Agp_Utils starts a non-daemon log cleanup timer at import
+	_exit(code)
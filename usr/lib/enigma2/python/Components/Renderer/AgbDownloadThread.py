@@ -50,7 +50,7 @@ __copyright__ = "AGP Team"
 from os import remove, rename
 from os.path import exists, getsize
 from re import compile, findall, DOTALL, sub
-from threading import Thread
+from threading import Thread, local
 from json import loads as json_loads
 from random import choice
 from unicodedata import normalize
@@ -61,11 +61,7 @@ import logging
 
 # Third-party libraries
 from PIL import Image
-from requests import get, codes, Session
-from requests.adapters import HTTPAdapter, Retry
 from requests.exceptions import HTTPError, RequestException
-from twisted.internet.reactor import callInThread
-from functools import lru_cache
 
 # Enigma2 specific
 from enigma import getDesktop
@@ -75,6 +71,13 @@ from Components.config import config
 from .Agp_lib import quoteEventName
 from .Agp_apikeys import tmdb_api, thetvdb_api, fanart_api  # , omdb_api
 from .Agp_Utils import logger
+from .Agp_Requests import http_transport
+from .Agp_RateLimit import ProviderThrottled
+from .Agp_Revalidate import revalidator
+from .Agp_ProviderStats import content_class
+from .Agp_Resolver import title_resolver
+from .Agp_ResponseCache import response_cache
+from .Agp_DownloadGuard import ACCEPT, DownloadRejected, ImageTooLarge, download_guard
 
 # ========================
 # DISABLE URLLIB3 DEBUG LOGS
@@ -175,6 +178,17 @@ class AgbDownloadThread(Thread):
 	- Asynchronous Backdrop loading
 	"""
 
+	# Per-thread search state: the same instance serves several workers
+	_search_state = local()
+
+	@property
+	def title_safe(self):
+		return getattr(self._search_state, "title_safe", None)
+
+	@title_safe.setter
+	def title_safe(self, value):
+		self._search_state.title_safe = value
+
 	def __init__(self, *args, **kwargs):
 		Thread.__init__(self)
 		self._stop_event = threading.Event()
@@ -197,17 +211,6 @@ class AgbDownloadThread(Thread):
 			"clips", "concert", "santé", "éducation", "variété"
 		]
 
-		if config.plugins.Aglare.cache.value:
-			self.search_tmdb = lru_cache(maxsize=100)(self.search_tmdb)
-			self.search_tvdb = lru_cache(maxsize=100)(self.search_tvdb)
-			self.search_fanart = lru_cache(maxsize=100)(self.search_fanart)
-			self.search_omdb = lru_cache(maxsize=100)(self.search_omdb)
-			self.search_imdb = lru_cache(maxsize=100)(self.search_imdb)
-			self.search_programmetv_google = lru_cache(maxsize=100)(self.search_programmetv_google)
-			self.search_molotov_google = lru_cache(maxsize=100)(self.search_molotov_google)
-			self.search_elcinema = lru_cache(maxsize=100)(self.search_elcinema)
-			self.search_google = lru_cache(maxsize=100)(self.search_google)
-
 	def search_tmdb(self, dwn_backdrop, title, shortdesc, fulldesc, year=None, channel=None, api_key=None):
 		"""Download backdrop from TMDB with full verification pipeline"""
 		self.title_safe = self.UNAC(title.replace("+", " ").strip())
@@ -227,41 +230,13 @@ class AgbDownloadThread(Thread):
 			if not year:
 				year = self._extract_year(fd)
 
-			url = f"https://api.themoviedb.org/3/search/{srch}?api_key={tmdb_api_key}&language={lng}&query={self.title_safe}"  # &page=1&include_adult=false"
-
-			if year and srch == "movie":
-				url += f"&year={year}"
-
-			logger.debug(f"TMDB Search URL: {url}")
-			# Make API request with retries
-			retries = Retry(total=3, backoff_factor=1, status_forcelist=[500, 502, 503, 504])
-			adapter = HTTPAdapter(max_retries=retries)
-			http = Session()
-			http.mount("http://", adapter)
-			http.mount("https://", adapter)
-			response = http.get(url, headers=headers, timeout=(10, 20), verify=False)
-			response.raise_for_status()
-
-			if response.status_code == codes.ok:
-				try:
-					data = response.json()
-					return self.downloadData2(data, dwn_backdrop, shortdesc, fulldesc)
-				except ValueError as e:
-					logger.error("TMDb response decode error: " + str(e))
-					return False, "Error parsing TMDb response"
-			elif response.status_code == 404:
-				# Silently handle 404 - no result found
-				return False, "No results found on TMDb"
-			else:
-				return False, "TMDb request error: " + str(response.status_code)
-
-		except HTTPError as e:
-			if e.response is not None and e.response.status_code == 404:
-				# Suppress 404 HTTP errors
+			# One search per title, shared with the other artwork and metadata
+			# checkType answers "multi": the description keywords give the type hint
+			media_type = srch if srch in ("movie", "tv") else content_class(shortdesc, fulldesc)
+			ref = title_resolver.resolve_tmdb(title.replace("+", " ").strip(), year, tmdb_api_key, media_type)
+			if ref is None:
 				return False, "No results found on TMDb"
-			else:
-				logger.error("TMDb HTTP error: " + str(e))
-				return False, "HTTP error during TMDb search"
+			return self.downloadData2({"results": [ref]}, dwn_backdrop, shortdesc, fulldesc)
 
 		except Exception as e:
 			logger.error("TMDb search error: " + str(e))
@@ -297,7 +272,7 @@ class AgbDownloadThread(Thread):
 
 				if backdrop.strip():  # and not backdrop.endswith("/original"):
 					print(f'backdrop with w500 size, try with w500 -> {backdrop} ')
-					callInThread(self.saveBackdrop, backdrop, dwn_backdrop)
+					self.saveBackdrop(backdrop, dwn_backdrop)
 					if exists(dwn_backdrop):
 						return True, f"[SUCCESS] backdrop math: {title}"
 
@@ -325,7 +300,7 @@ class AgbDownloadThread(Thread):
 			if not year:
 				year = self._extract_year(fd)
 			url_tvdbg = "https://thetvdb.com/api/GetSeries.php?seriesname={}".format(self.title_safe)
-			url_read = get(url_tvdbg).text
+			url_read = response_cache.fetch(url_tvdbg).text
 			series_id = findall(r"<seriesid>(.*?)</seriesid>", url_read)
 			series_name = findall(r"<SeriesName>(.*?)</SeriesName>", url_read)
 			series_year = findall(r"<FirstAired>(19\d{2}|20\d{2})-\d{2}-\d{2}</FirstAired>", url_read)
@@ -354,11 +329,11 @@ class AgbDownloadThread(Thread):
 					url_tvdb = "https://thetvdb.com/api/{}/series/{}".format(thetvdb_api_key, series_id[series_nb])
 					url_tvdb += "/{}".format(lng if "lng" in globals() and lng else "en")
 
-					url_read = get(url_tvdb).text
+					url_read = response_cache.fetch(url_tvdb).text
 					backdrop = findall(r"<backdrop>(.*?)</backdrop>", url_read)
 					if backdrop and backdrop[0]:
 						url_backdrop = "https://artworks.thetvdb.com/banners/{}".format(backdrop[0])
-						callInThread(self.saveBackdrop, url_backdrop, dwn_backdrop)
+						self.saveBackdrop(url_backdrop, dwn_backdrop)
 						if exists(dwn_backdrop):
 							return True, "[SUCCESS : tvdb] {} [{}-{}] => {} => {} => {}".format(
 								self.title_safe, chkType, year, url_tvdbg, url_tvdb, url_backdrop
@@ -402,7 +377,7 @@ class AgbDownloadThread(Thread):
 
 		try:
 			url_maze = "http://api.tvmaze.com/singlesearch/shows?q={}".format(self.title_safe)
-			resp = get(url_maze, timeout=5)
+			resp = response_cache.fetch(url_maze, timeout=5)
 			resp.raise_for_status()
 			mj = resp.json()
 			tvmaze_id = mj.get("externals", {}).get("thetvdb", "-")
@@ -412,7 +387,7 @@ class AgbDownloadThread(Thread):
 		try:
 			m_type = "tv"
 			url_fanart = "https://webservice.fanart.tv/v3/{}/{}?api_key={}".format(m_type, tvmaze_id, fanart_api_key)
-			resp = get(url_fanart, verify=False, timeout=5)
+			resp = response_cache.fetch(url_fanart, verify=False, timeout=5)
 			resp.raise_for_status()
 			fjs = resp.json()
 			url = ""
@@ -423,7 +398,7 @@ class AgbDownloadThread(Thread):
 				url = fjs["moviebackground"][0]["url"]
 
 			if url:
-				callInThread(self.saveBackdrop, url, dwn_backdrop)
+				self.saveBackdrop(url, dwn_backdrop)
 				msg = "[SUCCESS backdrop: fanart] {} [{}-{}] => {} => {} => {}".format(
 					self.title_safe, chkType, year, url_maze, url_fanart, url
 				)
@@ -469,18 +444,13 @@ class AgbDownloadThread(Thread):
 			# Fetch search results
 			try:
 				# Make API request with retries
-				retries = Retry(total=3, backoff_factor=1, status_forcelist=[500, 502, 503, 504])
-				adapter = HTTPAdapter(max_retries=retries)
-				http = Session()
-				http.mount("http://", adapter)
-				http.mount("https://", adapter)
-				response = http.get(search_url, headers=headers, timeout=(10, 20), verify=False)
+				response = response_cache.fetch(search_url, headers=headers, timeout=(10, 20), verify=False)
 				response.raise_for_status()
 				results = self._parse_imdb_results(response.text)
 
 				if not results and aka_info:
 					fallback_url = "https://m.imdb.com/find?q={}".format(quoteEventName(self.title_safe))
-					response = http.get(fallback_url, headers=headers, timeout=(10, 20), verify=False)
+					response = response_cache.fetch(fallback_url, headers=headers, timeout=(10, 20), verify=False)
 					response.raise_for_status()
 					results = self._parse_imdb_results(response.text)
 
@@ -495,7 +465,7 @@ class AgbDownloadThread(Thread):
 
 			# Open gallery page
 			gallery_url = "https://www.imdb.com/title/{}/mediaindex/".format(match["imdb_id"])
-			response = get(gallery_url, headers=headers, timeout=(10, 20), verify=False)
+			response = response_cache.fetch(gallery_url, headers=headers, timeout=(10, 20), verify=False)
 			response.raise_for_status()
 			html = response.text.replace("&#39;", "'").replace("&quot;", '"')
 
@@ -503,7 +473,7 @@ class AgbDownloadThread(Thread):
 			matches = findall(r'<img src="(https://m\.media-amazon\.com/images/.*?)"', html)
 			if matches:
 				url_backdrop = matches[0].split("._")[0] + ".jpg"
-				callInThread(self.saveBackdrop, url_backdrop, dwn_backdrop)
+				self.saveBackdrop(url_backdrop, dwn_backdrop)
 
 				if exists(dwn_backdrop):
 					return (True, "[SUCCESS] IMDb backdrop downloaded")
@@ -554,9 +524,9 @@ class AgbDownloadThread(Thread):
 			url_ptv = "https://www.google.com/search?q={}&tbm=isch&tbs=ift:jpg%2Cisz:m".format(url_ptv)
 			default_headers = {"User-Agent": "Mozilla/5.0"}
 			try:
-				ff = get(url_ptv, stream=True, headers=headers, cookies={'CONSENT': 'YES+'}).text
+				ff = response_cache.fetch(url_ptv, stream=True, headers=headers, cookies={'CONSENT': 'YES+'}).text
 			except NameError:
-				ff = get(url_ptv, stream=True, headers=default_headers, cookies={'CONSENT': 'YES+'}).text
+				ff = response_cache.fetch(url_ptv, stream=True, headers=default_headers, cookies={'CONSENT': 'YES+'}).text
 
 			ptv_id = 0
 			plst = findall(r'\],\["https://www.programme-tv.net(.*?)",\d+,\d+]', ff)
@@ -579,7 +549,7 @@ class AgbDownloadThread(Thread):
 						h_tar = int(h_tar)
 						url_backdrop = sub(r'/\d+x\d+/', "/{}x{}/".format(w_tar, h_tar), url_backdrop)
 						url_backdrop = sub(r'crop-from/top/', '', url_backdrop)
-						callInThread(self.saveBackdrop, url_backdrop, dwn_backdrop)
+						self.saveBackdrop(url_backdrop, dwn_backdrop)
 						if exists(dwn_backdrop):
 							return True, "[SUCCESS url_backdrop: programmetv-google] {} [{}] => Found self.title_safe : '{}' => {} => {} (initial size: {}) [{}]".format(
 								self.title_safe, chkType, get_title, url_ptv, url_backdrop, url_backdrop_size, ptv_id
@@ -616,9 +586,9 @@ class AgbDownloadThread(Thread):
 
 			default_headers = {"User-Agent": "Mozilla/5.0"}
 			try:
-				ff = get(url_mgoo, stream=True, headers=headers, cookies={'CONSENT': 'YES+'}).text
+				ff = response_cache.fetch(url_mgoo, stream=True, headers=headers, cookies={'CONSENT': 'YES+'}).text
 			except NameError:
-				ff = get(url_mgoo, stream=True, headers=default_headers, cookies={'CONSENT': 'YES+'}).text
+				ff = response_cache.fetch(url_mgoo, stream=True, headers=default_headers, cookies={'CONSENT': 'YES+'}).text
 
 			plst = findall(r'https://www.molotov.tv/(.*?)"(?:.*?)?"(.*?)"', ff)
 			molotov_table = [0, 0, None, None, 0]  # [title match, channel match, title, path, id]
@@ -659,12 +629,12 @@ class AgbDownloadThread(Thread):
 		return self.UNAC(get_channel[0]).replace(' ', '') if get_channel else None
 
 	def handle_backdrop_result(self, molotov_table, headers, dwn_backdrop, platform):
-		ffm = get(molotov_table[3], stream=True, headers=headers).text
+		ffm = response_cache.fetch(molotov_table[3], stream=True, headers=headers).text
 
 		pltt = findall(r'"https://fusion.molotov.tv/(.*?)/jpg" alt="(.*?)"', ffm)
 		if len(pltt) > 0:
 			url_backdrop = f"https://fusion.molotov.tv/{pltt[0][0]}/jpg"
-			callInThread(self.saveBackdrop, url_backdrop, dwn_backdrop)
+			self.saveBackdrop(url_backdrop, dwn_backdrop)
 			if exists(dwn_backdrop):
 				return True, f"[SUCCESS {platform}-google] Found backdrop for {self.title_safe} => {url_backdrop}"
 		else:
@@ -676,7 +646,7 @@ class AgbDownloadThread(Thread):
 			for pl in plst:
 				if pl[1].startswith("Regarder"):
 					url_backdrop = f"https://{pl[0]}"
-					callInThread(self.saveBackdrop, url_backdrop, dwn_backdrop)
+					self.saveBackdrop(url_backdrop, dwn_backdrop)
 					if exists(dwn_backdrop):
 						return True, f"[SUCCESS fallback] Found fallback backdrop for {title_safe} => {url_backdrop}"
 		return False, "[SKIP : fallback] No suitable fallback found."
@@ -702,7 +672,7 @@ class AgbDownloadThread(Thread):
 				url_google += f"+{year}"
 
 			def fetch_images(url):
-				return get(url, stream=True, headers=headers, cookies={'CONSENT': 'YES+'}).text
+				return response_cache.fetch(url, stream=True, headers=headers, cookies={'CONSENT': 'YES+'}).text
 
 			url_google = f"https://www.google.com/search?q={url_google}&tbm=isch&tbs=sbd:0"
 			ff = fetch_images(url_google)
@@ -717,7 +687,7 @@ class AgbDownloadThread(Thread):
 			for pl in backdroplst:
 				url_backdrop = f"https://{pl}"
 				url_backdrop = sub(r"\\u003d", "=", url_backdrop)
-				callInThread(self.saveBackdrop, url_backdrop, dwn_backdrop)
+				self.saveBackdrop(url_backdrop, dwn_backdrop)
 				if exists(dwn_backdrop):
 					return True, f"[SUCCESS google] Found backdrop for {self.title_safe} => {url_backdrop}"
 
@@ -771,42 +741,60 @@ class AgbDownloadThread(Thread):
 			try:
 				headers = {
 					"User-Agent": choice(AGENTS),
-					"Accept": "image/jpeg",
+					"Accept": ACCEPT,
 					"Accept-Encoding": "gzip"
 				}
 
-				response = get(url, headers=headers, stream=True, timeout=(5, 15))
-				response.raise_for_status()
-
-				if "image/jpeg" not in response.headers.get("Content-Type", "").lower():
-					raise ValueError("Invalid content type: " + response.headers.get("Content-Type", ""))
+				with http_transport.get(url, headers=headers, stream=True, timeout=(5, 15)) as response:
+					response.raise_for_status()
 
-				with open(temp_path, "wb") as f:
-					for chunk in response.iter_content(chunk_size=8192):
-						if chunk:
-							f.write(chunk)
+					content_type = response.headers.get("Content-Type", "").lower()
+					if content_type and not content_type.startswith(("image/", "application/octet-stream", "binary/octet-stream")):
+						raise DownloadRejected("Invalid content type: " + content_type)
 
-				with open(temp_path, "rb") as f:
-					if f.read(2) != b"\xFF\xD8" or getsize(temp_path) < 1024:
-						raise ValueError("Invalid JPEG file")
+					# Size cap and image magic checked while streaming
+					download_guard.stream_image(response, temp_path)
+					validators = response.headers
 
 				rename(temp_path, filepath)
+				# ETag/Last-Modified for later conditional refreshes
+				revalidator.record(filepath, url, validators)
 				logger.debug("Successfully saved: " + url)
 				return True
 
+			except ProviderThrottled as e:
+				# Host paused after a 429: retrying now only extends the ban
+				logger.debug("Download skipped: " + str(e))
+				break
+
+			except ImageTooLarge as e:
+				if "/t/p/original/" not in url:
+					logger.debug("Download rejected: " + str(e) + " " + url)
+					break
+				# TMDB original backdrops run to several MB: ask for HD instead
+				url = url.replace("/t/p/original/", "/t/p/w1280/")
+				logger.debug("Original backdrop too large, retrying with " + url)
+				continue
+
+			except DownloadRejected as e:
+				# Same URL, same answer: do not retry
+				logger.debug("Download rejected: " + str(e) + " " + url)
+				break
+
 			except Exception as e:
 				logger.debug("Attempt " + str(attempt + 1) + " failed: " + str(e))
 				sleep(retry_delay * (attempt + 1))
 				continue
 
 		# logger.error("Failed after " + str(max_retries) + " attempts: " + url)
+		download_guard.note_failure()
 		return False
 
 	def resizeBackdrop(self, dwn_backdrop):
 		try:
 			img = Image.open(dwn_backdrop)
 			width, height = img.size
-			ratio = float(width) // float(height)
+			ratio = float(width) / float(height)
 			new_height = int(isz.split(",")[1])
 			new_width = int(ratio * new_height)
 			try:
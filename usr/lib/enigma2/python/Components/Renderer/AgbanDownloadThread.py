@@ -50,7 +50,7 @@ __copyright__ = "AGP Team"
 from os import remove, rename
 from os.path import exists, getsize
 from re import findall, sub
-from threading import Thread
+from threading import Thread, local
 from json import loads as json_loads
 from random import choice
 from unicodedata import normalize
@@ -60,11 +60,7 @@ import logging
 
 # Third-party libraries
 from PIL import Image
-from requests import get, codes, Session
-from requests.adapters import HTTPAdapter, Retry
 from requests.exceptions import HTTPError, RequestException
-from twisted.internet.reactor import callInThread
-from functools import lru_cache
 
 # Enigma2 specific
 from enigma import getDesktop
@@ -73,6 +69,13 @@ from Components.config import config
 # Local imports
 from .Agp_apikeys import tmdb_api, thetvdb_api, fanart_api  # , omdb_api
 from .Agp_Utils import logger
+from .Agp_Requests import http_transport
+from .Agp_RateLimit import ProviderThrottled
+from .Agp_Revalidate import revalidator
+from .Agp_ProviderStats import content_class
+from .Agp_Resolver import title_resolver
+from .Agp_ResponseCache import response_cache
+from .Agp_DownloadGuard import ACCEPT, DownloadRejected, download_guard
 
 
 # ========================
@@ -212,6 +215,17 @@ class AgbanDownloadThread(Thread):
     - Asynchronous Banner loading
     """
 
+    # Per-thread search state: the same instance serves several workers
+    _search_state = local()
+
+    @property
+    def title_safe(self):
+        return getattr(self._search_state, "title_safe", None)
+
+    @title_safe.setter
+    def title_safe(self, value):
+        self._search_state.title_safe = value
+
     def __init__(self):
         Thread.__init__(self)
         self.checkMovie = [
@@ -233,17 +247,6 @@ class AgbanDownloadThread(Thread):
             "clips", "concert", "santé", "éducation", "variété"
         ]
 
-        if config.plugins.Aglare.cache.value:
-            self.search_tmdb = lru_cache(maxsize=100)(self.search_tmdb)
-            self.search_tvdb = lru_cache(maxsize=100)(self.search_tvdb)
-            self.search_fanart = lru_cache(maxsize=100)(self.search_fanart)
-            self.search_omdb = lru_cache(maxsize=100)(self.search_omdb)
-            self.search_imdb = lru_cache(maxsize=100)(self.search_imdb)
-            self.search_programmetv_google = lru_cache(maxsize=100)(self.search_programmetv_google)
-            self.search_molotov_google = lru_cache(maxsize=100)(self.search_molotov_google)
-            self.search_elcinema = lru_cache(maxsize=100)(self.search_elcinema)
-            self.search_google = lru_cache(maxsize=100)(self.search_google)
-
     def search_tmdb(self, dwn_poster, title, shortdesc, fulldesc, year=None, channel=None, api_key=None):
         """Download banner from TMDB with full verification pipeline"""
         self.title_safe = self.UNAC(title.replace("+", " ").strip())
@@ -262,39 +265,13 @@ class AgbanDownloadThread(Thread):
             srch, fd = self.checkType(shortdesc, fulldesc)
             if not year:
                 year = self._extract_year(fd)
-            url = f"https://api.themoviedb.org/3/search/{srch}?api_key={tmdb_api_key}&language={lng}&query={self.title_safe}"  # &page=1&include_adult=false"
-
-            if year and srch == "movie":
-                url += f"&year={year}"
-            # Make API request with retries
-            retries = Retry(total=3, backoff_factor=1, status_forcelist=[500, 502, 503, 504])
-            adapter = HTTPAdapter(max_retries=retries)
-            http = Session()
-            http.mount("http://", adapter)
-            http.mount("https://", adapter)
-            response = http.get(url, headers=headers, timeout=(10, 20), verify=False)
-            response.raise_for_status()
-
-            if response.status_code == codes.ok:
-                try:
-                    data = response.json()
-                    return self.downloadBannerData(data, dwn_poster, shortdesc, fulldesc)
-                except ValueError as e:
-                    logger.error("TMDb response decode error: " + str(e))
-                    return False, "Error parsing TMDb response"
-            elif response.status_code == 404:
-                # Silently handle 404 - no result found
-                return False, "No results found on TMDb"
-            else:
-                return False, "TMDb request error: " + str(response.status_code)
-
-        except HTTPError as e:
-            if e.response is not None and e.response.status_code == 404:
-                # Suppress 404 HTTP errors
+            # One search per title, shared with the other artwork and metadata
+            # checkType answers "multi": the description keywords give the type hint
+            media_type = srch if srch in ("movie", "tv") else content_class(shortdesc, fulldesc)
+            ref = title_resolver.resolve_tmdb(title.replace("+", " ").strip(), year, tmdb_api_key, media_type)
+            if ref is None:
                 return False, "No results found on TMDb"
-            else:
-                logger.error("TMDb HTTP error: " + str(e))
-                return False, "HTTP error during TMDb search"
+            return self.downloadBannerData({"results": [ref]}, dwn_poster, shortdesc, fulldesc)
 
         except Exception as e:
             logger.error("TMDb search error: " + str(e))
@@ -329,7 +306,7 @@ class AgbanDownloadThread(Thread):
 
                 if banner.strip():  # and not banner.endswith("/original"):
                     print(f'banner with w500 size, try with w500 -> {banner} ')
-                    callInThread(self.savePoster, banner, dwn_poster)
+                    self.savePoster(banner, dwn_poster)
                     if exists(dwn_poster):
                         return True, f"[SUCCESS] banner math: {title}"
 
@@ -357,7 +334,7 @@ class AgbanDownloadThread(Thread):
             if not year:
                 year = self._extract_year(fd)
             url_tvdbg = "https://thetvdb.com/api/GetSeries.php?seriesname={}".format(self.title_safe)
-            url_read = get(url_tvdbg).text
+            url_read = response_cache.fetch(url_tvdbg).text
             series_id = findall(r"<seriesid>(.*?)</seriesid>", url_read)
             series_name = findall(r"<SeriesName>(.*?)</SeriesName>", url_read)
             series_year = findall(r"<FirstAired>(19\d{2}|20\d{2})-\d{2}-\d{2}</FirstAired>", url_read)
@@ -386,11 +363,11 @@ class AgbanDownloadThread(Thread):
                     url_tvdb = "https://thetvdb.com/api/{}/series/{}".format(thetvdb_api_key, series_id[series_nb])
                     url_tvdb += "/{}".format(lng if "lng" in globals() and lng else "en")
 
-                    url_read = get(url_tvdb).text
+                    url_read = response_cache.fetch(url_tvdb).text
                     banner = findall(r"<banner>(.*?)</banner>", url_read)
                     if banner and banner[0]:
                         url_banner = "https://artworks.thetvdb.com/banners/{}".format(banner[0])
-                        callInThread(self.saveBanner, url_banner, dwn_poster)
+                        self.savePoster(url_banner, dwn_poster)
                         if exists(dwn_poster):
                             return True, "[SUCCESS : tvdb] {} [{}-{}] => {} => {} => {}".format(
                                 self.title_safe, chkType, year, url_tvdbg, url_tvdb, url_banner
@@ -434,7 +411,7 @@ class AgbanDownloadThread(Thread):
 
         try:
             url_maze = "http://api.tvmaze.com/singlesearch/shows?q={}".format(self.title_safe)
-            resp = get(url_maze, timeout=5)
+            resp = response_cache.fetch(url_maze, timeout=5)
             resp.raise_for_status()
             mj = resp.json()
             tvmaze_id = mj.get("externals", {}).get("thetvdb", "-")
@@ -444,7 +421,7 @@ class AgbanDownloadThread(Thread):
         try:
             m_type = "tv"
             url_fanart = "https://webservice.fanart.tv/v3/{}/{}?api_key={}".format(m_type, tvmaze_id, fanart_api_key)
-            resp = get(url_fanart, verify=False, timeout=5)
+            resp = response_cache.fetch(url_fanart, verify=False, timeout=5)
             resp.raise_for_status()
             fjs = resp.json()
             url = ""
@@ -455,7 +432,7 @@ class AgbanDownloadThread(Thread):
                 url = fjs["moviebanner"][0]["url"]
 
             if url:
-                callInThread(self.saveBanner, url, dwn_poster)
+                self.savePoster(url, dwn_poster)
                 msg = "[SUCCESS banner: fanart] {} [{}-{}] => {} => {} => {}".format(
                     self.title_safe, chkType, year, url_maze, url_fanart, url
                 )
@@ -532,42 +509,51 @@ class AgbanDownloadThread(Thread):
             try:
                 headers = {
                     "User-Agent": choice(AGENTS),
-                    "Accept": "image/jpeg",
+                    "Accept": ACCEPT,
                     "Accept-Encoding": "gzip"
                 }
 
-                response = get(url, headers=headers, stream=True, timeout=(5, 15))
-                response.raise_for_status()
+                with http_transport.get(url, headers=headers, stream=True, timeout=(5, 15)) as response:
+                    response.raise_for_status()
 
-                if "image/jpeg" not in response.headers.get("Content-Type", "").lower():
-                    raise ValueError("Invalid content type: " + response.headers.get("Content-Type", ""))
+                    content_type = response.headers.get("Content-Type", "").lower()
+                    if content_type and not content_type.startswith(("image/", "application/octet-stream", "binary/octet-stream")):
+                        raise DownloadRejected("Invalid content type: " + content_type)
 
-                with open(temp_path, "wb") as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        if chunk:
-                            f.write(chunk)
-
-                with open(temp_path, "rb") as f:
-                    if f.read(2) != b"\xFF\xD8" or getsize(temp_path) < 1024:
-                        raise ValueError("Invalid JPEG file")
+                    # Size cap and image magic checked while streaming
+                    download_guard.stream_image(response, temp_path)
+                    validators = response.headers
 
                 rename(temp_path, filepath)
+                # ETag/Last-Modified for later conditional refreshes
+                revalidator.record(filepath, url, validators)
                 logger.debug("Successfully saved: " + url)
                 return True
 
+            except ProviderThrottled as e:
+                # Host paused after a 429: retrying now only extends the ban
+                logger.debug("Download skipped: " + str(e))
+                break
+
+            except DownloadRejected as e:
+                # Same URL, same answer: do not retry
+                logger.debug("Download rejected: " + str(e) + " " + url)
+                break
+
             except Exception as e:
                 logger.debug("Attempt " + str(attempt + 1) + " failed: " + str(e))
                 sleep(retry_delay * (attempt + 1))
                 continue
 
         # logger.error("Failed after " + str(max_retries) + " attempts: " + url)
+        download_guard.note_failure()
         return False
 
     def resizePoster(self, dwn_poster):
         try:
             img = Image.open(dwn_poster)
             width, height = img.size
-            ratio = float(width) // float(height)
+            ratio = float(width) / float(height)
             new_height = int(isz.split(",")[1])
             new_width = int(ratio * new_height)
             try:
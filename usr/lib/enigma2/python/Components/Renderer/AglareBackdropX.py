@@ -48,18 +48,17 @@ __copyright__ = "AGP Team"
 
 # Standard library
 from datetime import datetime
-from os import remove, makedirs
-from os.path import join, exists, getsize
+from os import remove, makedirs, replace
+from os.path import join, exists, getsize, getmtime
 from re import compile, sub
 import threading
-from threading import Thread, Lock
+from threading import Lock, Semaphore
 from datetime import timedelta
-from time import sleep, time
+from time import monotonic, sleep, time
 from traceback import print_exc, format_exc
 from collections import OrderedDict
-from queue import LifoQueue
 # from functools import lru_cache
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 
 # Enigma2 specific imports
 from enigma import ePixmap, loadJPG, eEPGCache, eTimer
@@ -74,12 +73,28 @@ import NavigationInstance
 # Local imports
 from Plugins.Extensions.Aglare.api_config import cfg
 from Plugins.Extensions.Aglare.api_config import ApiKeyManager
-from Components.Renderer.AgbDownloadThread import AgbDownloadThread
+from Components.Renderer.AgbDownloadThread import AgbDownloadThread, isz
 from .Agp_Requests import intCheck
+from .Agp_Inflight import artwork_flight
+from .Agp_ScanEngine import ScanEngine, scan_interval_hours
+from .Agp_ScanState import ScanState
+from .Agp_Scheduler import ArtworkScheduler, PRIO_VISIBLE, PRIO_NEXT
+from .Agp_Prefetch import ArtworkPrefetcher
+from .Agp_ZapModel import zap_model
+from .Agp_Storage import storage_manager
+from .Agp_Revalidate import revalidator
+from .Agp_MissCache import miss_cache
+from .Agp_Resolver import title_resolver
+from .Agp_RateLimit import rate_limiter
+from .Agp_DownloadGuard import download_guard
+from .Agp_ProviderStats import provider_stats, stats_class
+from .Agp_Notify import artwork_notifier
+from .Agp_ArtIndex import artwork_index
+from .Agp_PixmapCache import pixmap_cache
+from .Agp_Variants import artwork_variants
+from .Agp_PicDecoder import AsyncPicLoader
 from .Agp_Utils import (
 	BACKDROP_FOLDER,
-	check_disk_space,
-	delete_old_files_if_low_disk_space,
 	validate_media_path,
 	# MemClean,
 	clean_for_tvdb,
@@ -95,7 +110,11 @@ if not BACKDROP_FOLDER.endswith("/"):
 # Constants and global variables
 epgcache = eEPGCache.getInstance()
 epgcache.load()
-pdb = LifoQueue()
+pdb = ArtworkScheduler("backdrop")
+backdrop_prefetch = ArtworkPrefetcher(pdb)
+artwork_index.watch(BACKDROP_FOLDER)
+# screen tier box the downloaded originals are shrunk to
+BACKDROP_BOX = tuple(int(x) for x in isz.split(","))
 # Create an API Key Manager instance
 api_key_manager = ApiKeyManager()
 
@@ -174,6 +193,9 @@ class AglareBackdropX(Renderer):
 		self.pstcanal = None
 		self.pstrNm = None
 		self.backrNm = None
+		self.notify_key = None
+		self.widget_size = None
+		self.decoder = AsyncPicLoader(self.onBackdropDecoded)
 
 		self.log_file = join(secure_log_dir, "AglareBackdropX.log")
 		clear_all_log()
@@ -210,7 +232,13 @@ class AglareBackdropX(Renderer):
 			attribs.append((attrib, value))
 
 		self.skinAttributes = attribs
-		return Renderer.applySkin(self, desktop, parent)
+		ret = Renderer.applySkin(self, desktop, parent)
+		if self.instance:
+			# Images are prepared at this size by the download threads
+			size = self.instance.size()
+			self.widget_size = (size.width(), size.height())
+			artwork_variants.register("backdrop", self.widget_size)
+		return ret
 
 	def changed(self, what):
 		"""Handle screen/channel changes and update backdrop"""
@@ -301,20 +329,34 @@ class AglareBackdropX(Renderer):
 			if not self.pstcanal:
 				return
 
-			if self.pstcanal in self.backdrop_cache:
-				cached_path = self.backdrop_cache[self.pstcanal]
-				if checkBackdropExistence(cached_path):
-					self.showBackdrop(cached_path)
-					return
+			# Zapped away: pending jobs queued for the previous event are stale
+			pdb.retire(id(self), self.pstcanal)
+			# The subscription and decode belong to the previous event
+			self.decoder.cancel()
+			if self.notify_key:
+				artwork_notifier.unsubscribe(self.notify_key, self.onBackdropReady)
+				self.notify_key = None
 
-			# Try to display existing backdrop
+			cached_path = self.backdrop_cache.get(self.pstcanal)
 			backdrop_path = join(self.storage_path, f"{self.pstcanal}.jpg")
-			if checkBackdropExistence(backdrop_path):
+			if cached_path and checkBackdropExistence(cached_path):
+				self.showBackdrop(cached_path)
+			# Try to display existing backdrop
+			elif checkBackdropExistence(backdrop_path):
 				self.showBackdrop(backdrop_path)
 			else:
 				# Queue for download if not available
-				pdb.put(self.canal[:])
-				self.runBackdropThread()
+				self.waitBackdrop()
+				pdb.put(
+					self.canal[:],
+					key=self.pstcanal,
+					priority=PRIO_NEXT if self.nxts else PRIO_VISIBLE,
+					owner=id(self)
+				)
+
+			# Queue the titles the user is likely to see next
+			if service is not None and not self.nxts:
+				backdrop_prefetch.prefetch(service_str, service_name, events, id(self), self._hasBackdrop)
 
 		except Exception as e:
 			logger.error(f"Error in changed: {str(e)}")
@@ -322,6 +364,9 @@ class AglareBackdropX(Renderer):
 				self.instance.hide()
 			return
 
+	def _hasBackdrop(self, title):
+		return checkBackdropExistence(join(self.storage_path, f"{title}.jpg"))
+
 	def generateBackdropPath(self):
 		"""Generate filesystem path for current program's backdrop"""
 		if len(self.canal) > 5 and self.canal[5]:
@@ -329,16 +374,6 @@ class AglareBackdropX(Renderer):
 			return join(self.storage_path, str(self.pstcanal) + ".jpg")
 		return None
 
-	def runBackdropThread(self):
-		"""Start background thread to wait for backdrop download"""
-		"""
-		# for provider in self.providers:
-			# if str(self.providers[provider]).lower() == "true":
-				# self._log_debug(f"Providers attivi: {provider}")
-		"""
-		# Thread(target=self.waitBackdrop).start()
-		Thread(target=self.waitBackdrop, daemon=True).start()
-
 	def showBackdrop(self, backdrop_path=None):
 		"""Display the backdrop image"""
 		if not self.instance:
@@ -346,14 +381,32 @@ class AglareBackdropX(Renderer):
 
 		if self.instance:
 			self.instance.hide()
+		self.decoder.cancel()
 
 		# Use cached path if none provided
 		if not backdrop_path and self.backrNm:
 			backdrop_path = self.backrNm
 		if backdrop_path and checkBackdropExistence(backdrop_path):
-			self.instance.setPixmap(loadJPG(backdrop_path))
-			self.instance.setScale(1)
-			self.instance.show()
+			# Variant already at widget size when there is one
+			backdrop_path = artwork_variants.pick(backdrop_path, self.widget_size)
+			if self.widget_size:
+				# Decoded off the main loop, shown by onBackdropDecoded()
+				self.decoder.load(backdrop_path, self.widget_size)
+				return
+			# Widget size unknown: synchronous decode, cached
+			self.onBackdropDecoded(backdrop_path, pixmap_cache.load(backdrop_path, loadJPG))
+
+	def onBackdropDecoded(self, backdrop_path, pixmap):
+		"""Main loop callback: the pixmap of backdrop_path is ready"""
+		if not self.instance:
+			return
+		if pixmap is None:
+			# Stale index entry: the file is gone or unreadable
+			artwork_index.discard(backdrop_path)
+			return
+		self.instance.setPixmap(pixmap)
+		self.instance.setScale(1)
+		self.instance.show()
 
 	"""
 	# def showBackdrop(self, backdrop_path=None):
@@ -396,23 +449,36 @@ class AglareBackdropX(Renderer):
 	"""
 
 	def waitBackdrop(self):
-		"""Wait for Backdrop download to complete with retries"""
-		if not self.instance or not self.canal[5]:
+		"""Subscribe to the download completion event of the current title"""
+		if not self.instance or not self.pstcanal:
 			return
 
 		self.backrNm = None
-		pstcanal = clean_for_tvdb(self.canal[5])
-		backdrop_path = join(self.storage_path, f"{pstcanal}.jpg")
+		# A decode still running for the previous event must not show up
+		self.decoder.cancel()
+		if self.notify_key:
+			artwork_notifier.unsubscribe(self.notify_key, self.onBackdropReady)
+		self.notify_key = ("backdrop", self.pstcanal)
+		artwork_notifier.subscribe(self.notify_key, self.onBackdropReady)
+
+	def onBackdropReady(self, key, backdrop_path):
+		"""Main loop callback fired when the download job for key ends"""
+		if key != self.notify_key:
+			return
 
-		for attempt in range(5):
-			if checkBackdropExistence(backdrop_path):
-				self.backrNm = backdrop_path
-				# logger.debug(f"Backdrop found after {attempt} attempts")
-				self.showBackdrop(backdrop_path)
-				return
+		self.notify_key = None
+		if not backdrop_path or not checkBackdropExistence(backdrop_path):
+			# logger.warning(f"backdrop not found: {key[1]}")
+			return
 
-			sleep(0.3 * (attempt + 1))
-		# logger.warning(f"backdrop not found after retries: {backdrop_path}")
+		self.backrNm = backdrop_path
+		# Freshly downloaded: a pixmap cached for this path is outdated
+		pixmap_cache.invalidate(backdrop_path)
+		if len(self.backdrop_cache) > 50:
+			# Drop the oldest title only
+			del self.backdrop_cache[next(iter(self.backdrop_cache))]
+		self.backdrop_cache[key[1]] = backdrop_path
+		self.showBackdrop(backdrop_path)
 
 	def check_valid_backdrop(self, path):
 		"""Verify Backdrop is valid JPEG and >1KB"""
@@ -422,12 +488,14 @@ class AglareBackdropX(Renderer):
 
 			if getsize(path) < 1024:
 				remove(path)
+				artwork_index.discard(path)
 				return False
 
 			with open(path, 'rb') as f:
 				header = f.read(2)
 				if header != b'\xFF\xD8':  # JPEG magic number
 					remove(path)
+					artwork_index.discard(path)
 					return False
 			return True
 		except Exception as e:
@@ -477,8 +545,9 @@ class BackdropDB(AgbDownloadThread):
 		self.pstcanal = None
 		self.logdbg = None
 		self.extensions = extensions
-		self.queued_backdrops = set()
 		self.executor = ThreadPoolExecutor(max_workers=3)
+		self.hedge_executor = ThreadPoolExecutor(max_workers=6)
+		self.workers = Semaphore(3)
 		self.service_pattern = compile(r'^#SERVICE (\d+):([^:]+:[^:]+:[^:]+:[^:]+:[^:]+:[^:]+)')
 
 		self.log_file = join(secure_log_dir, "BackdropDB.log")
@@ -507,82 +576,212 @@ class BackdropDB(AgbDownloadThread):
 	def run(self):
 		"""Main processing loop - handles incoming channel requests"""
 		while True:
-			canal = pdb.get()
-			self.process_canal(canal)
+			# Take a job only when a worker is free, so that waiting jobs
+			# stay in the scheduler where they can still be reordered or cancelled
+			self.workers.acquire()
+			job = pdb.get_job()
+			# Hedged provider lookups only for what is on screen now
+			self.process_canal(job.item, interactive=job.priority == PRIO_VISIBLE)
 			pdb.task_done()
 
-	def process_canal(self, canal):
+	def process_canal(self, canal, interactive=False):
 		"""Schedule channel processing in thread pool"""
-		self.executor.submit(self._process_canal_task, canal)
+		future = self.executor.submit(self._process_canal_task, canal, interactive)
+		future.add_done_callback(lambda _: self.workers.release())
 
-	def _process_canal_task(self, canal):
+	def _process_canal_task(self, canal, interactive=False):
 		"""Download and process backdrop for a single channel"""
 		try:
-			self.pstcanal = clean_for_tvdb(canal[5])
-			if not self.pstcanal:
+			pstcanal = clean_for_tvdb(canal[5])
+			if not pstcanal:
 				logger.error(f"Invalid channel name: {canal[0]}")
 				return
 
-			backdrop_path = join(BACKDROP_FOLDER, f"{self.pstcanal}.jpg")
+			self.pstcanal = pstcanal
+			backdrop_path = join(BACKDROP_FOLDER, f"{pstcanal}.jpg")
+
+			# Attach to an identical download already running in any thread
+			result, shared = artwork_flight.do(
+				("backdrop", pstcanal),
+				self._download_canal,
+				canal,
+				pstcanal,
+				backdrop_path,
+				interactive
+			)
+			if shared:
+				logger.debug(f"Backdrop request coalesced: {pstcanal} -> {result}")
+			else:
+				artwork_notifier.publish(("backdrop", pstcanal), result)
 
-			# Check if already in the queue
-			"""
-			if self.pstcanal in self.queued_backdrops:
-				logger.debug(f"Backdrop already queued: {self.pstcanal}")
-				return
-			"""
-			# Add to queue and process
-			with Lock():
-				self.queued_backdrops.add(self.pstcanal)
+		except Exception as e:
+			logger.error(f"Critical error in _process_canal_task: {str(e)}")
+			logger.error(format_exc())
 
-			try:
-				# Check if a valid file already exists
-				if self.check_valid_backdrop(backdrop_path):
-					# logger.debug(f"Valid backdrop exists: {backdrop_path}")
-					return
+	def _download_canal(self, canal, pstcanal, backdrop_path, interactive=False):
+		"""Run the provider chain for a title, return the backdrop path or None"""
+		# Check if a valid file already exists
+		if checkBackdropExistence(backdrop_path):
+			# logger.debug(f"Valid backdrop exists: {backdrop_path}")
+			return backdrop_path
+
+		logger.info(f"Starting download: {pstcanal}")
+
+		# Best measured providers first for this kind of content
+		kind = stats_class(canal[5], canal[4], canal[3])
+		candidates = []
+		for provider_name, provider_func in provider_stats.order(self.provider_engines, kind):
+			api_key = self._provider_ready(provider_name, pstcanal, kind)
+			if api_key:
+				candidates.append((provider_name, provider_func, api_key))
+
+		# Title on screen now: race the best providers instead of paying
+		# for a slow miss of the first one before the next is asked
+		if interactive and len(candidates) > 1:
+			race = candidates[:1] + [
+				candidate for candidate in candidates[1:self._hedge_width()]
+				if rate_limiter.has_budget(candidate[0])
+			]
+			if len(race) > 1:
+				winner = self._race_providers(race, canal, pstcanal, backdrop_path, kind)
+				if winner:
+					artwork_variants.finish(backdrop_path, "backdrop", BACKDROP_BOX, winner)
+					miss_cache.record_hit("backdrop", pstcanal)
+					return backdrop_path
+				candidates = [candidate for candidate in candidates if candidate not in race]
+
+		for provider_name, provider_func, api_key in candidates:
+			if self._fetch_from(provider_name, provider_func, api_key, canal, pstcanal, backdrop_path, kind):
+				artwork_variants.finish(backdrop_path, "backdrop", BACKDROP_BOX, provider_name)
+				miss_cache.record_hit("backdrop", pstcanal)
+				return backdrop_path
 
-				logger.info(f"Starting download: {self.pstcanal}")
+		return None
 
-				# Sort providers by configured priority
-				sorted_providers = sorted(
-					self.provider_engines,
-					key=lambda x: self.providers.get(x[0], 0),
-					reverse=True
-				)
+	def _provider_ready(self, provider_name, pstcanal, kind):
+		"""Return the API key when provider may be asked for pstcanal now"""
+		# Retrieve the API key for the current provider
+		api_key = api_key_manager.get_api_key(provider_name)
+		if not api_key:
+			logger.warning(f"Missing API key for {provider_name}")
+			return None
 
-				for provider_name, provider_func in sorted_providers:
-					try:
-						# Retrieve the API key for the current provider
-						api_key = api_key_manager.get_api_key(provider_name)
-						if not api_key:
-							logger.warning(f"Missing API key for {provider_name}")
-							continue
-
-						# Call the provider function to download the backdrop
-						result = provider_func(
-							dwn_backdrop=backdrop_path,
-							title=self.pstcanal,
-							shortdesc=canal[4],
-							fulldesc=canal[3],
-							channel=canal[0],
-							api_key=api_key
-						)
-						if result and self.check_valid_backdrop(backdrop_path):
-							logger.info(f"Download successful with {provider_name}")
-							break
+		# Provider paused after a 429: try the next one
+		if rate_limiter.provider_throttled(provider_name):
+			logger.debug(f"Skipping {provider_name}, rate limited")
+			return None
 
-					except Exception as e:
-						logger.error(f"Error with {provider_name}: {str(e)}")
-						continue
+		# Skip providers that recently failed for this title
+		if miss_cache.should_skip("backdrop", pstcanal, provider_name):
+			logger.debug(f"Skipping {provider_name}, recent miss for: {pstcanal}")
+			return None
+
+		# Slow scrapers only while they actually find something
+		if not provider_stats.allowed(provider_name, kind):
+			logger.debug(f"Skipping {provider_name}, hit rate too low")
+			return None
+
+		return api_key
+
+	def _fetch_from(self, provider_name, provider_func, api_key, canal, pstcanal, dest, kind):
+		"""Ask a single provider, True when a valid backdrop was saved to dest"""
+		if rate_limiter.provider_throttled(provider_name):
+			return False
 
-			finally:
-				# Remove the channel from the queue after processing
-				with Lock():
-					self.queued_backdrops.discard(self.pstcanal)
+		started = monotonic()
+		try:
+			# Call the provider function to download the backdrop
+			rate_limiter.track()
+			download_guard.track()
+			result = provider_func(
+				dwn_backdrop=dest,
+				title=pstcanal,
+				shortdesc=canal[4],
+				fulldesc=canal[3],
+				channel=canal[0],
+				api_key=api_key
+			)
+			# The providers save before returning: dest is complete here
+			if result and self.check_valid_backdrop(dest):
+				provider_stats.record(provider_name, kind, "hit", monotonic() - started)
+				logger.info(f"Download successful with {provider_name}")
+				return True
+
+			if rate_limiter.provider_skipped(provider_name):
+				return False
+			if download_guard.failed():
+				# Title matched, image download failed: not a miss for the title
+				logger.warning(f"{provider_name} matched {pstcanal} but the download failed")
+				provider_stats.record(provider_name, kind, "error", monotonic() - started)
+				return False
+			provider_stats.record(provider_name, kind, "miss", monotonic() - started)
+			self.mark_failed_attempt(pstcanal, provider_name)
 
 		except Exception as e:
-			logger.error(f"Critical error in _process_canal_task: {str(e)}")
-			logger.error(format_exc())
+			if not rate_limiter.provider_skipped(provider_name):
+				provider_stats.record(provider_name, kind, "error", monotonic() - started)
+			logger.error(f"Error with {provider_name}: {str(e)}")
+
+		return False
+
+	def _race_providers(self, race, canal, pstcanal, backdrop_path, kind):
+		"""
+		Hedged lookup: query the providers of race in parallel
+
+		Return the name of the provider that won, or None.
+		Every provider saves to its own hidden file; the first valid one
+		is moved to backdrop_path, the others are cancelled when not started
+		yet, or discarded when they complete.
+		"""
+		futures = {}
+		for provider_name, provider_func, api_key in race:
+			hedge_path = join(BACKDROP_FOLDER, f".hedge-{provider_name}-{pstcanal}.jpg")
+			future = self.hedge_executor.submit(
+				self._fetch_from, provider_name, provider_func, api_key,
+				canal, pstcanal, hedge_path, kind
+			)
+			futures[future] = (provider_name, hedge_path)
+
+		logger.debug(f"Hedged lookup for {pstcanal}: {[r[0] for r in race]}")
+		winner = None
+		pending = set(futures)
+		try:
+			while pending and winner is None:
+				done, pending = wait(pending, return_when=FIRST_COMPLETED)
+				for future in done:
+					if winner is None and future.result():
+						winner = futures[future]
+			if winner:
+				replace(winner[1], backdrop_path)
+				revalidator.moved(winner[1], backdrop_path)
+				return winner[0]
+		except Exception as e:
+			logger.error(f"Hedged lookup failed for {pstcanal}: {str(e)}")
+		finally:
+			for future, (provider_name, hedge_path) in futures.items():
+				if winner and hedge_path == winner[1]:
+					continue
+				if future.done() or future.cancel():
+					self._discard_hedge(hedge_path)
+				else:
+					future.add_done_callback(lambda _, path=hedge_path: self._discard_hedge(path))
+		return None
+
+	@staticmethod
+	def _discard_hedge(hedge_path):
+		revalidator.forget(hedge_path)
+		try:
+			if exists(hedge_path):
+				remove(hedge_path)
+		except Exception as e:
+			logger.debug(f"Hedge cleanup failed: {str(e)}")
+
+	@staticmethod
+	def _hedge_width():
+		try:
+			return int(cfg.hedge_providers.value)
+		except Exception:
+			return 2
 
 	def check_valid_backdrop(self, path):
 		"""Verify backdrop is valid JPEG and >1KB"""
@@ -592,12 +791,14 @@ class BackdropDB(AgbDownloadThread):
 
 			if getsize(path) < 1024:
 				remove(path)
+				artwork_index.discard(path)
 				return False
 
 			with open(path, 'rb') as f:
 				header = f.read(2)
 				if header != b'\xFF\xD8':  # JPEG magic number
 					remove(path)
+					artwork_index.discard(path)
 					return False
 			return True
 		except Exception as e:
@@ -612,9 +813,12 @@ class BackdropDB(AgbDownloadThread):
 			# oldest = next(iter(self.backdrop_cache))
 			# del self.backdrop_cache[oldest]
 
-	def mark_failed_attempt(self, canal_name):
-		"""Track failed download attempts"""
-		self._log_debug(f"Failed attempt for {canal_name}")
+	def mark_failed_attempt(self, canal_name, provider_name):
+		"""Track failed download attempts in the persistent miss cache"""
+		self._log_debug(f"Failed attempt for {canal_name} with {provider_name}")
+		# A throttled provider did not really answer: not a miss
+		if not rate_limiter.provider_skipped(provider_name):
+			miss_cache.record_miss("backdrop", canal_name, provider_name)
 
 	def _log_info(self, message):
 		self._write_log("INFO", message)
@@ -675,13 +879,15 @@ class BackdropAutoDB(AgbDownloadThread):
 		self.backdrop_download_count = 0
 		self.max_backdrops = max_backdrops
 		self.min_disk_space = 100
-		self.max_backdrop_age = 30
 		self.last_scan = 0
 
 		self.abdb = OrderedDict()
 		self.service_queue = []
 		self.processed_titles = OrderedDict()
 		self.provider_engines = []
+		self.scan_engine = ScanEngine("backdrop")
+		self.scan_state = ScanState("backdrop")
+		self.count_lock = Lock()
 
 		self.providers = {}
 		self.pstcanal = None
@@ -835,6 +1041,16 @@ class BackdropAutoDB(AgbDownloadThread):
 		if next_run <= current_time:
 			next_run += timedelta(days=1)
 
+		# Incremental scans can run every few hours instead of once a day
+		interval = scan_interval_hours()
+		if interval < 24:
+			if self.last_scan:
+				next_run = datetime.fromtimestamp(self.last_scan) + timedelta(hours=interval)
+			else:
+				next_run = current_time + timedelta(hours=interval)
+			if next_run <= current_time:
+				next_run = current_time
+
 		logger.debug(f"Next scan: {next_run.strftime('%Y-%m-%d %H:%M:%S')}")
 		return next_run
 
@@ -845,12 +1061,33 @@ class BackdropAutoDB(AgbDownloadThread):
 				logger.debug("Starting scheduled scan")
 				self._full_scan()
 				self._process_services()
+				miss_cache.save(force=True)
+				provider_stats.save(force=True)
+				zap_model.save(force=True)
+				title_resolver.save(force=True)
+				self._refresh_artwork()
 				self.last_scan = time()
 				logger.debug("Scheduled scan completed")
 
+	def _refresh_artwork(self):
+		"""Revalidate old backdrops and metadata with conditional requests"""
+		try:
+			days = int(cfg.refresh_artwork.value)
+		except Exception:
+			days = 0
+		if days:
+			revalidator.refresh(BACKDROP_FOLDER, days, api_key_manager.get_api_key, self._on_refreshed)
+
+	@staticmethod
+	def _on_refreshed(path):
+		"""A backdrop or metadata file was replaced by a newer version"""
+		if path.endswith(".jpg"):
+			artwork_variants.finish(path, "backdrop", BACKDROP_BOX)
+
 	def stop(self):
 		"""Safe stop with timeout"""
 		self.active = False
+		self.scan_engine.stop()
 		self._active_event.set()
 		if self.is_alive():
 			self.join(timeout=2.0)
@@ -887,17 +1124,27 @@ class BackdropAutoDB(AgbDownloadThread):
 		for bouquet in bouquets:
 			if exists(bouquet):
 				try:
-					with open(bouquet, "r", encoding="utf-8", errors="ignore") as f:
-						for line in f:
-							line = line.strip()
-							if line.startswith("#SERVICE") and "FROM BOUQUET" not in line:
-								service_ref = line[9:]
-								if self._is_valid_service(service_ref):
-									services[service_ref] = None
-									self.abdb[service_ref] = service_ref
+					mtime = getmtime(bouquet)
+					bouquet_services = self.scan_state.bouquet_services(bouquet, mtime)
+					if bouquet_services is None:
+						# New or modified bouquet: parse it again
+						bouquet_services = []
+						with open(bouquet, "r", encoding="utf-8", errors="ignore") as f:
+							for line in f:
+								line = line.strip()
+								if line.startswith("#SERVICE") and "FROM BOUQUET" not in line:
+									service_ref = line[9:]
+									if self._is_valid_service(service_ref):
+										bouquet_services.append(service_ref)
+						self.scan_state.store_bouquet(bouquet, mtime, bouquet_services)
+
+					for service_ref in bouquet_services:
+						services[service_ref] = None
+						self.abdb[service_ref] = service_ref
 				except Exception as e:
 					self._log_error(f"Error reading bouquet {bouquet}: {str(e)}")
 
+		self.scan_state.forget_bouquets(bouquets)
 		return list(services.keys())
 
 	def _is_valid_service(self, sref):
@@ -908,7 +1155,11 @@ class BackdropAutoDB(AgbDownloadThread):
 		return parts[3:6] != ["0", "0", "0"]
 
 	def _process_services(self):
-		"""Process all services and download backdrops"""
+		"""Collect the EPG of all services and download backdrops in parallel"""
+		self.processed_titles.clear()
+		jobs = []
+		duplicates = 0
+		unchanged = 0
 		for service_ref in self.abdb.values():
 			try:
 				events = epgcache.lookupEvent(['IBDCTESX', (service_ref, 0, -1, 1440)])
@@ -918,13 +1169,37 @@ class BackdropAutoDB(AgbDownloadThread):
 
 				for evt in events:
 					canal = self._prepare_canal_data(service_ref, evt)
-					if canal:
-						self._download_backdrop(canal)
+					if not canal:
+						continue
+					# Handled by a previous run and not changed since
+					if self.scan_state.is_done(service_ref, evt[0], evt[1], canal[5]):
+						unchanged += 1
+						continue
+					event_ref = (service_ref, evt[0], evt[1], canal[5])
+					# Same title on several channels: dispatch it only once
+					if canal[5] in self.processed_titles:
+						self.processed_titles[canal[5]].append(event_ref)
+						duplicates += 1
+						continue
+					self.processed_titles[canal[5]] = [event_ref]
+					jobs.append((canal[5], canal))
 
 			except Exception as e:
 				self._log_error(f"Error processing service {service_ref}: {str(e)}")
 				print_exc()
 
+		logger.info(f"Incremental scan: {unchanged} events unchanged since the last run")
+		self.scan_engine.run(jobs, self._scan_title, duplicates)
+		self.scan_state.prune()
+		self.scan_state.save()
+
+	def _scan_title(self, canal):
+		"""Scan job: download one title and record the outcome of its events"""
+		outcome = self._download_backdrop(canal)
+		for event_ref in self.processed_titles.get(canal[5], []):
+			self.scan_state.record(*event_ref, outcome)
+		return outcome
+
 	def _prepare_canal_data(self, service_ref, event):
 		try:
 			# Get service name from service reference
@@ -956,74 +1231,107 @@ class BackdropAutoDB(AgbDownloadThread):
 			return None
 
 	def _download_backdrop(self, canal):
-		"""Download backdrop with provider fallback logic"""
+		"""Download backdrop with provider fallback logic, return the scan outcome"""
 		try:
-			if not self._pre_download_checks(canal):
-				return
-			downloaded = False
-			for provider_name, provider_func in self.provider_engines:
-				if self._try_provider(provider_name, provider_func, canal):
-					downloaded = True
-					break
-			if not downloaded:
-				logger.error(f"Download failed for: {self.pstcanal}")
+			if canal and len(canal) > 5 and canal[5]:
+				# Already on disk: nothing to download
+				if checkBackdropExistence(join(BACKDROP_FOLDER, f"{clean_for_tvdb(canal[5])}.jpg")):
+					return "exists"
+
+			pstcanal = self._pre_download_checks(canal)
+			if not pstcanal:
+				return "skipped"
+			kind = stats_class(canal[5], canal[4], canal[3])
+			for provider_name, provider_func in provider_stats.order(self.provider_engines, kind):
+				if self._try_provider(provider_name, provider_func, canal, pstcanal, kind):
+					artwork_notifier.publish(
+						("backdrop", pstcanal),
+						join(BACKDROP_FOLDER, f"{pstcanal}.jpg")
+					)
+					return "downloaded"
+			logger.error(f"Download failed for: {pstcanal}")
+			return "missing"
 		except Exception as e:
 			logger.error(f"Critical error: {str(e)}")
 			print_exc()
+		return "skipped"
 
 	def _pre_download_checks(self, canal):
-		"""Run pre-download checks"""
+		"""Run pre-download checks, return the cleaned title or None"""
 		if not canal or len(canal) < 6:
-			return False
+			return None
 
-		self.pstcanal = clean_for_tvdb(canal[5] or "")
-		if not self.pstcanal:
-			return False
+		pstcanal = clean_for_tvdb(canal[5] or "")
+		if not pstcanal:
+			return None
 
 		if self.backdrop_download_count >= self.max_backdrops:
-			return False
+			return None
 
 		if not self._check_storage():
 			self._log_info("Download skipped due to insufficient storage")
-			return False
-
-		if not check_disk_space(BACKDROP_FOLDER, 10):
-			logger.warning("Not enough space to download")
-			return False
+			return None
 
-		return True
+		self.pstcanal = pstcanal
+		return pstcanal
 
-	def _try_provider(self, provider_name, provider_func, canal):
+	def _try_provider(self, provider_name, provider_func, canal, pstcanal, kind="other/other"):
 		"""Try downloading with a specific provider"""
+		started = monotonic()
 		try:
+			if rate_limiter.provider_throttled(provider_name):
+				return False
+			if not provider_stats.allowed(provider_name, kind):
+				return False
+			if miss_cache.should_skip("backdrop", pstcanal, provider_name):
+				return False
+
 			api_key = api_key_manager.get_api_key(provider_name)
 			# logger.debug(f"Trying {provider_name} with key: {api_key[:3]}...")
-			backdrop_path = join(BACKDROP_FOLDER, f"{self.pstcanal}.jpg")
-			# logger.debug(f"Searching: {self.pstcanal} | Channel: {canal[0]}")
-			result = provider_func(
-				dwn_backdrop=backdrop_path,
-				title=self.pstcanal,
-				shortdesc=canal[4],
-				fulldesc=canal[3],
-				channel=canal[0],
-				api_key=api_key
-			)
-			if result:
-				logger.debug(f"{provider_name} returned URL: {result}")
-				if self._validate_download(backdrop_path):
-					return True
+			backdrop_path = join(BACKDROP_FOLDER, f"{pstcanal}.jpg")
+			# logger.debug(f"Searching: {pstcanal} | Channel: {canal[0]}")
+			with self.scan_engine.provider_slot(provider_name):
+				started = monotonic()
+				rate_limiter.track()
+				download_guard.track()
+				result = provider_func(
+					dwn_backdrop=backdrop_path,
+					title=pstcanal,
+					shortdesc=canal[4],
+					fulldesc=canal[3],
+					channel=canal[0],
+					api_key=api_key
+				)
+			# The providers save before returning: the file is complete here
+			if result and self._validate_download(backdrop_path):
+				logger.debug(f"{provider_name} returned: {result}")
+				artwork_variants.finish(backdrop_path, "backdrop", BACKDROP_BOX, provider_name)
+				provider_stats.record(provider_name, kind, "hit", monotonic() - started)
+				miss_cache.record_hit("backdrop", pstcanal)
+				return True
+			if rate_limiter.provider_skipped(provider_name):
+				return False
+			if download_guard.failed():
+				# Title matched, image download failed: not a miss for the title
+				logger.warning(f"{provider_name} matched {pstcanal} but the download failed")
+				provider_stats.record(provider_name, kind, "error", monotonic() - started)
 			else:
 				logger.debug(f"{provider_name} returned no results")
+				provider_stats.record(provider_name, kind, "miss", monotonic() - started)
+				miss_cache.record_miss("backdrop", pstcanal, provider_name)
 
 		except Exception as e:
+			if not rate_limiter.provider_skipped(provider_name):
+				provider_stats.record(provider_name, kind, "error", monotonic() - started)
 			logger.error(f"Error with {provider_name}: {str(e)}")
 
 		return False
 
 	def _validate_download(self, backdrop_path):
 		"""Verify the integrity of the downloaded file"""
-		if checkBackdropExistence(backdrop_path) and getsize(backdrop_path) > 1024:
-			self.backdrop_download_count += 1
+		if checkBackdropExistence(backdrop_path):
+			with self.count_lock:
+				self.backdrop_download_count += 1
 			return True
 		return False
 
@@ -1046,20 +1354,9 @@ class BackdropAutoDB(AgbDownloadThread):
 			return fallback
 
 	def _check_storage(self):
-		"""Version optimized using utilities"""
+		"""Enforce the backdrop quota and free space, see Agp_Storage"""
 		try:
-			if check_disk_space(self.backdrop_folder, self.min_disk_space):
-				return True
-
-			self._log_info("Low disk space detected, running cleanup...")
-			delete_old_files_if_low_disk_space(
-				self.backdrop_folder,
-				min_free_space_mb=self.min_disk_space,
-				max_age_days=self.max_backdrop_age
-			)
-
-			return check_disk_space(self.backdrop_folder, self.min_disk_space)
-
+			return storage_manager.ready("backdrop", self.min_disk_space)
 		except Exception as e:
 			self._log_error(f"Storage check failed: {str(e)}")
 			return False
@@ -1095,7 +1392,8 @@ class BackdropAutoDB(AgbDownloadThread):
 
 
 def checkBackdropExistence(backdrop_path):
-	return exists(backdrop_path)
+	"""Indexed lookup: no stat for files already known"""
+	return artwork_index.has(backdrop_path)
 
 
 def is_valid_backdrop(backdrop_path):
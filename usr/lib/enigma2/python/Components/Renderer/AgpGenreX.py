@@ -47,9 +47,8 @@ __author__ = "Lululla"
 __copyright__ = "AGP Team"
 
 # Standard library imports
-from os.path import join, exists, getsize
+from os.path import join, exists
 from re import sub
-from json import loads as json_loads
 
 # Enigma2 imports
 from Components.Renderer.Renderer import Renderer
@@ -61,6 +60,8 @@ from Components.config import config
 from Plugins.Extensions.Aglare.api_config import cfg
 from .Agp_Utils import POSTER_FOLDER, clean_for_tvdb, logger
 from .Agp_Requests import intCheck
+from .Agp_PixmapCache import pixmap_cache
+from .Agp_Metadata import metadata_service
 
 if not POSTER_FOLDER.endswith("/"):
 	POSTER_FOLDER += "/"
@@ -337,22 +338,12 @@ class AgpGenreX(Renderer):
 		eventNm = clean_for_tvdb(evName)
 		# logger.info(f"GenreX raw event name: {evName!r}, cleaned: {eventNm!r}")
 
-		# Try JSON metadata
-		infos_file = join(self.storage_path, eventNm + ".json")
-		if exists(infos_file):
-			try:
-				if getsize(infos_file) > 0:
-					with open(infos_file, "r") as f:
-						content = f.read()
-						json_data = json_loads(content)
-						genre_id = json_data["genres"][0]["id"]
-						genreTxt = GENRE_MAP.get(genre_id, {"default": "general"}).get("default", "general")
-						genreTxt = SIMPLIFIED_GENRES.get(genreTxt.lower(), genreTxt.lower())
-
-				else:
-					logger.info("GenreX JSON file is empty (0 bytes): %s", infos_file)
-			except Exception as e:
-				logger.warning("GenreX invalid JSON: %s", str(e))
+		# Try the metadata fetched by InfoEvents/StarX/ParentalX (no network here)
+		record = metadata_service.peek(eventNm)
+		if record and record["genre_ids"]:
+			genre_id = record["genre_ids"][0]
+			genreTxt = GENRE_MAP.get(genre_id, {"default": "general"}).get("default", "general")
+			genreTxt = SIMPLIFIED_GENRES.get(genreTxt.lower(), genreTxt.lower())
 
 		# Fallback to EPG if needed
 		if not genreTxt:
@@ -389,11 +380,11 @@ class AgpGenreX(Renderer):
 		# logger.info(f"GenreX: checking PNG file path: {png_path}")  # Log del percorso PNG
 		if exists(png_path):
 			# logger.info(f"GenreX found PNG file at path: {png_path}")
-			self.instance.setPixmap(loadPNG(png_path))
+			self.instance.setPixmap(pixmap_cache.load(png_path, loadPNG))
 		else:
 			generic = join(GENRE_PIC_PATH, "general.png")
 			logger.warning(f"Genre image not found at {png_path}. Using default {generic}")
-			self.instance.setPixmap(loadPNG(generic))
+			self.instance.setPixmap(pixmap_cache.load(generic, loadPNG))
 
 		self.instance.setScale(1)
 		self.instance.show()
@@ -47,15 +47,12 @@ __author__ = "Lululla"
 __copyright__ = "AGP Team"
 
 # Standard library imports
-from json import load as json_load, dump as json_dump
 from threading import Lock
 
 # from hashlib import md5
 # from functools import lru_cache
 from threading import Thread
 
-from os.path import exists, join, getsize
-from urllib.request import urlopen
 from re import findall
 
 # Enigma2 imports
@@ -70,7 +67,7 @@ from Plugins.Extensions.Aglare.api_config import cfg
 from Plugins.Extensions.Aglare.api_config import ApiKeyManager
 from .Agp_Utils import POSTER_FOLDER, clean_for_tvdb, logger
 from .Agp_Requests import intCheck
-from .Agp_lib import quoteEventName
+from .Agp_Metadata import metadata_service
 
 if not POSTER_FOLDER.endswith("/"):
 	POSTER_FOLDER += "/"
@@ -202,155 +199,52 @@ class AgpInfoEvents(Renderer, VariableText):
 
 		with self.lock:
 			try:
-				data = None
 				clean_title = clean_for_tvdb(self.event.getEventName().replace('\xc2\x86', '').replace('\xc2\x87', ''))
-				json_file = join(self.storage_path, f"{clean_title}.json")
 				self.text = ''
 				year = self.extract_year(self.event)
 
-				if exists(json_file):
-					if getsize(json_file) > 0:
-						# logger.debug(f"AgpInfoEvents Using cached data for: {clean_title}")
-						with open(json_file, "r") as f:
-							data = json_load(f)
-						self.process_data(data)
-						return
-					else:
-						logger.info("AgpInfoEvents JSON file is empty (0 bytes): %s", json_file)
-
-				# logger.info(f"AgpInfoEvents Fetching fresh data for: {clean_title}")
-				if DATA_SOURCE == "tmdb" or (DATA_SOURCE == "auto" and api_key_manager.get_api_key('tmdb')):
-					data = self.fetch_tmdb_data(clean_title, year)
-				else:
-					data = self.fetch_omdb_data(clean_title, year)
-
-				if data:
-					# logger.debug(f"AgpInfoEvents Saving data to cache: {json_file}")
-					with open(json_file, "w") as f:
-						json_dump(data, f, indent=2)
-					self.process_data(data)
+				# Shared with StarX, ParentalX and GenreX: fetched once per title
+				record = metadata_service.get(
+					clean_title, year, DATA_SOURCE,
+					api_key_manager.get_api_key('tmdb'),
+					api_key_manager.get_api_key('omdb')
+				)
+				if record:
+					self.process_data(record)
 
 			except Exception as e:
 				logger.error(f"AgpInfoEvents Data fetch error: {str(e)}", exc_info=True)
 				if self.instance:
 					self.instance.hide()
 
-	def fetch_tmdb_data(self, title, year):
-		try:
-			api_key = api_key_manager.get_api_key('tmdb')
-
-			# Init Search
-			search_url = (
-				"https://api.themoviedb.org/3/search/multi?api_key=" + api_key +
-				"&language=" + lng +
-				"&query=" + quoteEventName(title) +
-				("&year=" + year if year else "")
-			)
-
-			# logger.debug(f"AgpInfoEvents search_url Tmdb: {search_url}")
-			with urlopen(search_url) as response:
-				search_data = json_load(response)
-
-			if not search_data.get("results"):
-				return None
-
-			# Select the most relevant result
-			result = self.select_best_result(search_data["results"], title)
-			content_type = result["media_type"]
-			content_id = result["id"]
-
-			# Full details
-			details_url = (
-				"https://api.themoviedb.org/3/" + content_type + "/" + str(content_id) +
-				"?api_key=" + api_key +
-				"&language=" + lng +
-				"&append_to_response=credits"
-			)
-			# logger.debug(f"AgpInfoEvents details_url Tmdb: {details_url}")
-			with urlopen(details_url) as response:
-				return json_load(response)
-
-		except Exception as e:
-			logger.error(f"AgpInfoEvents TMDB API error: {str(e)}")
-			return None
+	def process_data(self, record):
+		"""Build the info text from a metadata record"""
+		info_lines = []
 
-	def fetch_omdb_data(self, title, year):
 		try:
-			api_key = api_key_manager.get_api_key('omdb')
-			params = f"t={quoteEventName(title)}{f'&y={year}' if year else ''}&plot=full"
-			url = f"http://www.omdbapi.com/?apikey={api_key}&{params}"
+			info_lines.append(f"{_('Title')}: {record['title']}")
 
-			# logger.debug(f"AgpInfoEvents url omdb: {url}")
+			if record['year']:
+				info_lines.append(f"{_('Year')}: {record['year']}")
 
-			with urlopen(url) as response:
-				return json_load(response)
-		except Exception as e:
-			logger.error(f"AgpInfoEvents OMDB API error: {str(e)}")
-			return None
+			if record['rating']:
+				info_lines.append(f"{_('Rating')}: {record['rating']}/10")
 
-	def select_best_result(self, results, original_title):
-		# Best result selection logic
-		for result in results:
-			if result.get('media_type') == 'movie':
-				if result.get('title', "").lower() == original_title.lower():
-					return result
-			elif result.get('media_type') == 'tv':
-				if result.get('name', "").lower() == original_title.lower():
-					return result
-		return results[0]
-
-	def process_data(self, data):
-		"""Process the fetched data and update the widget with the appropriate icon."""
-		info_lines = []
+			for label, field in (
+				(_('Genre'), 'genres'),
+				(_('Director'), 'directors'),
+				(_('Writer'), 'writers'),
+				(_('Cast'), 'cast'),
+				(_('Country'), 'countries')
+			):
+				if record[field]:
+					info_lines.append(f"{label}: {', '.join(record[field])}")
 
-		try:
-			# TMDB Data Management
-			if 'title' in data or 'name' in data:
-				info_lines.append(f"{_('Title')}: {data.get('title', data.get('name'))}")
-
-				if data.get('release_date'):
-					year = data['release_date'].split('-')[0]
-					info_lines.append(f"{_('Year')}: {year}")
-
-				if data.get('vote_average'):
-					info_lines.append(f"{_('Rating')}: {data['vote_average']}/10")
-
-				if data.get('genres'):
-					genres = ", ".join([g['name'] for g in data['genres']])
-					info_lines.append(f"{_('Genre')}: {genres}")
-
-				if data.get('credits'):
-					crew = data['credits'].get('crew', [])
-					directors = [m['name'] for m in crew if m['job'] == 'Director']
-					writers = [m['name'] for m in crew if m['department'] == 'Writing']
-
-					if directors:
-						info_lines.append(f"{_('Director')}: {', '.join(directors)}")
-					if writers:
-						info_lines.append(f"{_('Writer')}: {', '.join(writers)}")
-
-				if data.get('production_countries'):
-					countries = ", ".join([c['name'] for c in data['production_countries']])
-					info_lines.append(f"{_('Country')}: {countries}")
-
-			# OMDB Data Management
-			else:
-				info_lines.append(f"{_('Title')}: {data.get('Title')}")
-				info_lines.append(f"{_('Year')}: {data.get('Year')}")
-				info_lines.append(f"{_('Rating')}: {data.get('imdbRating')}")
-				info_lines.append(f"{_('Genre')}: {data.get('Genre')}")
-				info_lines.append(f"{_('Director')}: {data.get('Director')}")
-				info_lines.append(f"{_('Writer')}: {data.get('Writer')}")
-				info_lines.append(f"{_('Cast')}: {data.get('Actors')}")
-				info_lines.append(f"{_('Country')}: {data.get('Country')}")
-
-			runtime = data.get('runtime') or data.get('Runtime')
-			if runtime:
-				info_lines.append(f"{_('Runtime')}: {runtime}")
-
-			plot = data.get('overview') or data.get('Plot')
-			if plot:
-				info_lines.append(f"\n{_('Plot')}: {plot}")
+			if record['runtime']:
+				info_lines.append(f"{_('Runtime')}: {record['runtime']}")
+
+			if record['plot']:
+				info_lines.append(f"\n{_('Plot')}: {record['plot']}")
 
 			self.text = "\n".join(info_lines)
 			self.timer.start(100)
@@ -39,15 +39,13 @@ __author__ = "Lululla"
 __copyright__ = "AGP Team"
 
 # Standard library imports
-from os.path import join, exists, getsize
+from os.path import join, exists
 from re import findall
-from json import load as json_load, dump as json_dump
 from threading import Lock, Thread
 
 # Enigma2 imports
 from Components.Renderer.Renderer import Renderer
 from enigma import ePixmap, loadPNG
-from urllib.request import urlopen
 import gettext
 from Components.config import config
 
@@ -57,7 +55,8 @@ from Plugins.Extensions.Aglare.api_config import ApiKeyManager
 
 from .Agp_Utils import POSTER_FOLDER, clean_for_tvdb, logger
 from .Agp_Requests import intCheck
-from .Agp_lib import quoteEventName
+from .Agp_PixmapCache import pixmap_cache
+from .Agp_Metadata import metadata_service
 
 if not POSTER_FOLDER.endswith("/"):
 	POSTER_FOLDER += "/"
@@ -191,141 +190,25 @@ class AgpParentalX(Renderer):
 
 		with self.lock:
 			try:
-				data = None
 				clean_title = clean_for_tvdb(self.event.getEventName().replace('\xc2\x86', '').replace('\xc2\x87', ''))
-				json_file = join(self.storage_path, f"{clean_title}.json")
 				year = self.extract_year(self.event)
 
-				if exists(json_file):
-					if getsize(json_file) > 0:
-						# logger.debug(f"AgpParentalX  Using cached data for: {clean_title}")
-						with open(json_file, "r") as f:
-							data = json_load(f)
-						self.process_data(data)
-						return
-					else:
-						logger.info("GenreX JSON file is empty (0 bytes): %s", json_file)
-				# logger.info(f"Fetching fresh data for: {clean_title}")
-				if PARENT_SOURCE == "tmdb" or (PARENT_SOURCE == "auto" and api_key_manager.get_api_key('tmdb')):
-					data = self.fetch_tmdb_data(clean_title, year)
-				else:
-					data = self.fetch_omdb_data(clean_title, year)
-
-				if data:
-					# logger.debug(f"AgpParentalX  Saving data to cache: {json_file}")
-					with open(json_file, "w") as f:
-						json_dump(data, f, indent=2)
-					self.process_data(data)
+				# Shared with InfoEvents, StarX and GenreX: fetched once per title
+				record = metadata_service.get(
+					clean_title, year, PARENT_SOURCE,
+					api_key_manager.get_api_key('tmdb'),
+					api_key_manager.get_api_key('omdb')
+				)
+				if record:
+					self.process_data(record)
 
 			except Exception as e:
 				logger.error(f"AgpParentalX Data fetch error: {str(e)}", exc_info=True)
 
-	def fetch_tmdb_data(self, title, year):
-		try:
-			api_key = api_key_manager.get_api_key('tmdb')
-
-			# Init Search
-			search_url = (
-				"https://api.themoviedb.org/3/search/multi?api_key=" + api_key +
-				"&language=" + lng +
-				"&query=" + quoteEventName(title) +
-				("&year=" + year if year else "")
-			)
-
-			# logger.debug(f"AgpParentalX search_url Tmdb: {search_url}")
-			with urlopen(search_url) as response:
-				search_data = json_load(response)
-
-			if not search_data.get("results"):
-				return None
-
-			# Select the most relevant result
-			result = self.select_best_result(search_data["results"], title)
-			content_type = result["media_type"]
-			content_id = result["id"]
-
-			# Full details
-			details_url = (
-				"https://api.themoviedb.org/3/" + content_type + "/" + str(content_id) +
-				"?api_key=" + api_key +
-				"&language=" + lng +
-				"&append_to_response=credits"
-			)
-			# logger.debug(f"AgpParentalX url tmdb credits: {details_url}")
-
-			with urlopen(details_url) as response:
-				details = json_load(response)
-
-			if content_type == "movie":
-				release_url = (
-					"https://api.themoviedb.org/3/movie/" + str(content_id) +
-					"/release_dates?api_key=" + api_key
-				)
-
-				with urlopen(release_url) as response:
-					release_data = json_load(response)
-
-				for entry in release_data.get("results", []):
-					if entry.get("iso_3166_1") == "US":
-						for rd in entry.get("release_dates", []):
-							cert = rd.get("certification")
-							if cert:
-								details["Rated"] = cert
-								# logger.debug("AgpParentalX TMDb Rated (movie): " + cert)
-								break
-						break
-
-			elif content_type == "tv":
-				rating_url = (
-					"https://api.themoviedb.org/3/tv/" + str(content_id) +
-					"/content_ratings?api_key=" + api_key
-				)
-				with urlopen(rating_url) as response:
-					rating_data = json_load(response)
-
-				for entry in rating_data.get("results", []):
-					if entry.get("iso_3166_1") == "US":
-						cert = entry.get("rating")
-						if cert:
-							details["Rated"] = cert
-							# logger.debug("AgpParentalX TMDb Rated (tv): " + cert)
-							break
-
-			return details
-
-		except Exception as e:
-			logger.error(f"AgpParentalX TMDB API error: {str(e)}")
-			return None
-
-	def fetch_omdb_data(self, title, year):
-		try:
-			api_key = api_key_manager.get_api_key('omdb')
-			params = f"t={quoteEventName(title)}{f'&y={year}' if year else ''}&plot=full"
-			url = f"http://www.omdbapi.com/?apikey={api_key}&{params}"
-
-			# logger.debug(f"AgpParentalX url omdb: {url}")
-
-			with urlopen(url) as response:
-				return json_load(response)
-		except Exception as e:
-			logger.error(f"AgpParentalX OMDB API error: {str(e)}")
-			return None
-
-	def select_best_result(self, results, original_title):
-		# Best result selection logic
-		for result in results:
-			if result.get('media_type') == 'movie':
-				if result.get('title', "").lower() == original_title.lower():
-					return result
-			elif result.get('media_type') == 'tv':
-				if result.get('name', "").lower() == original_title.lower():
-					return result
-		return results[0]
-
-	def process_data(self, data):
-		"""Process the fetched data and update the widget with the appropriate icon."""
+	def process_data(self, record):
+		"""Update the widget with the icon of the record certification."""
 		try:
-			rated = data.get("Rated", "").strip().upper()
+			rated = record["rated"].strip().upper()
 			rating_code = RATING_MAP.get(rated, DEFAULT_RATING)
 			icon_file = "FSK_" + rating_code + ".png"
 			self.icon_path = join(PARENTAL_ICON_PATH, icon_file)
@@ -344,7 +227,7 @@ class AgpParentalX(Renderer):
 	def update_icon(self, icon):
 		"""Update the widget's icon based on the fetched data."""
 		if self.instance:
-			self.instance.setPixmap(loadPNG(icon))
+			self.instance.setPixmap(pixmap_cache.load(icon, loadPNG))
 			self.instance.show()
 		else:
 			logger.warning("AgpParentalX Instance is not available to update the icon.")
@@ -47,13 +47,7 @@ __author__ = "Lululla"
 __copyright__ = "AGP Team"
 
 # Standard library imports
-from json import load as json_load, dump as json_dump
-from functools import lru_cache
-from os import remove
-from os.path import exists, getsize
 from threading import Lock, Thread
-from urllib.error import HTTPError
-from urllib.request import urlopen
 
 # Enigma2 imports
 from Components.Renderer.Renderer import Renderer
@@ -69,7 +63,7 @@ from Plugins.Extensions.Aglare.api_config import ApiKeyManager
 
 from .Agp_Utils import POSTER_FOLDER, clean_for_tvdb, logger
 from .Agp_Requests import intCheck
-from .Agp_lib import quoteEventName
+from .Agp_Metadata import metadata_service
 
 
 if not POSTER_FOLDER.endswith("/"):
@@ -152,7 +146,6 @@ class AgpStarX(VariableValue, Renderer):
 			return
 
 		self.rating_source = cfg.rating_source.value
-		self._setup_caching()
 
 		# logger.info("AgpStarX Renderer initialized")
 
@@ -209,138 +202,21 @@ class AgpStarX(VariableValue, Renderer):
 		except Exception as e:
 			logger.error(f"AgpStarX Infos error: {str(e)}")
 
-	def _setup_caching(self):
-		"""Dynamic caching configuration"""
-		if config.plugins.Aglare.cache.value:
-			self.cached_download = lru_cache(maxsize=100)(self._safe_download_impl)
-		else:
-			self.cached_download = self._safe_download_impl
-
 	def safe_download_info(self):
 		try:
 			with self.lock:
 				if not hasattr(self, 'pstcanal') or not self.pstcanal or len(self.pstcanal) < 3:
 					return
 
-				info_file = f"{POSTER_FOLDER}/{self.pstcanal}.json"
-
-				# Attempting to read from existing file
-				if exists(info_file):
-					try:
-						if getsize(info_file) > 0:
-							with open(info_file, "r") as f:
-								data = json_load(f)
-							self.process_data(data)
-							return
-						else:
-							logger.info("AgpStarX JSON file is empty (0 bytes): %s", info_file)
-					except Exception as e:
-						logger.warning(f"File corrotto, elimino: {info_file} {e}")
-						remove(info_file)
-
-				# Download API
+				# Shared with InfoEvents, ParentalX and GenreX: fetched once per title
 				self.api_key = api_key_manager.get_api_key('tmdb')
-				if not self.api_key or len(self.pstcanal) < 3:
-					return None
-
-				try:
-					clean_query = quoteEventName(self.pstcanal.strip())
-					url = f"https://api.themoviedb.org/3/search/multi?api_key={self.api_key}&query={clean_query}"
-
-					with urlopen(url, timeout=10) as response:
-						if response.status != 200:
-
-							return
-						url_data = json_load(response)
-
-					# Cascade Validation
-					results = url_data.get('results', [])
-					valid_results = [r for r in results if r.get('media_type') in ['movie', 'tv']]
-
-					if not valid_results:
-						return
-
-					# Content type control (exclude TV shows)
-					best_result = valid_results[0]
-					content_type = best_result['media_type']
-					content_id = best_result['id']
-					details_url = (
-						"https://api.themoviedb.org/3/" + content_type + "/" + str(content_id) +
-						"?api_key=" + self.api_key +
-						"&language=" + lng +
-						"&append_to_response=credits"
-					)
-					with urlopen(details_url, timeout=15) as details_response:
-						if details_response.status != 200:
-							return
-						movie_data = json_load(details_response)
-
-					# Save data
-					with open(info_file, "w") as f:
-						json_dump(movie_data, f, indent=2)
-						# logger.debug(f"AgpStarX Data saved in: {info_file}")
-
-					self.process_data(movie_data)
-
-				except HTTPError as e:
-					if e.code == 404:
-						logger.debug("AgpStarX Resource not found")
-					return
-
-				except Exception as e:
-					logger.error(f"AgpStarX Error while downloading: {str(e)}")
+				record = metadata_service.get(self.pstcanal, None, "tmdb", self.api_key)
+				if record:
+					self.process_data(record)
 
 		except Exception as e:
 			logger.error(f"AgpStarX Critical error: {str(e)}", exc_info=True)
 
-	def _safe_download_impl(self, channel_hash: str):
-		"""Basic download implementation with correct parameters"""
-		try:
-			with self.lock:
-				channel_name = self.pstcanal
-
-				self.api_key = api_key_manager.get_api_key('tmdb')
-
-				if not self.api_key or len(self.pstcanal) < 3:
-					return None
-
-				clean_query = quoteEventName(channel_name)
-				year = self.extract_year(clean_query)
-				search_url = (
-					"https://api.themoviedb.org/3/search/multi?api_key=" + self.api_key +
-					"&language=" + lng +
-					"&query=" + quoteEventName(clean_query) +
-					("&year=" + year if year else "")
-				)
-				with urlopen(search_url, timeout=10) as res:
-					if res.status != 200:
-						return None
-					search_data = json_load(res)
-
-				# Processing results
-				valid_results = [r for r in search_data.get('results', []) if r.get('media_type') in ['movie', 'tv']]
-				if not valid_results:
-					return None
-
-				best_result = valid_results[0]
-				content_type = best_result['media_type']
-				content_id = best_result['id']
-
-				# Request details
-				details_url = f"https://api.themoviedb.org/3/{content_type}/{content_id}?api_key={self.api_key}"
-				with urlopen(details_url, timeout=15) as detail_res:
-					return json_load(detail_res)
-
-		except HTTPError as e:
-			if e.code == 404:
-				logger.debug("AgpStarX Resource not found")
-
-			return None
-
-		except Exception as e:
-			logger.error(f"AgpStarX Error download: {str(e)}")
-			return None
-
 	def process_data(self, data):
 		try:
 			self.data_to_process = data
@@ -395,7 +271,7 @@ class AgpStarX(VariableValue, Renderer):
 				return
 
 			# Data processing and UI update
-			rating = data.get('vote_average', 0)
+			rating = data['rating']
 			rtng = min(int(rating * 10), 100) if rating else 0
 			with self.lock:
 				self.range = (0, 100)
@@ -48,11 +48,13 @@ __copyright__ = "AGP Team"
 # Standard library
 from datetime import datetime
 from os import remove, makedirs
+from shutil import copyfile
 from os.path import join, exists, getsize, basename  # , splitext
 from threading import Thread, Lock
 from queue import LifoQueue
 from concurrent.futures import ThreadPoolExecutor
 from re import findall
+from time import monotonic
 
 # Enigma2 specific imports
 from enigma import ePixmap, loadJPG, eTimer, eServiceCenter
@@ -66,10 +68,19 @@ import NavigationInstance
 # Local imports
 from Plugins.Extensions.Aglare.api_config import cfg
 from Plugins.Extensions.Aglare.api_config import ApiKeyManager
-from Components.Renderer.AgpDownloadThread import AgpDownloadThread
+from Components.Renderer.AgpDownloadThread import AgpDownloadThread, isz
 
 from .Agp_Utils import IMOVIE_FOLDER, clean_for_tvdb, logger, create_secure_log_dir
 from .Agp_Requests import intCheck
+from .Agp_Inflight import artwork_flight
+from .Agp_MissCache import miss_cache
+from .Agp_RateLimit import rate_limiter
+from .Agp_DownloadGuard import download_guard
+from .Agp_ProviderStats import provider_stats, stats_class
+from .Agp_PixmapCache import pixmap_cache
+from .Agp_Variants import artwork_variants
+from .Agp_PicDecoder import AsyncPicLoader
+from .Agp_Storage import storage_manager
 from .Agp_lib import sanitize_filename
 
 secure_log_dir = create_secure_log_dir()
@@ -115,6 +126,7 @@ class AgpXEMC(Renderer):
     def __init__(self):
         Renderer.__init__(self)
         self.storage_path = IMOVIE_FOLDER
+        self.decoder = AsyncPicLoader(self._onPosterDecoded)
         self.release_year = None
         self.log_file = join(secure_log_dir, "PosterDBEMC.log")
         clear_all_log()
@@ -290,22 +302,35 @@ class AgpXEMC(Renderer):
 
             if _validate_poster(poster_path):
                 logger.info(f"AgpXEMC Poster validated, loading image from {poster_path}")
-                self.instance.setPixmap(loadJPG(poster_path))
-                self.instance.setScale(1)
-                self.instance.show()
-
-                self.instance.invalidate()
-                self.instance.show()
+                size = self.instance.size()
+                if size.isNull():
+                    self._onPosterDecoded(poster_path, pixmap_cache.load(poster_path, loadJPG))
+                else:
+                    # Decoded off the main loop, shown by _onPosterDecoded()
+                    self.decoder.load(poster_path, (size.width(), size.height()))
             else:
                 logger.error(f"AgpXEMC Poster file is invalid: {poster_path}")
+                self.decoder.cancel()
                 self.instance.hide()
 
+    def _onPosterDecoded(self, poster_path, pixmap):
+        """Main loop callback: the pixmap of poster_path is ready"""
+        if not self.instance or pixmap is None:
+            return
+        self.instance.setPixmap(pixmap)
+        self.instance.setScale(1)
+        self.instance.show()
+
+        self.instance.invalidate()
+        self.instance.show()
+
     def waitPoster(self, poster_path=None):
         """Asynchronous wait using eTimer to avoid blocking UI"""
         if not self.instance or not poster_path:
             return
 
         if not exists(poster_path):
+            self.decoder.cancel()
             self.instance.hide()
 
         self.poster_path = poster_path
@@ -368,8 +393,6 @@ class PosterDBEMC(AgpDownloadThread):
         self.executor = ThreadPoolExecutor(max_workers=2)
         self.providers = {}
         self.provider_engines = []
-        self.queued = set()
-        self.lock = Lock()
         self.api = api_key_manager
         self.providers = api_key_manager.get_active_providers()
         self.provider_engines = self.build_providers()
@@ -396,53 +419,103 @@ class PosterDBEMC(AgpDownloadThread):
     def _process_item(self, item):
         search_title, clean_title, poster_path, release_year = item
         logger.debug(f"AgpXEMC Processing item: {item}")
-        with self.lock:
-            if search_title in self.queued:
-                return
-            self.queued.add(search_title)
-
         try:
-            if self._check_existing(poster_path):
-                return
-
-            logger.info("AgpXEMC Starting download: %s", search_title)
-            # Sort by priority (lower number = higher priority)
-            sorted_providers = sorted(
-                self.provider_engines,
-                key=lambda x: x[2]  # sort by prio
+            # Attach to an identical download already running in any thread
+            result, shared = artwork_flight.do(
+                ("poster", clean_title),
+                self._download_item,
+                search_title,
+                clean_title,
+                poster_path,
+                release_year
             )
+            if shared and result and result != poster_path and not self._check_existing(poster_path):
+                # Same title fetched by another renderer into its own folder
+                copyfile(result, poster_path)
+                logger.info("AgpXEMC Reused coalesced poster: %s", result)
 
-            for provider_name, provider_func, _ in sorted_providers:
-                try:
-                    api_key = api_key_manager.get_api_key(provider_name)
-                    if not api_key:
-                        logger.warning("AgpXEMC Missing API key for %s", provider_name)
-                        continue
-
-                    logger.info("AgpXEMC EMC processing: search_title='%s' clean_title='%s'", search_title, clean_title)
-                    result = provider_func(
-                        dwn_poster=poster_path,
-                        title=search_title,
-                        shortdesc=None,
-                        fulldesc=None,
-                        year=release_year,
-                        channel=clean_title,
-                        api_key=api_key
-                    )
-
-                    logger.info(f"AgpXEMC Trying provider: {provider_name} with title: {search_title} year: {release_year}")
-
-                    if result and self.check_valid_poster(poster_path):
-                        logger.info("AgpXEMC Download successful with %s", provider_name)
-                        logger.success(f"AgpXEMC Found poster via {provider_name}: {poster_path}")
-                        break
-
-                except Exception as e:
-                    logger.error("AgpXEMC Error from %s: %s", provider_name, str(e))
-
-        finally:
-            with self.lock:
-                self.queued.discard(search_title)
+        except Exception as e:
+            logger.error("AgpXEMC Error processing %s: %s", search_title, str(e))
+
+    def _download_item(self, search_title, clean_title, poster_path, release_year):
+        """Run the provider chain for a movie, return the poster path or None"""
+        if self._check_existing(poster_path):
+            return poster_path
+
+        if not storage_manager.ready("imovie"):
+            logger.warning("AgpXEMC Download skipped, not enough storage")
+            return None
+
+        logger.info("AgpXEMC Starting download: %s", search_title)
+        # Sort by priority (lower number = higher priority), then by
+        # measured performance: equal scores keep the priority order
+        kind = stats_class(search_title)
+        sorted_providers = provider_stats.order(
+            sorted(self.provider_engines, key=lambda x: x[2]),
+            kind
+        )
+
+        for provider_name, provider_func, _ in sorted_providers:
+            started = monotonic()
+            try:
+                api_key = api_key_manager.get_api_key(provider_name)
+                if not api_key:
+                    logger.warning("AgpXEMC Missing API key for %s", provider_name)
+                    continue
+
+                if rate_limiter.provider_throttled(provider_name):
+                    logger.debug("AgpXEMC Skipping %s, rate limited", provider_name)
+                    continue
+
+                if miss_cache.should_skip("poster", clean_title, provider_name):
+                    logger.debug("AgpXEMC Skipping %s, recent miss for: %s", provider_name, clean_title)
+                    continue
+
+                if not provider_stats.allowed(provider_name, kind):
+                    logger.debug("AgpXEMC Skipping %s, hit rate too low", provider_name)
+                    continue
+
+                started = monotonic()
+                logger.info("AgpXEMC EMC processing: search_title='%s' clean_title='%s'", search_title, clean_title)
+                rate_limiter.track()
+                download_guard.track()
+                result = provider_func(
+                    dwn_poster=poster_path,
+                    title=search_title,
+                    shortdesc=None,
+                    fulldesc=None,
+                    year=release_year,
+                    channel=clean_title,
+                    api_key=api_key
+                )
+
+                logger.info(f"AgpXEMC Trying provider: {provider_name} with title: {search_title} year: {release_year}")
+
+                # The providers save before returning: the file is complete here
+                if result and self.check_valid_poster(poster_path):
+                    provider_stats.record(provider_name, kind, "hit", monotonic() - started)
+                    logger.info("AgpXEMC Download successful with %s", provider_name)
+                    logger.success(f"AgpXEMC Found poster via {provider_name}: {poster_path}")
+                    artwork_variants.finish(poster_path, "poster", tuple(int(x) for x in isz.split(",")), provider_name)
+                    miss_cache.record_hit("poster", clean_title)
+                    return poster_path
+
+                if rate_limiter.provider_skipped(provider_name):
+                    continue
+                if download_guard.failed():
+                    # Title matched, image download failed: not a miss for the title
+                    logger.warning("AgpXEMC %s matched %s but the download failed", provider_name, clean_title)
+                    provider_stats.record(provider_name, kind, "error", monotonic() - started)
+                else:
+                    provider_stats.record(provider_name, kind, "miss", monotonic() - started)
+                    miss_cache.record_miss("poster", clean_title, provider_name)
+
+            except Exception as e:
+                if not rate_limiter.provider_skipped(provider_name):
+                    provider_stats.record(provider_name, kind, "error", monotonic() - started)
+                logger.error("AgpXEMC Error from %s: %s", provider_name, str(e))
+
+        return None
 
     # def _query_provider(self, provider, title, year):
         # func_map = {
@@ -0,0 +1,396 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function
+"""
+#########################################################
+#                                                       #
+#  AGP - Advanced Graphics Renderer                     #
+#  Version: 3.5.0                                       #
+#  Created by Lululla (https://github.com/Belfagor2005) #
+#  License: CC BY-NC-SA 4.0                             #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0    #
+#                                                       #
+#  Last Modified: "18:14 - 20250512"                    #
+#                                                       #
+#  Credits:                                             #
+#  - Original concept by Lululla                        #
+#  - Poster renderer                                    #
+#  - Backdrop renderer                                  #
+#  - Poster EMC renderer                                #
+#  - InfoEvents renderer                                #
+#  - Star rating renderer                               #
+#  - Parental control renderer                          #
+#  - Genre detection and renderer                       #
+#                                                       #
+#  - Advanced download management system                #
+#  - Atomic file operations                             #
+#  - Thread-safe resource locking                       #
+#  - TMDB API integration                               #
+#  - TVDB API integration                               #
+#  - OMDB API integration                               #
+#  - FANART API integration                             #
+#  - IMDB API integration                               #
+#  - ELCINEMA API integration                           #
+#  - GOOGLE API integration                             #
+#  - PROGRAMMETV integration                            #
+#  - MOLOTOV API integration                            #
+#  - Advanced caching system                            #
+#  - Fully configurable via AGP Setup Plugin            #
+#                                                       #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+__author__ = "Lululla"
+__copyright__ = "AGP Team"
+
+# Standard library
+from os import remove, scandir
+from os.path import basename, dirname, getsize, join, splitext
+from threading import Lock, Thread
+from time import sleep, time
+
+# Third-party libraries
+from PIL import Image
+
+# Local imports
+from .Agp_Utils import DATA_FOLDER, logger
+
+try:
+	import sqlite3
+except ImportError:
+	logger.warning("ArtIndex: sqlite3 not available, artwork index kept in memory only")
+	sqlite3 = None
+
+
+"""
+Persistent index of the artwork stored on disk.
+
+One row per image file: folder, title, size, dimensions, source
+provider, fetch time and last access, in DATA_FOLDER/artwork_index.db
+(SQLite, WAL journal). The paths and sizes are mirrored in memory, so
+the renderers answer "is this poster on disk" with a dict lookup instead
+of a stat (and a header read) on the USB/flash storage.
+
+Writers (download threads, reconciler) queue their changes and flush
+them in one transaction; the main loop never touches the database.
+Last-access times are written in batches as well.
+
+The storage manager (Agp_Storage) evicts by the access times kept here,
+least recently shown first.
+
+Files the index does not know yet are probed once with a stat and then
+indexed. A background reconciler walks the watched folders every
+RECONCILE_INTERVAL to add files written by other tools and to drop
+entries whose file is gone. It also removes the hidden ".hedge-*" files
+a hedged provider lookup left behind (crash or restart mid-download).
+"""
+
+INDEX_FILE = join(DATA_FOLDER, "artwork_index.db")
+MIN_VALID_SIZE = 1024  # same threshold as check_valid_poster
+FLUSH_INTERVAL = 30  # seconds between two database writes
+FLUSH_BATCH = 200  # pending changes forcing a write
+RECONCILE_DELAY = 60  # first reconcile after startup
+RECONCILE_INTERVAL = 6 * 3600
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+HEDGE_PREFIX = ".hedge-"  # per-provider files of a hedged lookup
+HEDGE_MAX_AGE = 600  # seconds before a leftover hedge file is removed
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS artwork (
+	path TEXT PRIMARY KEY,
+	folder TEXT NOT NULL,
+	title TEXT NOT NULL,
+	size INTEGER NOT NULL,
+	width INTEGER,
+	height INTEGER,
+	provider TEXT,
+	fetched REAL,
+	accessed REAL
+);
+CREATE INDEX IF NOT EXISTS artwork_access ON artwork (folder, accessed);
+"""
+
+
+class ArtworkIndex:
+	"""SQLite-backed title -> file index with an in-memory path mirror"""
+
+	def __init__(self, path=INDEX_FILE):
+		self.path = path
+		self.lock = Lock()
+		self.db_lock = Lock()
+		self.conn = None
+		self.sizes = {}
+		self.loaded = False
+		self.pending = {}  # path -> row tuple, or None for a delete
+		self.accessed = {}  # path -> last access time
+		self.last_flush = time()
+		self.folders = set()
+		self.reconciler = None
+		self.counters = {"hits": 0, "probes": 0, "misses": 0}
+		Thread(target=self._open, name="AgpArtIndexLoad", daemon=True).start()
+
+	def _open(self):
+		"""Open the database and load the path mirror (background thread)"""
+		sizes = {}
+		if sqlite3 is not None:
+			try:
+				conn = sqlite3.connect(self.path, check_same_thread=False)
+				conn.execute("PRAGMA journal_mode=WAL")
+				conn.execute("PRAGMA synchronous=NORMAL")
+				conn.executescript(SCHEMA)
+				sizes = dict(conn.execute("SELECT path, size FROM artwork"))
+				self.conn = conn
+			except Exception as e:
+				logger.error(f"ArtIndex: cannot open {self.path}: {str(e)}")
+		with self.lock:
+			# Entries indexed while loading are newer than the database
+			sizes.update(self.sizes)
+			for path, row in self.pending.items():
+				if row is None:
+					sizes.pop(path, None)
+			self.sizes = sizes
+			self.loaded = True
+		logger.debug(f"ArtIndex: {len(sizes)} files indexed")
+
+	@staticmethod
+	def _row(path, size, provider=None, dimensions=(None, None), fetched=None):
+		return (
+			path, dirname(path), splitext(basename(path))[0], size,
+			dimensions[0], dimensions[1], provider, fetched, None
+		)
+
+	def has(self, path):
+		"""
+		True when path is a valid artwork file (main loop safe)
+
+		Indexed files are answered from memory; unknown files are probed
+		once with a stat and indexed when valid.
+		"""
+		if not path:
+			return False
+		with self.lock:
+			if path in self.sizes:
+				self.counters["hits"] += 1
+				self.accessed[path] = time()
+				return True
+		try:
+			size = getsize(path)
+		except OSError:
+			with self.lock:
+				self.counters["misses"] += 1
+			return False
+		if size < MIN_VALID_SIZE:
+			return False
+		with self.lock:
+			self.counters["probes"] += 1
+			self.sizes[path] = size
+			self.accessed[path] = time()
+			self.pending[path] = self._row(path, size)
+		return True
+
+	def known(self, path):
+		"""Memory-only lookup, never probes the disk"""
+		with self.lock:
+			return path in self.sizes
+
+	def add(self, path, provider=None, dimensions=None):
+		"""
+		Index a freshly downloaded file (download threads)
+
+		dimensions, when the caller already knows them, saves reopening the image.
+		"""
+		try:
+			size = getsize(path)
+			if not dimensions:
+				with Image.open(path) as img:
+					dimensions = img.size
+		except Exception as e:
+			logger.debug(f"ArtIndex: cannot index {path}: {str(e)}")
+			return
+		now = time()
+		with self.lock:
+			self.sizes[path] = size
+			self.accessed[path] = now
+			self.pending[path] = self._row(path, size, provider, dimensions, now)
+		self.flush()
+
+	def discard(self, path):
+		"""Forget a file that was removed or found invalid"""
+		with self.lock:
+			if self.sizes.pop(path, None) is None and path not in self.pending:
+				return
+			self.accessed.pop(path, None)
+			self.pending[path] = None
+
+	def get(self, path):
+		"""Full index record of path as a dict, or None"""
+		with self.db_lock:
+			if self.conn is None:
+				return None
+			cursor = self.conn.execute(
+				"SELECT path, folder, title, size, width, height, provider, fetched, accessed FROM artwork WHERE path = ?",
+				(path,)
+			)
+			row = cursor.fetchone()
+			if row is None:
+				return None
+			return dict(zip(("path", "folder", "title", "size", "width", "height", "provider", "fetched", "accessed"), row))
+
+	def flush(self, force=False):
+		"""Write the queued changes in a single transaction"""
+		with self.lock:
+			if not self.loaded:
+				return
+			if not force and len(self.pending) < FLUSH_BATCH and time() - self.last_flush < FLUSH_INTERVAL:
+				return
+			pending, self.pending = self.pending, {}
+			accessed, self.accessed = self.accessed, {}
+			self.last_flush = time()
+		if self.conn is None or not (pending or accessed):
+			return
+		upserts = [row for row in pending.values() if row is not None]
+		deletes = [(path,) for path, row in pending.items() if row is None]
+		try:
+			with self.db_lock, self.conn:
+				if upserts:
+					# Keep provider/dimensions/fetch time already known for probed rows
+					self.conn.executemany(
+						"INSERT INTO artwork (path, folder, title, size, width, height, provider, fetched, accessed) "
+						"VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(path) DO UPDATE SET "
+						"size = excluded.size, "
+						"width = COALESCE(excluded.width, width), "
+						"height = COALESCE(excluded.height, height), "
+						"provider = COALESCE(excluded.provider, provider), "
+						"fetched = COALESCE(excluded.fetched, fetched)",
+						upserts
+					)
+				if deletes:
+					self.conn.executemany("DELETE FROM artwork WHERE path = ?", deletes)
+				if accessed:
+					self.conn.executemany(
+						"UPDATE artwork SET accessed = ? WHERE path = ?",
+						[(stamp, path) for path, stamp in accessed.items()]
+					)
+		except Exception as e:
+			logger.error(f"ArtIndex: flush failed: {str(e)}")
+
+	def usage(self, folder):
+		"""Bytes indexed under folder, size variants included"""
+		prefix = folder.rstrip("/") + "/"
+		with self.lock:
+			return sum(size for path, size in self.sizes.items() if path.startswith(prefix))
+
+	def by_access(self, folder):
+		"""
+		(path, size) of the files under folder, least recently used first
+
+		Files never shown since they were indexed come first, oldest
+		fetch first.
+		"""
+		folder = folder.rstrip("/")
+		self.flush(force=True)
+		with self.db_lock:
+			if self.conn is not None:
+				try:
+					return self.conn.execute(
+						"SELECT path, size FROM artwork WHERE folder = ? OR folder LIKE ? "
+						"ORDER BY COALESCE(accessed, 0), COALESCE(fetched, 0)",
+						(folder, folder + "/%")
+					).fetchall()
+				except Exception as e:
+					logger.error(f"ArtIndex: access query failed: {str(e)}")
+		# No database: access times are not kept, evict in path order
+		prefix = folder + "/"
+		with self.lock:
+			return sorted((path, size) for path, size in self.sizes.items() if path.startswith(prefix))
+
+	def reconcile(self, folder):
+		"""Bring the index in line with the content of folder"""
+		folder = folder.rstrip("/")
+		on_disk = {}
+		hedges = []
+		try:
+			with scandir(folder) as entries:
+				for entry in entries:
+					if entry.name.startswith(HEDGE_PREFIX):
+						hedges.append(entry)
+						continue
+					if entry.name.startswith(".") or not entry.name.lower().endswith(IMAGE_EXTENSIONS):
+						continue
+					if entry.is_file():
+						on_disk[entry.path] = entry
+		except OSError as e:
+			logger.warning(f"ArtIndex: cannot scan {folder}: {str(e)}")
+			return
+
+		self._remove_hedges(hedges)
+		added = removed = 0
+		with self.lock:
+			known = [path for path in self.sizes if dirname(path) == folder]
+		for path in known:
+			if path not in on_disk:
+				self.discard(path)
+				removed += 1
+		for path, entry in on_disk.items():
+			with self.lock:
+				if path in self.sizes:
+					continue
+			try:
+				size = entry.stat().st_size
+			except OSError:
+				continue
+			if size < MIN_VALID_SIZE:
+				continue
+			with self.lock:
+				self.sizes[path] = size
+				self.pending[path] = self._row(path, size)
+			added += 1
+		self.flush(force=True)
+		if added or removed:
+			logger.info(f"ArtIndex: {folder} reconciled, {added} added, {removed} removed")
+
+	@staticmethod
+	def _remove_hedges(entries):
+		"""Remove hedge files no running lookup can still be writing"""
+		cutoff = time() - HEDGE_MAX_AGE
+		for entry in entries:
+			try:
+				if entry.stat().st_mtime < cutoff:
+					remove(entry.path)
+					logger.debug(f"ArtIndex: removed leftover {entry.name}")
+			except OSError:
+				pass
+
+	def watch(self, folder):
+		"""Reconcile folder in the background, starting the reconciler once"""
+		with self.lock:
+			self.folders.add(folder.rstrip("/"))
+			if self.reconciler is not None:
+				return
+			self.reconciler = Thread(target=self._reconcile_loop, name="AgpArtIndexReconcile", daemon=True)
+		self.reconciler.start()
+
+	def _reconcile_loop(self):
+		next_run = time() + RECONCILE_DELAY
+		while True:
+			sleep(FLUSH_INTERVAL)
+			if time() < next_run:
+				# Idle tick: write the batched access times
+				self.flush()
+				continue
+			for folder in list(self.folders):
+				try:
+					self.reconcile(folder)
+				except Exception as e:
+					logger.error(f"ArtIndex: reconcile of {folder} failed: {str(e)}")
+			next_run = time() + RECONCILE_INTERVAL
+
+	def stats(self):
+		with self.lock:
+			return dict(self.counters, files=len(self.sizes), pending=len(self.pending))
+
+
+artwork_index = ArtworkIndex()
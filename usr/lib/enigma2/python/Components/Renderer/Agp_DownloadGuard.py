@@ -0,0 +1,229 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function
+"""
+#########################################################
+#                                                       #
+#  AGP - Advanced Graphics Renderer                     #
+#  Version: 3.5.0                                       #
+#  Created by Lululla (https://github.com/Belfagor2005) #
+#  License: CC BY-NC-SA 4.0                             #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0    #
+#                                                       #
+#  Last Modified: "18:14 - 20250512"                    #
+#                                                       #
+#  Credits:                                             #
+#  - Original concept by Lululla                        #
+#  - Poster renderer                                    #
+#  - Backdrop renderer                                  #
+#  - Poster EMC renderer                                #
+#  - InfoEvents renderer                                #
+#  - Star rating renderer                               #
+#  - Parental control renderer                          #
+#  - Genre detection and renderer                       #
+#                                                       #
+#  - Advanced download management system                #
+#  - Atomic file operations                             #
+#  - Thread-safe resource locking                       #
+#  - TMDB API integration                               #
+#  - TVDB API integration                               #
+#  - OMDB API integration                               #
+#  - FANART API integration                             #
+#  - IMDB API integration                               #
+#  - ELCINEMA API integration                           #
+#  - GOOGLE API integration                             #
+#  - PROGRAMMETV integration                            #
+#  - MOLOTOV API integration                            #
+#  - Advanced caching system                            #
+#  - Fully configurable via AGP Setup Plugin            #
+#                                                       #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+__author__ = "Lululla"
+__copyright__ = "AGP Team"
+
+# Standard library
+from os import remove, replace
+from threading import Lock, local
+
+# Third-party libraries
+from PIL import Image
+
+# Enigma2 imports
+from Components.config import config
+
+# Local imports
+from .Agp_Utils import MAX_ORIGINAL_SIZE
+
+
+"""
+Streaming guard for artwork downloads.
+
+stream_image() writes a streamed response to a temporary file while
+checking it as early as possible:
+	- Content-Length above the byte cap: rejected before the body is read
+	- first chunk not a JPEG, PNG or WebP image: rejected after one chunk
+	- body growing past the cap: aborted mid-stream
+The cap is config.plugins.Aglare.max_image_size (MB), never above
+MAX_ORIGINAL_SIZE. PNG and WebP images are converted to JPEG, which is
+what the renderers and the validity checks expect on disk.
+
+A rejected download raises DownloadRejected: retrying the same URL
+would give the same answer. stats() reports the bytes not downloaded
+thanks to the early checks (known only when the server sends a
+Content-Length).
+
+The save methods of the download threads call note_failure() when an
+image URL could not be stored. A caller that wrapped a provider search
+in track() asks failed() afterwards: the provider matched the title but
+the download failed, which is not a miss for the title.
+"""
+
+CHUNK_SIZE = 8192
+MIN_IMAGE_SIZE = 1024
+DEFAULT_MAX_MB = 5
+ACCEPT = "image/jpeg, image/png;q=0.9, image/webp;q=0.8"
+
+
+class DownloadRejected(ValueError):
+	"""The response is not an acceptable image; do not retry"""
+
+
+class ImageTooLarge(DownloadRejected):
+	"""The image is above the byte cap; a smaller size may be asked"""
+
+
+def sniff_image(head):
+	"""Image format from the first bytes of a file, or None"""
+	if head[:3] == b"\xFF\xD8\xFF":
+		return "jpeg"
+	if head[:8] == b"\x89PNG\r\n\x1a\n":
+		return "png"
+	if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+		return "webp"
+	return None
+
+
+def max_image_bytes():
+	"""Byte cap of a single artwork download"""
+	try:
+		value = int(config.plugins.Aglare.max_image_size.value)
+	except Exception:
+		value = DEFAULT_MAX_MB
+	return min(value, MAX_ORIGINAL_SIZE) * 1024 * 1024
+
+
+class DownloadGuard:
+	"""Early-abort image streaming with byte accounting"""
+
+	def __init__(self):
+		self.lock = Lock()
+		self.counters = {
+			"saved": 0, "bytes": 0,
+			"rejected_size": 0, "rejected_type": 0, "aborted": 0,
+			"bytes_saved": 0, "converted": 0
+		}
+		self.local = local()  # failed saves of this thread since track()
+
+	def _count(self, name, saved=0, received=0):
+		with self.lock:
+			self.counters[name] += 1
+			self.counters["bytes_saved"] += max(saved, 0)
+			self.counters["bytes"] += received
+
+	def stream_image(self, response, temp_path, max_bytes=None):
+		"""
+		Write a streamed image response to temp_path
+
+		Returns:
+			int: bytes written
+		Raises:
+			DownloadRejected: oversized, truncated or not an image
+		"""
+		if max_bytes is None:
+			max_bytes = max_image_bytes()
+		try:
+			length = int(response.headers.get("Content-Length") or 0)
+		except ValueError:
+			length = 0
+		if length > max_bytes:
+			self._count("rejected_size", saved=length)
+			raise ImageTooLarge(f"Image too large: {length} bytes")
+
+		received = 0
+		image_format = None
+		try:
+			with open(temp_path, "wb") as f:
+				for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+					if not chunk:
+						continue
+					if image_format is None:
+						image_format = sniff_image(chunk[:12])
+						if image_format is None:
+							self._count("rejected_type", saved=length - len(chunk), received=len(chunk))
+							raise DownloadRejected("Not an image")
+					received += len(chunk)
+					if received > max_bytes:
+						self._count("aborted", saved=length - received, received=received)
+						raise ImageTooLarge(f"Image larger than {max_bytes} bytes")
+					f.write(chunk)
+			if received < MIN_IMAGE_SIZE:
+				self._count("rejected_size", received=received)
+				raise DownloadRejected(f"Image too small: {received} bytes")
+			if image_format != "jpeg":
+				self._to_jpeg(temp_path)
+		except Exception:
+			try:
+				remove(temp_path)
+			except OSError:
+				pass
+			raise
+		self._count("saved", received=received)
+		return received
+
+	def _to_jpeg(self, path):
+		"""Re-encode a PNG/WebP download as JPEG in place"""
+		converted = path + ".jpg"
+		try:
+			with Image.open(path) as img:
+				if img.mode in ("RGBA", "LA", "P"):
+					img = img.convert("RGBA")
+					background = Image.new("RGB", img.size, (0, 0, 0))
+					background.paste(img, mask=img.split()[-1])
+					img = background
+				elif img.mode != "RGB":
+					img = img.convert("RGB")
+				img.save(converted, "JPEG", quality=90)
+			replace(converted, path)
+		except Exception as e:
+			try:
+				remove(converted)
+			except OSError:
+				pass
+			raise DownloadRejected(f"Cannot convert image: {str(e)}")
+		with self.lock:
+			self.counters["converted"] += 1
+
+	def track(self):
+		"""Start counting the failed saves of the calling thread"""
+		self.local.failed = 0
+
+	def note_failure(self):
+		"""An image URL found by a provider could not be saved"""
+		if getattr(self.local, "failed", None) is not None:
+			self.local.failed += 1
+
+	def failed(self):
+		"""True when a save of this thread failed since track()"""
+		return bool(getattr(self.local, "failed", 0))
+
+	def stats(self):
+		with self.lock:
+			return dict(self.counters)
+
+
+download_guard = DownloadGuard()
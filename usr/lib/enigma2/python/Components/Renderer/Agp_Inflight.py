@@ -0,0 +1,146 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function
+"""
+#########################################################
+#                                                       #
+#  AGP - Advanced Graphics Renderer                     #
+#  Version: 3.5.0                                       #
+#  Created by Lululla (https://github.com/Belfagor2005) #
+#  License: CC BY-NC-SA 4.0                             #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0    #
+#                                                       #
+#  Last Modified: "18:14 - 20250512"                    #
+#                                                       #
+#  Credits:                                             #
+#  - Original concept by Lululla                        #
+#  - Poster renderer                                    #
+#  - Backdrop renderer                                  #
+#  - Poster EMC renderer                                #
+#  - InfoEvents renderer                                #
+#  - Star rating renderer                               #
+#  - Parental control renderer                          #
+#  - Genre detection and renderer                       #
+#                                                       #
+#  - Advanced download management system                #
+#  - Atomic file operations                             #
+#  - Thread-safe resource locking                       #
+#  - TMDB API integration                               #
+#  - TVDB API integration                               #
+#  - OMDB API integration                               #
+#  - FANART API integration                             #
+#  - IMDB API integration                               #
+#  - ELCINEMA API integration                           #
+#  - GOOGLE API integration                             #
+#  - PROGRAMMETV integration                            #
+#  - MOLOTOV API integration                            #
+#  - Advanced caching system                            #
+#  - Fully configurable via AGP Setup Plugin            #
+#                                                       #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+__author__ = "Lululla"
+__copyright__ = "AGP Team"
+
+# Standard library
+from threading import Event, Lock
+
+# Local imports
+from .Agp_Utils import logger
+
+
+"""
+Single-flight registry for artwork downloads.
+
+PosterDB, BackdropDB and PosterDBEMC all run their own provider chain.
+When several renderers ask for the same cleaned title at the same moment
+only the first caller (the leader) runs the job; every other caller
+attaches to it and waits for its result instead of generating new HTTP
+traffic.
+
+Use:
+	result, shared = artwork_flight.do(("poster", pstcanal), job, poster_path)
+"""
+
+
+class _Call:
+	"""One in-flight job and the result shared with its waiters"""
+
+	__slots__ = ("done", "result", "waiters")
+
+	def __init__(self):
+		self.done = Event()
+		self.result = None
+		self.waiters = 0
+
+
+class InflightRegistry:
+	"""Coalesce concurrent jobs sharing the same key"""
+
+	def __init__(self, wait_timeout=120):
+		self.lock = Lock()
+		self.calls = {}
+		self.wait_timeout = wait_timeout
+		self.coalesced = 0
+
+	def do(self, key, func, *args, **kwargs):
+		"""
+		Run func once per key among concurrent callers
+
+		Args:
+			key: tuple (media type, cleaned title)
+			func: callable executed by the leader only
+
+		Returns:
+			tuple: (result, shared) where shared is True when the result
+			comes from a job started by another caller
+		"""
+		with self.lock:
+			call = self.calls.get(key)
+			if call is not None:
+				call.waiters += 1
+				self.coalesced += 1
+				leader = False
+			else:
+				call = _Call()
+				self.calls[key] = call
+				leader = True
+
+		if not leader:
+			logger.debug(f"Inflight: attached to running job {key}")
+			if not call.done.wait(self.wait_timeout):
+				logger.warning(f"Inflight: timeout waiting for {key}")
+				return None, True
+			return call.result, True
+
+		try:
+			call.result = func(*args, **kwargs)
+		except Exception as e:
+			logger.error(f"Inflight: job {key} failed: {str(e)}")
+			call.result = None
+		finally:
+			with self.lock:
+				self.calls.pop(key, None)
+			call.done.set()
+		return call.result, False
+
+	def is_running(self, key):
+		"""Return True when a job for key is currently in flight"""
+		with self.lock:
+			return key in self.calls
+
+	def stats(self):
+		"""Return a snapshot of the registry state"""
+		with self.lock:
+			return {
+				"inflight": len(self.calls),
+				"waiters": sum(call.waiters for call in self.calls.values()),
+				"coalesced": self.coalesced
+			}
+
+
+artwork_flight = InflightRegistry()
@@ -0,0 +1,538 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function
+"""
+#########################################################
+#                                                       #
+#  AGP - Advanced Graphics Renderer                     #
+#  Version: 3.5.0                                       #
+#  Created by Lululla (https://github.com/Belfagor2005) #
+#  License: CC BY-NC-SA 4.0                             #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0    #
+#                                                       #
+#  Last Modified: "18:14 - 20250512"                    #
+#                                                       #
+#  Credits:                                             #
+#  - Original concept by Lululla                        #
+#  - Poster renderer                                    #
+#  - Backdrop renderer                                  #
+#  - Poster EMC renderer                                #
+#  - InfoEvents renderer                                #
+#  - Star rating renderer                               #
+#  - Parental control renderer                          #
+#  - Genre detection and renderer                       #
+#                                                       #
+#  - Advanced download management system                #
+#  - Atomic file operations                             #
+#  - Thread-safe resource locking                       #
+#  - TMDB API integration                               #
+#  - TVDB API integration                               #
+#  - OMDB API integration                               #
+#  - FANART API integration                             #
+#  - IMDB API integration                               #
+#  - ELCINEMA API integration                           #
+#  - GOOGLE API integration                             #
+#  - PROGRAMMETV integration                            #
+#  - MOLOTOV API integration                            #
+#  - Advanced caching system                            #
+#  - Fully configurable via AGP Setup Plugin            #
+#                                                       #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+__author__ = "Lululla"
+__copyright__ = "AGP Team"
+
+# Standard library
+from collections import OrderedDict
+from json import dumps as json_dumps, load as json_load, loads as json_loads
+from os import remove, scandir
+from os.path import join
+from threading import Lock, Thread
+from time import time
+
+# Enigma2 imports
+from Components.config import config
+
+# Local imports
+from .Agp_Inflight import InflightRegistry
+from .Agp_MissCache import miss_cache
+from .Agp_Resolver import title_resolver
+from .Agp_ResponseCache import response_cache
+from .Agp_Revalidate import revalidator
+from .Agp_Scheduler import ArtworkScheduler, PRIO_PREFETCH
+from .Agp_Utils import DATA_FOLDER, POSTER_FOLDER, logger
+
+try:
+	import sqlite3
+except ImportError:
+	sqlite3 = None
+
+
+"""
+Event metadata shared by InfoEvents, StarX, ParentalX and GenreX.
+
+The first renderer asking for a title fetches it once for everybody:
+TMDB details with credits and release dates (movies) or content ratings
+(series) in a single append_to_response call, or OMDB when TMDB is not
+used. Only the fields the renderers show are kept; the compact record
+is stored in DATA_FOLDER/metadata.db (one row per title, written in a
+transaction) and held in an in-memory LRU, so the other renderers get
+it without a fetch, a query or a parse.
+
+Older versions wrote one {title}.json file per event next to the
+posters. The first get() imports them into the database in a single
+transaction, compacting full TMDB/OMDB payloads on the way, and removes
+the files.
+
+The artwork prefetcher also hands the titles of the events the user is
+expected to watch next to warm(): they are fetched in the background at
+PRIO_PREFETCH, with the source and keys of the last get(), so the info
+renderers find them stored after the zap. Nothing is warmed before a
+metadata renderer asked for something.
+
+Records expire after config.plugins.Aglare.refresh_artwork days: get()
+fetches them again (peek() still returns them). The database is kept
+under config.plugins.Aglare.quota_metadata by the storage manager,
+least recently read titles first.
+
+Record fields:
+	source, title, year, rating (0-10), genres, genre_ids (TMDB),
+	directors, writers, cast, countries, runtime, plot, rated (US
+	certification)
+"""
+
+METADATA_VERSION = 1
+MEMORY_ENTRIES = 200
+CERT_COUNTRY = "US"  # ParentalX maps US certifications
+TMDB_APPEND = {
+	"movie": "credits,release_dates",
+	"tv": "credits,content_ratings"
+}
+OMDB_API = "http://www.omdbapi.com/"
+METADATA_FILE = join(DATA_FOLDER, "metadata.db")
+TOUCH_BATCH = 50  # access times written together
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metadata (
+	title TEXT PRIMARY KEY,
+	record TEXT NOT NULL,
+	size INTEGER NOT NULL,
+	fetched REAL NOT NULL,
+	accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS metadata_accessed ON metadata (accessed);
+"""
+
+
+def _names(items):
+	return [item["name"] for item in items or () if item.get("name")]
+
+
+def _omdb_list(value):
+	return [item.strip() for item in (value or "").split(",") if item.strip() and item.strip() != "N/A"]
+
+
+def _omdb_value(value):
+	return "" if value in (None, "N/A") else value
+
+
+def _certification(data):
+	"""US certification of a TMDB payload (release_dates or content_ratings)"""
+	for entry in (data.get("release_dates") or {}).get("results", []):
+		if entry.get("iso_3166_1") == CERT_COUNTRY:
+			for release in entry.get("release_dates", []):
+				if release.get("certification"):
+					return release["certification"]
+			break
+	for entry in (data.get("content_ratings") or {}).get("results", []):
+		if entry.get("iso_3166_1") == CERT_COUNTRY:
+			return entry.get("rating") or ""
+	# Files written by the old ParentalX carry the certification here
+	return data.get("Rated") or ""
+
+
+def compact_tmdb(data):
+	crew = (data.get("credits") or {}).get("crew") or []
+	date = data.get("release_date") or data.get("first_air_date") or ""
+	return {
+		"v": METADATA_VERSION,
+		"source": "tmdb",
+		"title": data.get("title") or data.get("name") or "",
+		"year": date[:4],
+		"rating": data.get("vote_average") or 0,
+		"genres": _names(data.get("genres")),
+		"genre_ids": [genre["id"] for genre in data.get("genres") or () if "id" in genre],
+		"directors": [member["name"] for member in crew if member.get("job") == "Director"],
+		"writers": [member["name"] for member in crew if member.get("department") == "Writing"],
+		"cast": [],
+		"countries": _names(data.get("production_countries")),
+		"runtime": data.get("runtime") or "",
+		"plot": data.get("overview") or "",
+		"rated": _certification(data)
+	}
+
+
+def compact_omdb(data):
+	try:
+		rating = float(data.get("imdbRating"))
+	except (TypeError, ValueError):
+		rating = 0
+	return {
+		"v": METADATA_VERSION,
+		"source": "omdb",
+		"title": _omdb_value(data.get("Title")) or "",
+		"year": _omdb_value(data.get("Year")) or "",
+		"rating": rating,
+		"genres": _omdb_list(data.get("Genre")),
+		"genre_ids": [],
+		"directors": _omdb_list(data.get("Director")),
+		"writers": _omdb_list(data.get("Writer")),
+		"cast": _omdb_list(data.get("Actors")),
+		"countries": _omdb_list(data.get("Country")),
+		"runtime": _omdb_value(data.get("Runtime")) or "",
+		"plot": _omdb_value(data.get("Plot")) or "",
+		"rated": _omdb_value(data.get("Rated")) or ""
+	}
+
+
+def compact(data):
+	"""Compact record of a stored record or a TMDB/OMDB payload, None if unusable"""
+	if not isinstance(data, dict):
+		return None
+	if data.get("v") == METADATA_VERSION:
+		return data
+	if "Title" in data:
+		return compact_omdb(data)
+	if "title" in data or "name" in data:
+		return compact_tmdb(data)
+	return None
+
+
+class MetadataService:
+	"""Fetch-once metadata records with a memory LRU over a SQLite store"""
+
+	def __init__(self, path=METADATA_FILE, legacy_folder=POSTER_FOLDER):
+		self.path = path
+		self.legacy_folder = legacy_folder
+		self.lock = Lock()
+		self.db_lock = Lock()
+		self.conn = None
+		self.opened = False
+		self.imported = False
+		self.memory = OrderedDict()  # title -> (record, fetched)
+		self.touched = {}  # title -> last access, written in batches
+		self.flight = InflightRegistry(wait_timeout=30)
+		self.warm_queue = ArtworkScheduler("metadata")
+		self.warmer = None
+		self.source = None  # (source, tmdb_key, omdb_key) of the last get()
+		self.counters = {"memory": 0, "disk": 0, "fetched": 0, "missing": 0, "expired": 0, "imported": 0, "warmed": 0}
+
+	@staticmethod
+	def _ttl():
+		"""Seconds a record is used before get() fetches it again, 0 = forever"""
+		try:
+			return int(config.plugins.Aglare.refresh_artwork.value) * 86400
+		except Exception:
+			return 30 * 86400
+
+	def _connect(self):
+		"""Open the database on first use"""
+		if self.opened:
+			return self.conn
+		with self.db_lock:
+			if not self.opened:
+				self.opened = True
+				if sqlite3 is None:
+					logger.warning("Metadata: sqlite3 not available, records kept in memory only")
+				else:
+					try:
+						conn = sqlite3.connect(self.path, check_same_thread=False)
+						conn.execute("PRAGMA journal_mode=WAL")
+						conn.executescript(SCHEMA)
+						self.conn = conn
+					except Exception as e:
+						logger.error(f"Metadata: cannot open {self.path}: {str(e)}")
+		return self.conn
+
+	def import_files(self):
+		"""
+		Move the {title}.json files of older versions into the database
+
+		Runs once, from the first get() (worker threads only). A file is
+		removed only after its row is committed, or when the title is
+		already in the database; empty files go too. Files that cannot
+		be read or compacted are left in place.
+
+		Returns:
+			int: number of records imported
+		"""
+		if self.imported:
+			return 0
+		self.imported = True
+		conn = self._connect()
+		if conn is None:
+			return 0
+		rows = []  # (path, row)
+		paths = []  # files to remove once the rows are committed
+		try:
+			with scandir(self.legacy_folder) as entries:
+				for entry in entries:
+					if not entry.name.endswith(".json") or not entry.is_file():
+						continue
+					try:
+						stat = entry.stat()
+						if not stat.st_size:
+							paths.append(entry.path)
+							continue
+						with open(entry.path, "r") as f:
+							record = compact(json_load(f))
+					except Exception as e:
+						logger.warning(f"Metadata: unreadable {entry.path}, left in place: {str(e)}")
+						continue
+					if record is None:
+						logger.warning(f"Metadata: unknown format in {entry.path}, left in place")
+						continue
+					text = json_dumps(record)
+					rows.append((entry.path, (entry.name[:-5], text, len(text), stat.st_mtime, stat.st_mtime)))
+		except OSError as e:
+			logger.warning(f"Metadata: cannot scan {self.legacy_folder}: {str(e)}")
+
+		inserted = 0
+		if rows:
+			try:
+				with self.db_lock, conn:
+					for path, row in rows:
+						# Records fetched since take precedence over the old files
+						inserted += conn.execute("INSERT OR IGNORE INTO metadata VALUES (?, ?, ?, ?, ?)", row).rowcount
+			except Exception as e:
+				logger.error(f"Metadata: import failed: {str(e)}")
+				return 0
+			# Committed: imported now, or the title was already stored
+			paths.extend(path for path, _ in rows)
+		if not paths:
+			return 0
+		for path in paths:
+			try:
+				remove(path)
+			except OSError:
+				pass
+			revalidator.forget(path)
+		revalidator.flush(force=True)
+		with self.lock:
+			self.counters["imported"] += inserted
+		logger.info(f"Metadata: {inserted} records imported, {len(paths)} files removed")
+		return inserted
+
+	def _remember(self, title, record, fetched):
+		with self.lock:
+			self.memory[title] = (record, fetched)
+			self.memory.move_to_end(title)
+			while len(self.memory) > MEMORY_ENTRIES:
+				self.memory.popitem(last=False)
+
+	def _lookup(self, title):
+		"""(record, fetch time) of title from memory or the database"""
+		with self.lock:
+			entry = self.memory.get(title)
+			if entry is not None:
+				self.memory.move_to_end(title)
+				self.counters["memory"] += 1
+				return entry
+
+		conn = self._connect()
+		if conn is None:
+			return None, 0
+		try:
+			with self.db_lock:
+				row = conn.execute("SELECT record, fetched FROM metadata WHERE title = ?", (title,)).fetchone()
+			if row is None:
+				return None, 0
+			record = json_loads(row[0])
+		except Exception as e:
+			logger.warning(f"Metadata: cannot read '{title}': {str(e)}")
+			return None, 0
+		with self.lock:
+			self.counters["disk"] += 1
+			self.touched[title] = time()
+			flush = len(self.touched) >= TOUCH_BATCH
+		if flush:
+			self._write([])
+		self._remember(title, record, row[1])
+		return record, row[1]
+
+	def _expired(self, fetched):
+		ttl = self._ttl()
+		return bool(ttl) and time() - fetched > ttl
+
+	def peek(self, title):
+		"""Record of title from memory or the database, never from the network"""
+		if not title:
+			return None
+		return self._lookup(title)[0]
+
+	def get(self, title, year=None, source="auto", tmdb_key=None, omdb_key=None):
+		"""
+		Record of title, fetched once when not known yet or expired (worker threads only)
+
+		Args:
+			source: "auto" (TMDB when tmdb_key is set, else OMDB), "tmdb",
+				"omdb" or "off" (no fetch)
+		"""
+		if not title:
+			return None
+		if source != "off":
+			self.source = (source, tmdb_key, omdb_key)
+		self.import_files()
+		record, fetched = self._lookup(title)
+		if source == "off" or (record is not None and not self._expired(fetched)):
+			return record
+		fresh, _ = self.flight.do(("metadata", title), self._fetch, title, year, source, tmdb_key, omdb_key)
+		# An expired record beats no record when the provider fails
+		return fresh or record
+
+	def warm(self, titles, owner=None):
+		"""
+		Fetch titles in the background before they are shown (prefetcher)
+
+		Args:
+			titles: (title, year) pairs, most likely first
+			owner: id of the requesting renderer; its titles still
+				waiting from the previous call are dropped
+		"""
+		if self.source is None:
+			return
+		self.warm_queue.retire(owner)
+		for title, year in titles:
+			if title:
+				self.warm_queue.put((title, year), key=title, priority=PRIO_PREFETCH, owner=owner)
+		with self.lock:
+			if self.warmer is not None:
+				return
+			self.warmer = Thread(target=self._warm_loop, name="AgpMetadataWarm", daemon=True)
+		self.warmer.start()
+
+	def _warm_loop(self):
+		while True:
+			title, year = self.warm_queue.get()
+			with self.lock:
+				known = title in self.memory
+			if known:
+				continue
+			try:
+				if self.get(title, year, *self.source) is not None:
+					with self.lock:
+						self.counters["warmed"] += 1
+			except Exception as e:
+				logger.warning(f"Metadata: warm-up failed for '{title}': {str(e)}")
+
+	def _fetch(self, title, year, source, tmdb_key, omdb_key):
+		# Fetched by the previous caller while this one was waiting
+		record, fetched = self._lookup(title)
+		if record is not None and not self._expired(fetched):
+			return record
+		if record is not None:
+			with self.lock:
+				self.counters["expired"] += 1
+		try:
+			if source == "tmdb" or (source == "auto" and tmdb_key):
+				data = self._fetch_tmdb(title, year, tmdb_key)
+			else:
+				data = self._fetch_omdb(title, year, omdb_key)
+		except Exception as e:
+			logger.warning(f"Metadata: fetch failed for '{title}': {str(e)}")
+			return None
+
+		record = compact(data) if data else None
+		if record is None:
+			with self.lock:
+				self.counters["missing"] += 1
+			return None
+		now = time()
+		text = json_dumps(record)
+		self._write([(title, text, len(text), now, now)])
+		with self.lock:
+			self.counters["fetched"] += 1
+		self._remember(title, record, now)
+		return record
+
+	@staticmethod
+	def _fetch_tmdb(title, year, api_key):
+		# The resolver keeps its own misses: no search for unknown titles
+		ref = title_resolver.resolve_tmdb(title, year, api_key)
+		if ref is None:
+			return None
+		url = title_resolver.details_url(ref, api_key, TMDB_APPEND.get(ref["media_type"], "credits"))
+		return response_cache.fetch_json(url, timeout=(10, 20))
+
+	@staticmethod
+	def _fetch_omdb(title, year, api_key):
+		if not api_key or miss_cache.should_skip("metadata", title, "omdb"):
+			return None
+		params = {"apikey": api_key, "t": title, "plot": "full"}
+		if year:
+			params["y"] = year
+		data = response_cache.fetch_json(OMDB_API, params=params, timeout=(10, 20))
+		if data.get("Response") == "False":
+			miss_cache.record_miss("metadata", title, "omdb")
+			return None
+		return data
+
+	def _write(self, rows, deletes=()):
+		"""Store rows, delete titles and write the pending access times in one transaction"""
+		with self.lock:
+			touched, self.touched = self.touched, {}
+		conn = self._connect()
+		if conn is None:
+			return
+		try:
+			with self.db_lock, conn:
+				if deletes:
+					conn.executemany("DELETE FROM metadata WHERE title = ?", [(title,) for title in deletes])
+				if rows:
+					conn.executemany("INSERT OR REPLACE INTO metadata VALUES (?, ?, ?, ?, ?)", rows)
+				if touched:
+					conn.executemany(
+						"UPDATE metadata SET accessed = ? WHERE title = ?",
+						[(accessed, title) for title, accessed in touched.items()]
+					)
+		except Exception as e:
+			logger.error(f"Metadata: write failed: {str(e)}")
+
+	def by_access(self):
+		"""(title, size) of every record, expired first, then least recently read (storage manager)"""
+		conn = self._connect()
+		if conn is None:
+			return []
+		self._write([])
+		ttl = self._ttl()
+		cutoff = time() - ttl if ttl else 0
+		with self.db_lock:
+			return conn.execute(
+				"SELECT title, size FROM metadata ORDER BY fetched >= ?, accessed", (cutoff,)
+			).fetchall()
+
+	def usage(self):
+		"""Bytes of record data stored"""
+		conn = self._connect()
+		if conn is None:
+			return 0
+		with self.db_lock:
+			return conn.execute("SELECT COALESCE(SUM(size), 0) FROM metadata").fetchone()[0]
+
+	def delete(self, titles):
+		"""Remove titles from the database and the memory LRU"""
+		self._write([], titles)
+		with self.lock:
+			for title in titles:
+				self.memory.pop(title, None)
+
+	def stats(self):
+		with self.lock:
+			return dict(self.counters, entries=len(self.memory))
+
+
+metadata_service = MetadataService()
@@ -0,0 +1,209 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function
+"""
+#########################################################
+#                                                       #
+#  AGP - Advanced Graphics Renderer                     #
+#  Version: 3.5.0                                       #
+#  Created by Lululla (https://github.com/Belfagor2005) #
+#  License: CC BY-NC-SA 4.0                             #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0    #
+#                                                       #
+#  Last Modified: "18:14 - 20250512"                    #
+#                                                       #
+#  Credits:                                             #
+#  - Original concept by Lululla                        #
+#  - Poster renderer                                    #
+#  - Backdrop renderer                                  #
+#  - Poster EMC renderer                                #
+#  - InfoEvents renderer                                #
+#  - Star rating renderer                               #
+#  - Parental control renderer                          #
+#  - Genre detection and renderer                       #
+#                                                       #
+#  - Advanced download management system                #
+#  - Atomic file operations                             #
+#  - Thread-safe resource locking                       #
+#  - TMDB API integration                               #
+#  - TVDB API integration                               #
+#  - OMDB API integration                               #
+#  - FANART API integration                             #
+#  - IMDB API integration                               #
+#  - ELCINEMA API integration                           #
+#  - GOOGLE API integration                             #
+#  - PROGRAMMETV integration                            #
+#  - MOLOTOV API integration                            #
+#  - Advanced caching system                            #
+#  - Fully configurable via AGP Setup Plugin            #
+#                                                       #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+__author__ = "Lululla"
+__copyright__ = "AGP Team"
+
+# Standard library
+from json import load as json_load, dump as json_dump
+from os import replace
+from os.path import exists, join
+from threading import Lock
+from time import time
+
+# Enigma2 imports
+from Components.config import config
+
+# Local imports
+from .Agp_Utils import DATA_FOLDER, logger
+
+
+"""
+Persistent negative cache for titles that no provider can resolve.
+
+Every miss is stored per (media type, cleaned title, provider) in a JSON
+file under DATA_FOLDER, so it survives reboots. A provider is not asked
+again for the same title until its re-check interval has elapsed; the
+interval doubles after each consecutive miss and is capped by the TTL.
+Entries older than the TTL are dropped and the title starts clean.
+
+Settings (Aglare setup):
+	config.plugins.Aglare.miss_cache    enable/disable
+	config.plugins.Aglare.miss_recheck  first re-check interval (hours)
+	config.plugins.Aglare.miss_ttl      entry lifetime (days)
+"""
+
+MISS_CACHE_FILE = join(DATA_FOLDER, "miss_cache.json")
+SAVE_INTERVAL = 30  # seconds between two writes of the cache file
+
+
+class MissCache:
+	"""On-disk miss registry with exponential re-check"""
+
+	def __init__(self, path=MISS_CACHE_FILE):
+		self.path = path
+		self.lock = Lock()
+		self.entries = {}
+		self.dirty = False
+		self.last_save = 0
+		self.skipped = 0
+		self._load()
+
+	@staticmethod
+	def _key(media_type, title, provider):
+		return f"{media_type}|{title}|{provider}"
+
+	@staticmethod
+	def enabled():
+		try:
+			return bool(config.plugins.Aglare.miss_cache.value)
+		except Exception:
+			return True
+
+	@staticmethod
+	def _recheck_seconds():
+		try:
+			return int(config.plugins.Aglare.miss_recheck.value) * 3600
+		except Exception:
+			return 6 * 3600
+
+	@staticmethod
+	def _ttl_seconds():
+		try:
+			return int(config.plugins.Aglare.miss_ttl.value) * 86400
+		except Exception:
+			return 7 * 86400
+
+	def _load(self):
+		if not exists(self.path):
+			return
+		try:
+			with open(self.path, "r") as f:
+				self.entries = json_load(f)
+			self._purge_expired(time())
+		except Exception as e:
+			logger.warning(f"MissCache: cannot read {self.path}, starting empty: {str(e)}")
+			self.entries = {}
+
+	def _purge_expired(self, now):
+		ttl = self._ttl_seconds()
+		expired = [key for key, entry in self.entries.items() if now - entry.get("first", 0) > ttl]
+		for key in expired:
+			del self.entries[key]
+		if expired:
+			self.dirty = True
+
+	def should_skip(self, media_type, title, provider):
+		"""Return True when provider must not be queried again for title yet"""
+		if not self.enabled() or not title:
+			return False
+
+		now = time()
+		key = self._key(media_type, title, provider)
+		with self.lock:
+			entry = self.entries.get(key)
+			if not entry:
+				return False
+			if now - entry.get("first", 0) > self._ttl_seconds():
+				del self.entries[key]
+				self.dirty = True
+				return False
+			if now < entry.get("next", 0):
+				self.skipped += 1
+				return True
+		return False
+
+	def record_miss(self, media_type, title, provider):
+		"""Register a miss and schedule the next re-check"""
+		if not self.enabled() or not title:
+			return
+
+		now = time()
+		key = self._key(media_type, title, provider)
+		with self.lock:
+			entry = self.entries.get(key) or {"first": now, "count": 0}
+			entry["count"] += 1
+			delay = min(self._recheck_seconds() * (2 ** (entry["count"] - 1)), self._ttl_seconds())
+			entry["last"] = now
+			entry["next"] = now + delay
+			self.entries[key] = entry
+			self.dirty = True
+		self.save()
+
+	def record_hit(self, media_type, title):
+		"""Forget every miss recorded for title once any provider succeeds"""
+		prefix = f"{media_type}|{title}|"
+		with self.lock:
+			keys = [key for key in self.entries if key.startswith(prefix)]
+			for key in keys:
+				del self.entries[key]
+			if keys:
+				self.dirty = True
+		self.save()
+
+	def save(self, force=False):
+		"""Atomically write the cache file, at most once every SAVE_INTERVAL"""
+		now = time()
+		with self.lock:
+			if not self.dirty or (not force and now - self.last_save < SAVE_INTERVAL):
+				return
+			self._purge_expired(now)
+			data = dict(self.entries)
+			self.dirty = False
+			self.last_save = now
+		try:
+			tmp_path = self.path + ".tmp"
+			with open(tmp_path, "w") as f:
+				json_dump(data, f)
+			replace(tmp_path, self.path)
+		except Exception as e:
+			logger.error(f"MissCache: save failed: {str(e)}")
+
+	def stats(self):
+		with self.lock:
+			return {"entries": len(self.entries), "skipped": self.skipped}
+
+
+miss_cache = MissCache()
@@ -0,0 +1,122 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function
+"""
+#########################################################
+#                                                       #
+#  AGP - Advanced Graphics Renderer                     #
+#  Version: 3.5.0                                       #
+#  Created by Lululla (https://github.com/Belfagor2005) #
+#  License: CC BY-NC-SA 4.0                             #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0    #
+#                                                       #
+#  Last Modified: "18:14 - 20250512"                    #
+#                                                       #
+#  Credits:                                             #
+#  - Original concept by Lululla                        #
+#  - Poster renderer                                    #
+#  - Backdrop renderer                                  #
+#  - Poster EMC renderer                                #
+#  - InfoEvents renderer                                #
+#  - Star rating renderer                               #
+#  - Parental control renderer                          #
+#  - Genre detection and renderer                       #
+#                                                       #
+#  - Advanced download management system                #
+#  - Atomic file operations                             #
+#  - Thread-safe resource locking                       #
+#  - TMDB API integration                               #
+#  - TVDB API integration                               #
+#  - OMDB API integration                               #
+#  - FANART API integration                             #
+#  - IMDB API integration                               #
+#  - ELCINEMA API integration                           #
+#  - GOOGLE API integration                             #
+#  - PROGRAMMETV integration                            #
+#  - MOLOTOV API integration                            #
+#  - Advanced caching system                            #
+#  - Fully configurable via AGP Setup Plugin            #
+#                                                       #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+__author__ = "Lululla"
+__copyright__ = "AGP Team"
+
+# Standard library
+from threading import Lock
+from weakref import WeakMethod
+
+# Third-party libraries
+from twisted.internet.reactor import callFromThread
+
+# Local imports
+from .Agp_Utils import logger
+
+
+"""
+Completion notifications for artwork downloads.
+
+The download threads publish one event per (media type, cleaned title)
+when a job ends. Events are delivered on the enigma2 main loop through
+the twisted reactor, so subscribers can touch GUI widgets directly.
+Subscriptions are one-shot and hold weak references to bound methods,
+so a destroyed renderer never keeps itself alive through the notifier.
+
+Use:
+	artwork_notifier.subscribe(("poster", pstcanal), self.onPosterReady)
+	artwork_notifier.publish(("poster", pstcanal), poster_path)
+"""
+
+
+class ArtworkNotifier:
+	"""Deliver download completion events to renderers on the main loop"""
+
+	def __init__(self):
+		self.lock = Lock()
+		self.subscribers = {}
+
+	def subscribe(self, key, callback):
+		"""Register a one-shot callback(key, path) for key"""
+		ref = WeakMethod(callback) if hasattr(callback, "__self__") else (lambda: callback)
+		with self.lock:
+			self.subscribers.setdefault(key, []).append(ref)
+
+	def unsubscribe(self, key, callback):
+		"""Remove a pending callback for key"""
+		with self.lock:
+			refs = self.subscribers.get(key)
+			if not refs:
+				return
+			refs[:] = [ref for ref in refs if ref() is not None and ref() != callback]
+			if not refs:
+				del self.subscribers[key]
+
+	def publish(self, key, path):
+		"""Announce the outcome of a job; path is None when nothing was found"""
+		with self.lock:
+			if key not in self.subscribers:
+				return
+		try:
+			callFromThread(self._dispatch, key, path)
+		except Exception as e:
+			logger.error(f"Notify: cannot schedule {key}: {str(e)}")
+
+	def _dispatch(self, key, path):
+		"""Run on the main loop: call and drop every subscriber of key"""
+		with self.lock:
+			refs = self.subscribers.pop(key, [])
+		for ref in refs:
+			callback = ref()
+			if callback is None:
+				continue
+			try:
+				callback(key, path)
+			except Exception as e:
+				logger.error(f"Notify: subscriber error for {key}: {str(e)}")
+
+
+artwork_notifier = ArtworkNotifier()
@@ -0,0 +1,142 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function
+"""
+#########################################################
+#                                                       #
+#  AGP - Advanced Graphics Renderer                     #
+#  Version: 3.5.0                                       #
+#  Created by Lululla (https://github.com/Belfagor2005) #
+#  License: CC BY-NC-SA 4.0                             #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0    #
+#                                                       #
+#  Last Modified: "18:14 - 20250512"                    #
+#                                                       #
+#  Credits:                                             #
+#  - Original concept by Lululla                        #
+#  - Poster renderer                                    #
+#  - Backdrop renderer                                  #
+#  - Poster EMC renderer                                #
+#  - InfoEvents renderer                                #
+#  - Star rating renderer                               #
+#  - Parental control renderer                          #
+#  - Genre detection and renderer                       #
+#                                                       #
+#  - Advanced download management system                #
+#  - Atomic file operations                             #
+#  - Thread-safe resource locking                       #
+#  - TMDB API integration                               #
+#  - TVDB API integration                               #
+#  - OMDB API integration                               #
+#  - FANART API integration                             #
+#  - IMDB API integration                               #
+#  - ELCINEMA API integration                           #
+#  - GOOGLE API integration                             #
+#  - PROGRAMMETV integration                            #
+#  - MOLOTOV API integration                            #
+#  - Advanced caching system                            #
+#  - Fully configurable via AGP Setup Plugin            #
+#                                                       #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+__author__ = "Lululla"
+__copyright__ = "AGP Team"
+
+# Enigma2 imports
+from enigma import ePicLoad
+from Components.AVSwitch import AVSwitch
+
+# Local imports
+from .Agp_PixmapCache import pixmap_cache
+from .Agp_Utils import logger
+
+
+"""
+Asynchronous image decoding for the artwork renderers.
+
+loadJPG() decodes on the enigma2 main loop; an HD backdrop blocks it for
+tens of milliseconds at every change. AsyncPicLoader decodes through
+ePicLoad in its own thread, scaled to the widget size, and calls back on
+the main loop when the pixmap is ready.
+
+Only one decode runs per renderer. A request made while busy replaces
+the queued one, and a decode that completes after a newer request is
+dropped without being shown. Finished decodes go into the shared pixmap
+cache keyed by path and widget size.
+"""
+
+
+class AsyncPicLoader:
+	"""One ePicLoad per widget, latest request wins"""
+
+	def __init__(self, callback):
+		"""
+		Args:
+			callback: callable(path, pixmap) run on the main loop;
+				pixmap is None when the file could not be decoded
+		"""
+		self.callback = callback
+		self.picload = ePicLoad()
+		self.size = None
+		self.decoding = None  # path inside ePicLoad
+		self.wanted = None  # path whose result must be shown
+		self.queued = None  # (path, size) to start when ePicLoad is free
+		try:
+			self.picload_conn = self.picload.PictureData.connect(self._finished)
+		except AttributeError:
+			self.picload.PictureData.get().append(self._finished)
+
+	def _set_size(self, size):
+		if size == self.size:
+			return
+		scale = AVSwitch().getFramebufferScale()
+		self.picload.setPara((size[0], size[1], scale[0], scale[1], False, 1, "#00000000"))
+		self.size = size
+
+	def load(self, path, size):
+		"""Decode path for a widget of size; served from cache when possible"""
+		pixmap = pixmap_cache.get(path, size)
+		if pixmap is not None:
+			# Supersedes whatever is still decoding
+			self.cancel()
+			self.callback(path, pixmap)
+			return
+		self.wanted = path
+		if self.decoding:
+			self.queued = (path, size)
+			return
+		self._start(path, size)
+
+	def _start(self, path, size):
+		self._set_size(size)
+		self.decoding = path
+		if self.picload.startDecode(path) != 0:
+			logger.warning(f"PicDecoder: cannot decode {path}")
+			self.decoding = None
+			if path == self.wanted:
+				self.wanted = None
+				self.callback(path, None)
+
+	def cancel(self):
+		"""Forget the pending requests: nothing is shown when they end"""
+		self.wanted = None
+		self.queued = None
+
+	def _finished(self, picInfo=None):
+		path, self.decoding = self.decoding, None
+		pixmap = self.picload.getData()
+		if path and pixmap is not None:
+			pixmap_cache.put(path, pixmap, self.size)
+
+		queued, self.queued = self.queued, None
+		if queued is not None and queued != (path, self.size):
+			# Stale decode: a newer request came in meanwhile
+			self._start(*queued)
+			return
+		if path and path == self.wanted:
+			self.wanted = None
+			self.callback(path, pixmap)
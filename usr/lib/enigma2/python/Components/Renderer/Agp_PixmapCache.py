@@ -0,0 +1,174 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function
+"""
+#########################################################
+#                                                       #
+#  AGP - Advanced Graphics Renderer                     #
+#  Version: 3.5.0                                       #
+#  Created by Lululla (https://github.com/Belfagor2005) #
+#  License: CC BY-NC-SA 4.0                             #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0    #
+#                                                       #
+#  Last Modified: "18:14 - 20250512"                    #
+#                                                       #
+#  Credits:                                             #
+#  - Original concept by Lululla                        #
+#  - Poster renderer                                    #
+#  - Backdrop renderer                                  #
+#  - Poster EMC renderer                                #
+#  - InfoEvents renderer                                #
+#  - Star rating renderer                               #
+#  - Parental control renderer                          #
+#  - Genre detection and renderer                       #
+#                                                       #
+#  - Advanced download management system                #
+#  - Atomic file operations                             #
+#  - Thread-safe resource locking                       #
+#  - TMDB API integration                               #
+#  - TVDB API integration                               #
+#  - OMDB API integration                               #
+#  - FANART API integration                             #
+#  - IMDB API integration                               #
+#  - ELCINEMA API integration                           #
+#  - GOOGLE API integration                             #
+#  - PROGRAMMETV integration                            #
+#  - MOLOTOV API integration                            #
+#  - Advanced caching system                            #
+#  - Fully configurable via AGP Setup Plugin            #
+#                                                       #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+__author__ = "Lululla"
+__copyright__ = "AGP Team"
+
+# Standard library
+from collections import OrderedDict
+from threading import Lock
+
+# Enigma2 imports
+from Components.config import config
+
+
+"""
+Shared LRU cache of decoded pixmaps.
+
+loadJPG()/loadPNG() decode the file on every call; the renderers ask the
+cache instead, so zapping back to a recent channel shows its artwork
+without any disk access or decoding. The cache is bounded by the
+estimated memory of the decoded pixmaps (width x height x 4 bytes),
+set in MB by config.plugins.Aglare.pixmap_cache, and evicts the least
+recently used entries first.
+
+Entries are keyed by file path and decode size (None for the native
+size of loadJPG/loadPNG, the widget size for ePicLoad decodes): whoever
+rewrites an artwork file must call invalidate(path) before showing it
+again.
+"""
+
+DEFAULT_BUDGET_MB = 16
+FALLBACK_BYTES = 256 * 1024  # when the pixmap does not report its size
+
+
+def _pixmap_bytes(pixmap):
+	try:
+		size = pixmap.size()
+		return max(1, size.width() * size.height() * 4)
+	except Exception:
+		return FALLBACK_BYTES
+
+
+class PixmapCache:
+	"""Byte-bounded LRU of decoded pixmaps, with hit/miss counters"""
+
+	def __init__(self):
+		self.lock = Lock()
+		self.entries = OrderedDict()  # (path, size) -> (pixmap, bytes)
+		self.bytes = 0
+		self.counters = {"hits": 0, "misses": 0, "evictions": 0}
+
+	@staticmethod
+	def budget():
+		try:
+			return int(config.plugins.Aglare.pixmap_cache.value) * 1024 * 1024
+		except Exception:
+			return DEFAULT_BUDGET_MB * 1024 * 1024
+
+	def get(self, path, size=None):
+		"""Cached pixmap of path decoded at size (None = native), or None"""
+		if not path:
+			return None
+		key = (path, size)
+		with self.lock:
+			entry = self.entries.get(key)
+			if entry is not None:
+				self.entries.move_to_end(key)
+				self.counters["hits"] += 1
+				return entry[0]
+			self.counters["misses"] += 1
+		return None
+
+	def put(self, path, pixmap, size=None):
+		"""Store a decoded pixmap, evicting the least recently used ones"""
+		if not path or pixmap is None:
+			return
+		nbytes = _pixmap_bytes(pixmap)
+		budget = self.budget()
+		if nbytes > budget:
+			return
+		key = (path, size)
+		with self.lock:
+			old = self.entries.pop(key, None)
+			if old is not None:
+				self.bytes -= old[1]
+			self.entries[key] = (pixmap, nbytes)
+			self.bytes += nbytes
+			while self.bytes > budget and self.entries:
+				_, (_, evicted) = self.entries.popitem(last=False)
+				self.bytes -= evicted
+				self.counters["evictions"] += 1
+
+	def load(self, path, decoder):
+		"""
+		Return the pixmap of path, decoding it with decoder on a miss
+
+		Args:
+			path: image file
+			decoder: loadJPG or loadPNG
+
+		Returns:
+			The pixmap, or None when decoder failed (not cached)
+		"""
+		pixmap = self.get(path)
+		if pixmap is None and path:
+			pixmap = decoder(path)
+			self.put(path, pixmap)
+		return pixmap
+
+	def invalidate(self, path):
+		"""Drop every decode of path, e.g. after its file was downloaded again"""
+		with self.lock:
+			for key in [key for key in self.entries if key[0] == path]:
+				self.bytes -= self.entries.pop(key)[1]
+
+	def clear(self):
+		with self.lock:
+			self.entries.clear()
+			self.bytes = 0
+
+	def stats(self):
+		with self.lock:
+			lookups = self.counters["hits"] + self.counters["misses"]
+			return dict(
+				self.counters,
+				entries=len(self.entries),
+				bytes=self.bytes,
+				hit_rate=round(self.counters["hits"] / lookups, 3) if lookups else None
+			)
+
+
+pixmap_cache = PixmapCache()
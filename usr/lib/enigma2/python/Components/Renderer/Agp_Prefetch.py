@@ -0,0 +1,244 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function
+"""
+#########################################################
+#                                                       #
+#  AGP - Advanced Graphics Renderer                     #
+#  Version: 3.5.0                                       #
+#  Created by Lululla (https://github.com/Belfagor2005) #
+#  License: CC BY-NC-SA 4.0                             #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0    #
+#                                                       #
+#  Last Modified: "18:14 - 20250512"                    #
+#                                                       #
+#  Credits:                                             #
+#  - Original concept by Lululla                        #
+#  - Poster renderer                                    #
+#  - Backdrop renderer                                  #
+#  - Poster EMC renderer                                #
+#  - InfoEvents renderer                                #
+#  - Star rating renderer                               #
+#  - Parental control renderer                          #
+#  - Genre detection and renderer                       #
+#                                                       #
+#  - Advanced download management system                #
+#  - Atomic file operations                             #
+#  - Thread-safe resource locking                       #
+#  - TMDB API integration                               #
+#  - TVDB API integration                               #
+#  - OMDB API integration                               #
+#  - FANART API integration                             #
+#  - IMDB API integration                               #
+#  - ELCINEMA API integration                           #
+#  - GOOGLE API integration                             #
+#  - PROGRAMMETV integration                            #
+#  - MOLOTOV API integration                            #
+#  - Advanced caching system                            #
+#  - Fully configurable via AGP Setup Plugin            #
+#                                                       #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+__author__ = "Lululla"
+__copyright__ = "AGP Team"
+
+# Standard library
+from collections import deque
+from re import findall, sub
+from threading import Lock
+from time import time
+
+# Enigma2 imports
+from enigma import eEPGCache, eServiceCenter, eServiceReference
+from ServiceReference import ServiceReference
+from Components.config import config
+import NavigationInstance
+
+# Local imports
+from .Agp_Metadata import metadata_service
+from .Agp_Scheduler import PRIO_PREFETCH
+from .Agp_Utils import clean_for_tvdb, logger
+from .Agp_ZapModel import zap_model
+
+
+"""
+Speculative artwork prefetch around the channel being watched.
+
+When a renderer shows the current event of a service it also hands the
+event list to the prefetcher, which queues at PRIO_PREFETCH:
+	- the next K events of the same service (prefetch_depth)
+	- the now-event of the N services before/after it in the current
+	  bouquet (prefetch_channels)
+	- the now-event of the services the zap model expects the user to
+	  switch to next from the playing one (zap_predict)
+
+The titles are also handed to the metadata service, which fetches their
+event metadata in the background for the info renderers.
+
+Titles whose artwork is already on disk are skipped, and at most
+prefetch_budget jobs per minute are queued per media type so that
+prefetching never eats the download bandwidth of what is on screen.
+Prefetch jobs are speculative: the scheduler drops those still waiting
+when their renderer zaps again, before the new set is queued.
+"""
+
+BOUQUET_CACHE_TTL = 300  # seconds a bouquet service list is reused
+SKIP_FLAGS = eServiceReference.isMarker | eServiceReference.isDirectory
+
+
+def _config_int(name, default):
+	try:
+		return int(getattr(config.plugins.Aglare, name).value)
+	except Exception:
+		return default
+
+
+def _event_canal(service_name, event):
+	"""Build the canal list used by the download threads from an IBDCTESX tuple"""
+	title = sub(r"[\u0000-\u001F\u007F-\u009F]", "", event[4] or "")
+	return [service_name, event[1], title, event[5], event[6], title]
+
+
+def _event_year(canal):
+	"""Production year quoted in the event texts, as AgpInfoEvents reads it"""
+	years = [year for year in findall(r"\b\d{4}\b", f"{canal[5]}\n{canal[4]}\n{canal[3]}") if 1900 <= int(year) <= 2100]
+	return max(years) if years else None
+
+
+class ArtworkPrefetcher:
+	"""Queues next-event and neighbour-channel jobs on a scheduler"""
+
+	def __init__(self, scheduler):
+		self.scheduler = scheduler
+		self.lock = Lock()
+		self.sent = deque()  # times of the jobs queued in the last minute
+		self.bouquet = (None, 0, [])  # root, stamp, service refs
+		self.playing = None
+		self.counters = {"queued": 0, "present": 0, "over_budget": 0, "warm_checks": 0, "warm_hits": 0}
+
+	def _take_budget(self):
+		now = time()
+		with self.lock:
+			while self.sent and now - self.sent[0] > 60:
+				self.sent.popleft()
+			if len(self.sent) >= _config_int("prefetch_budget", 20):
+				self.counters["over_budget"] += 1
+				return False
+			self.sent.append(now)
+			return True
+
+	def _bouquet_services(self):
+		"""Service refs of the bouquet shown in the channel list"""
+		try:
+			from Screens.InfoBar import InfoBar
+			servicelist = InfoBar.instance.servicelist
+			root = servicelist.getRoot()
+		except Exception:
+			return []
+		if root is None:
+			return []
+		root_str = root.toString()
+		cached_root, stamp, services = self.bouquet
+		if cached_root == root_str and time() - stamp < BOUQUET_CACHE_TTL:
+			return services
+		services = []
+		service_list = eServiceCenter.getInstance().list(root)
+		for ref in (service_list.getContent("R", True) if service_list else []):
+			if not ref.flags & SKIP_FLAGS:
+				services.append(ref.toString())
+		self.bouquet = (root_str, time(), services)
+		return services
+
+	def _neighbours(self, service_str, width):
+		services = self._bouquet_services()
+		if service_str not in services:
+			return []
+		index = services.index(service_str)
+		around = []
+		for step in range(1, width + 1):
+			# Zapping up is as likely as down: alternate
+			for pos in (index + step, index - step):
+				if 0 <= pos < len(services) and services[pos] != service_str:
+					around.append(services[pos])
+		return around
+
+	@staticmethod
+	def _now_canal(epgcache, ref):
+		now_events = epgcache.lookupEvent(["IBDCTESX", (ref, 0, -1)]) or []
+		if now_events and now_events[0][4]:
+			return _event_canal(ServiceReference(ref).getServiceName(), now_events[0])
+		return None
+
+	def _track_zap(self, service_str, events, has_artwork):
+		"""Feed the zap model, return the playing service"""
+		try:
+			ref = NavigationInstance.instance.getCurrentlyPlayingServiceReference()
+			playing = ref.toString() if ref else None
+		except Exception:
+			return None
+		hit = zap_model.observe(playing)
+		if playing != self.playing:
+			self.playing = playing
+			if hit and playing == service_str and events and events[0][4]:
+				# Predicted zap: was its artwork warmed in time?
+				with self.lock:
+					self.counters["warm_checks"] += 1
+					self.counters["warm_hits"] += has_artwork(clean_for_tvdb(events[0][4]))
+		return playing
+
+	def prefetch(self, service_str, service_name, events, owner, has_artwork):
+		"""
+		Queue the likely next titles around service_str
+
+		Args:
+			service_str: reference string of the service on screen
+			service_name: its name
+			events: its IBDCTESX event list from now on
+			owner: id of the requesting renderer
+			has_artwork: callable(title) -> True when already on disk
+		"""
+		playing = self._track_zap(service_str, events, has_artwork)
+		depth = _config_int("prefetch_depth", 1)
+		width = _config_int("prefetch_channels", 1)
+		predict = _config_int("zap_predict", 2)
+
+		canals = [_event_canal(service_name, event) for event in events[1:1 + depth]]
+		refs = zap_model.predict(playing, predict) if playing else []
+		for ref in self._neighbours(service_str, width) if width > 0 else []:
+			if ref not in refs:
+				refs.append(ref)
+		if refs:
+			epgcache = eEPGCache.getInstance()
+			for ref in refs:
+				canal = self._now_canal(epgcache, ref)
+				if canal:
+					canals.append(canal)
+
+		titles = [(clean_for_tvdb(canal[5]), canal) for canal in canals]
+		metadata_service.warm([(title, _event_year(canal)) for title, canal in titles], owner)
+
+		for title, canal in titles:
+			if not title:
+				continue
+			if has_artwork(title):
+				with self.lock:
+					self.counters["present"] += 1
+				continue
+			if not self._take_budget():
+				logger.debug(f"Prefetch[{self.scheduler.name}] budget exhausted")
+				return
+			self.scheduler.put(canal, key=title, priority=PRIO_PREFETCH, owner=owner)
+			with self.lock:
+				self.counters["queued"] += 1
+
+	def stats(self):
+		with self.lock:
+			report = dict(self.counters, last_minute=len(self.sent))
+		checks = report["warm_checks"]
+		report["warm_rate"] = round(report["warm_hits"] / checks, 3) if checks else None
+		report["zap_model"] = zap_model.stats()
+		return report
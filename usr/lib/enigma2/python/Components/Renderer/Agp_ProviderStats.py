@@ -0,0 +1,265 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function
+"""
+#########################################################
+#                                                       #
+#  AGP - Advanced Graphics Renderer                     #
+#  Version: 3.5.0                                       #
+#  Created by Lululla (https://github.com/Belfagor2005) #
+#  License: CC BY-NC-SA 4.0                             #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0    #
+#                                                       #
+#  Last Modified: "18:14 - 20250512"                    #
+#                                                       #
+#  Credits:                                             #
+#  - Original concept by Lululla                        #
+#  - Poster renderer                                    #
+#  - Backdrop renderer                                  #
+#  - Poster EMC renderer                                #
+#  - InfoEvents renderer                                #
+#  - Star rating renderer                               #
+#  - Parental control renderer                          #
+#  - Genre detection and renderer                       #
+#                                                       #
+#  - Advanced download management system                #
+#  - Atomic file operations                             #
+#  - Thread-safe resource locking                       #
+#  - TMDB API integration                               #
+#  - TVDB API integration                               #
+#  - OMDB API integration                               #
+#  - FANART API integration                             #
+#  - IMDB API integration                               #
+#  - ELCINEMA API integration                           #
+#  - GOOGLE API integration                             #
+#  - PROGRAMMETV integration                            #
+#  - MOLOTOV API integration                            #
+#  - Advanced caching system                            #
+#  - Fully configurable via AGP Setup Plugin            #
+#                                                       #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+__author__ = "Lululla"
+__copyright__ = "AGP Team"
+
+# Standard library
+from json import load as json_load, dump as json_dump
+from os import replace
+from os.path import exists, join
+from re import compile as re_compile, IGNORECASE
+from threading import Lock
+from time import time
+
+# Local imports
+from .Agp_Utils import DATA_FOLDER, logger
+
+
+"""
+Provider statistics and adaptive try order.
+
+Each provider call made by the poster/backdrop threads is recorded per
+class, "<content>/<script>": the content ("movie", "tv" or "other") and
+the writing system of the channel language ("latin", "cyrillic", ...),
+both guessed from the EPG texts. A provider that is good for english
+films can be useless for arabic series, so the two are ranked apart.
+Each record is a hit, miss or transport error, plus its latency. The numbers are kept in
+DATA_FOLDER/provider_stats.json so the ranking survives restarts.
+
+order() sorts the enabled providers by expected hits per second of
+waiting, which puts fast and reliable providers first for the kind of
+content being searched. Slow scraping providers (google searches) are
+only tried while they have a useful hit rate; below it they get one
+probe every PROBE_EVERY calls so that they can recover.
+"""
+
+STATS_FILE = join(DATA_FOLDER, "provider_stats.json")
+SAVE_INTERVAL = 60  # seconds between two writes of the stats file
+LATENCY_SAMPLES = 50  # latencies kept per provider for the percentiles
+MIN_SAMPLES = 20  # calls before the measured hit rate is trusted
+DEFAULT_LATENCY = 2.0  # seconds, assumed until measured
+
+# slow scrapers, gated on their hit rate
+SCRAPERS = ("google", "programmetv", "molotov")
+SCRAPER_MIN_HIT_RATE = 0.10
+PROBE_EVERY = 25
+
+EMPTY_ENTRY = {"tries": 0, "hits": 0, "errors": 0, "lat": []}
+
+TV_PATTERN = re_compile(
+	r"\b(?:s\d{1,2}\s?e\d{1,3}|season|stagione|staffel|saison|temporada|"
+	r"episod\w*|[ée]pisode|folge|serie|series|s[ée]rie|сезон|серия|сериал)\b|\(\d+/\d+\)",
+	IGNORECASE
+)
+MOVIE_PATTERN = re_compile(
+	r"\b(?:film|movie|cinema|cin[ée]ma|pel[ií]cula|spielfilm|фильм|кино)\b",
+	IGNORECASE
+)
+
+
+def content_class(*texts):
+	"""Guess the content class of an event from its title/descriptions"""
+	text = " ".join(t for t in texts if t)[:400]
+	if not text:
+		return "other"
+	if TV_PATTERN.search(text):
+		return "tv"
+	if MOVIE_PATTERN.search(text):
+		return "movie"
+	return "other"
+
+
+SCRIPT_PATTERNS = (
+	("cyrillic", re_compile(r"[\u0400-\u04ff]")),
+	("greek", re_compile(r"[\u0370-\u03ff]")),
+	("arabic", re_compile(r"[\u0600-\u06ff\u0750-\u077f]")),
+	("hebrew", re_compile(r"[\u0590-\u05ff]")),
+	("cjk", re_compile(r"[\u3040-\u30ff\u3400-\u9fff\uac00-\ud7af]")),
+	("latin", re_compile(r"[A-Za-z\u00c0-\u024f]"))
+)
+
+
+def script_class(*texts):
+	"""Guess the writing system of the channel language from the EPG texts"""
+	text = " ".join(t for t in texts if t)[:400]
+	for name, pattern in SCRIPT_PATTERNS:
+		if pattern.search(text):
+			return name
+	return "other"
+
+
+def stats_class(*texts):
+	"""Class under which provider calls are recorded: content/script"""
+	return f"{content_class(*texts)}/{script_class(*texts)}"
+
+
+def _percentile(samples, fraction):
+	if not samples:
+		return None
+	ordered = sorted(samples)
+	return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class ProviderStats:
+	"""Persistent per-provider success/latency counters"""
+
+	def __init__(self, path=STATS_FILE):
+		self.path = path
+		self.lock = Lock()
+		self.entries = {}
+		self.dirty = False
+		self.last_save = 0
+		self._load()
+
+	@staticmethod
+	def _key(kind, provider):
+		return f"{kind}|{provider}"
+
+	def _load(self):
+		if not exists(self.path):
+			return
+		try:
+			with open(self.path, "r") as f:
+				entries = json_load(f)
+			# entries recorded before the script dimension are not comparable
+			self.entries = {key: entry for key, entry in entries.items() if "/" in key.split("|")[0]}
+		except Exception as e:
+			logger.warning(f"ProviderStats: cannot read {self.path}, starting empty: {str(e)}")
+			self.entries = {}
+
+	def _entry(self, kind, provider):
+		key = self._key(kind, provider)
+		entry = self.entries.get(key)
+		if entry is None:
+			entry = self.entries[key] = {"tries": 0, "hits": 0, "errors": 0, "skips": 0, "lat": []}
+		return entry
+
+	def record(self, provider, kind, outcome, elapsed):
+		"""
+		Record one provider call
+
+		Args:
+			outcome: "hit", "miss" or "error"
+			elapsed: call duration in seconds
+		"""
+		with self.lock:
+			entry = self._entry(kind, provider)
+			entry["tries"] += 1
+			if outcome == "hit":
+				entry["hits"] += 1
+			elif outcome == "error":
+				entry["errors"] += 1
+			lat = entry["lat"]
+			lat.append(round(elapsed, 3))
+			if len(lat) > LATENCY_SAMPLES:
+				del lat[:len(lat) - LATENCY_SAMPLES]
+			self.dirty = True
+		self.save()
+
+	def _score(self, entry):
+		# Laplace-smoothed hit rate, so that unknown providers are explored
+		hit_rate = (entry["hits"] + 1.0) / (entry["tries"] + 2.0)
+		error_rate = entry["errors"] / entry["tries"] if entry["tries"] else 0.0
+		latency = _percentile(entry["lat"], 0.5) or DEFAULT_LATENCY
+		return hit_rate * (1.0 - 0.5 * error_rate) / max(latency, 0.2)
+
+	def order(self, providers, kind):
+		"""Return providers (tuples starting with the name) best first"""
+		with self.lock:
+			scores = {}
+			for item in providers:
+				entry = self.entries.get(self._key(kind, item[0]), EMPTY_ENTRY)
+				scores[item[0]] = self._score(entry)
+		# sorted() is stable: equal scores keep the configured order
+		return sorted(providers, key=lambda item: -scores[item[0]])
+
+	def allowed(self, provider, kind):
+		"""Gate slow scrapers on their measured hit rate"""
+		if provider not in SCRAPERS:
+			return True
+		with self.lock:
+			entry = self._entry(kind, provider)
+			if entry["tries"] < MIN_SAMPLES or entry["hits"] >= entry["tries"] * SCRAPER_MIN_HIT_RATE:
+				return True
+			entry["skips"] += 1
+			if entry["skips"] % PROBE_EVERY == 0:
+				return True
+		return False
+
+	def save(self, force=False):
+		"""Atomically write the stats file, at most once every SAVE_INTERVAL"""
+		now = time()
+		with self.lock:
+			if not self.dirty or (not force and now - self.last_save < SAVE_INTERVAL):
+				return
+			data = {key: dict(entry, lat=list(entry["lat"])) for key, entry in self.entries.items()}
+			self.dirty = False
+			self.last_save = now
+		try:
+			tmp_path = self.path + ".tmp"
+			with open(tmp_path, "w") as f:
+				json_dump(data, f)
+			replace(tmp_path, self.path)
+		except Exception as e:
+			logger.error(f"ProviderStats: save failed: {str(e)}")
+
+	def stats(self):
+		"""Hit rate, error rate and p50/p95 latency per content class and provider"""
+		with self.lock:
+			report = {}
+			for key, entry in self.entries.items():
+				tries = entry["tries"]
+				report[key] = {
+					"tries": tries,
+					"hit_rate": round(entry["hits"] / tries, 3) if tries else None,
+					"error_rate": round(entry["errors"] / tries, 3) if tries else None,
+					"p50": _percentile(entry["lat"], 0.5),
+					"p95": _percentile(entry["lat"], 0.95)
+				}
+			return report
+
+
+provider_stats = ProviderStats()
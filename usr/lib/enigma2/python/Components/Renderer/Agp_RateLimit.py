@@ -0,0 +1,328 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function
+"""
+#########################################################
+#                                                       #
+#  AGP - Advanced Graphics Renderer                     #
+#  Version: 3.5.0                                       #
+#  Created by Lululla (https://github.com/Belfagor2005) #
+#  License: CC BY-NC-SA 4.0                             #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0    #
+#                                                       #
+#  Last Modified: "18:14 - 20250512"                    #
+#                                                       #
+#  Credits:                                             #
+#  - Original concept by Lululla                        #
+#  - Poster renderer                                    #
+#  - Backdrop renderer                                  #
+#  - Poster EMC renderer                                #
+#  - InfoEvents renderer                                #
+#  - Star rating renderer                               #
+#  - Parental control renderer                          #
+#  - Genre detection and renderer                       #
+#                                                       #
+#  - Advanced download management system                #
+#  - Atomic file operations                             #
+#  - Thread-safe resource locking                       #
+#  - TMDB API integration                               #
+#  - TVDB API integration                               #
+#  - OMDB API integration                               #
+#  - FANART API integration                             #
+#  - IMDB API integration                               #
+#  - ELCINEMA API integration                           #
+#  - GOOGLE API integration                             #
+#  - PROGRAMMETV integration                            #
+#  - MOLOTOV API integration                            #
+#  - Advanced caching system                            #
+#  - Fully configurable via AGP Setup Plugin            #
+#                                                       #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+__author__ = "Lululla"
+__copyright__ = "AGP Team"
+
+# Standard library
+from email.utils import parsedate_to_datetime
+from threading import Lock, local
+from time import monotonic, sleep, time
+from urllib.parse import urlparse
+
+# Third-party libraries
+from requests.exceptions import RequestException
+
+# Enigma2 imports
+from Components.config import config
+
+# Local imports
+from .Agp_Utils import logger
+
+
+"""
+Per-provider token-bucket rate limiter.
+
+Every request sent through the shared transport (Agp_Requests) is mapped
+to a provider bucket by host name and waits for a token first. A 429 (or
+a 503 carrying Retry-After) pauses the whole provider for the time asked
+by the server: while paused, callers fail fast with ProviderThrottled
+instead of spending their retries, and the download threads skip the
+provider without recording a miss.
+
+A request whose next token is more than MAX_WAIT away is refused with
+ProviderBusy: the provider is fine, only busy. The bucket is remembered
+for the calling thread, so a caller that wrapped the provider search in
+track() can tell with provider_skipped() that the title was never looked
+up and must not be recorded as a miss.
+
+Responses are never retried on 503 by the transport: the server's
+Retry-After reaches note_response() and pauses the provider here.
+
+Budgets are "rate/burst" in requests per second and can be overridden
+from the setup with config.plugins.Aglare.rate_limits, e.g.
+	tmdb=4/10 google=0.5/2
+"""
+
+# host suffix -> bucket
+HOST_BUCKETS = (
+	("api.themoviedb.org", "tmdb"),
+	("thetvdb.com", "thetvdb"),
+	("fanart.tv", "fanart"),
+	("tvmaze.com", "tvmaze"),
+	("omdbapi.com", "omdb"),
+	("imdb.com", "imdb"),
+	("google.com", "google"),
+	("elcinema.com", "elcinema"),
+	("molotov.tv", "molotov"),
+	("programme-tv.net", "programmetv")
+)
+
+# provider name (as used by build_providers) -> buckets it talks to
+PROVIDER_BUCKETS = {
+	"fanart": ("tvmaze", "fanart"),
+	"programmetv": ("google", "programmetv"),
+	"molotov": ("google", "molotov"),
+	"google": ("google",)
+}
+
+# bucket -> (requests per second, burst)
+DEFAULT_BUDGETS = {
+	"tmdb": (4.0, 10),
+	"thetvdb": (2.0, 5),
+	"fanart": (2.0, 5),
+	"tvmaze": (2.0, 5),
+	"omdb": (1.0, 3),
+	"imdb": (1.0, 2),
+	"google": (0.5, 2),
+	"elcinema": (1.0, 2),
+	"molotov": (1.0, 2),
+	"programmetv": (1.0, 2)
+}
+
+DEFAULT_RETRY_AFTER = 30  # seconds to pause on a 429 without Retry-After
+MAX_RETRY_AFTER = 3600
+MAX_WAIT = 5  # longest time a caller sleeps for a token or a pause
+
+
+class ProviderThrottled(RequestException):
+	"""Raised instead of sending a request to a throttled provider"""
+
+
+class ProviderBusy(ProviderThrottled):
+	"""Raised when the next token of a provider is more than MAX_WAIT away"""
+
+
+def bucket_for_url(url):
+	"""Return the bucket name for url, or None for unlimited hosts"""
+	try:
+		host = (urlparse(url).hostname or "").lower()
+	except Exception:
+		return None
+	for suffix, bucket in HOST_BUCKETS:
+		if host == suffix or host.endswith("." + suffix):
+			return bucket
+	return None
+
+
+def parse_retry_after(value):
+	"""Convert a Retry-After header (seconds or HTTP date) to seconds"""
+	if not value:
+		return DEFAULT_RETRY_AFTER
+	try:
+		seconds = float(value)
+	except ValueError:
+		try:
+			seconds = parsedate_to_datetime(value).timestamp() - time()
+		except Exception:
+			return DEFAULT_RETRY_AFTER
+	return max(1.0, min(seconds, MAX_RETRY_AFTER))
+
+
+class TokenBucket:
+	"""Classic token bucket refilled at rate tokens per second"""
+
+	__slots__ = ("rate", "burst", "tokens", "stamp", "paused_until")
+
+	def __init__(self, rate, burst):
+		self.rate = float(rate)
+		self.burst = float(burst)
+		self.tokens = float(burst)
+		self.stamp = monotonic()
+		self.paused_until = 0.0
+
+	def reserve(self, now):
+		"""Take one token, return the delay before it may be used"""
+		self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+		self.stamp = now
+		self.tokens -= 1
+		if self.tokens >= 0:
+			return 0.0
+		return -self.tokens / self.rate
+
+
+class RateLimiter:
+	"""Shared limiter keyed by provider bucket"""
+
+	def __init__(self):
+		self.lock = Lock()
+		self.buckets = {}
+		self.throttle_count = {}
+		self.local = local()  # buckets refused to this thread since track()
+
+	@staticmethod
+	def _budgets():
+		budgets = dict(DEFAULT_BUDGETS)
+		try:
+			text = config.plugins.Aglare.rate_limits.value or ""
+		except Exception:
+			text = ""
+		for item in text.replace(",", " ").split():
+			try:
+				name, value = item.split("=", 1)
+				rate, _, burst = value.partition("/")
+				rate = float(rate)
+				budgets[name.strip().lower()] = (rate, int(burst) if burst else max(1, int(rate * 2)))
+			except ValueError:
+				logger.warning(f"RateLimit: ignoring invalid budget '{item}'")
+		return budgets
+
+	def _bucket(self, name):
+		bucket = self.buckets.get(name)
+		if bucket is None:
+			rate, burst = self._budgets().get(name, (1.0, 2))
+			bucket = self.buckets[name] = TokenBucket(rate, burst)
+		return bucket
+
+	def acquire(self, name, max_wait=MAX_WAIT):
+		"""
+		Wait for a token of bucket name
+
+		Raises:
+			ProviderThrottled: the bucket is paused for longer than max_wait
+			ProviderBusy: the next token is more than max_wait away; the
+				caller must not send the request
+		"""
+		with self.lock:
+			bucket = self._bucket(name)
+			now = monotonic()
+			pause = bucket.paused_until - now
+			if pause > max_wait:
+				raise ProviderThrottled(f"{name} is throttled, request skipped")
+			delay = max(pause, 0.0) + bucket.reserve(now + max(pause, 0.0))
+			if delay > max_wait:
+				# Give the token back: the caller gives up
+				bucket.tokens += 1
+				busy = True
+			else:
+				busy = False
+		if busy:
+			refused = getattr(self.local, "busy", None)
+			if refused is not None:
+				refused.add(name)
+			raise ProviderBusy(f"{name} is busy, request skipped")
+		if delay > 0:
+			sleep(delay)
+
+	def throttle(self, name, seconds):
+		"""Pause bucket name for seconds (server asked us to slow down)"""
+		with self.lock:
+			bucket = self._bucket(name)
+			bucket.paused_until = max(bucket.paused_until, monotonic() + seconds)
+			bucket.tokens = min(bucket.tokens, 0.0)
+			self.throttle_count[name] = self.throttle_count.get(name, 0) + 1
+		logger.warning(f"RateLimit: {name} throttled, pausing for {seconds:.0f}s")
+
+	def note_response(self, name, response):
+		"""Inspect a response and pause the provider on 429/Retry-After"""
+		status = getattr(response, "status_code", 0)
+		retry_after = response.headers.get("Retry-After") if status in (429, 503) else None
+		if status == 429 or retry_after:
+			self.throttle(name, parse_retry_after(retry_after))
+
+	def is_throttled(self, name):
+		with self.lock:
+			bucket = self.buckets.get(name)
+			return bool(bucket and bucket.paused_until > monotonic())
+
+	def provider_throttled(self, provider_name):
+		"""True when any bucket used by a provider search is paused"""
+		return any(self.is_throttled(name) for name in PROVIDER_BUCKETS.get(provider_name, (provider_name,)))
+
+	def track(self):
+		"""Start recording the buckets refused to this thread for lack of tokens"""
+		self.local.busy = set()
+
+	def provider_skipped(self, provider_name):
+		"""
+		True when a provider search may not have been sent at all
+
+		The provider is paused, or one of its requests was refused to this
+		thread as busy since the last track(): not a miss.
+		"""
+		busy = getattr(self.local, "busy", None) or ()
+		return any(
+			name in busy or self.is_throttled(name)
+			for name in PROVIDER_BUCKETS.get(provider_name, (provider_name,))
+		)
+
+	def has_budget(self, provider_name):
+		"""
+		True when every bucket of a provider can serve a request right now
+
+		Used for optional (hedged) requests: they are only sent when they
+		do not have to wait, so they never delay the primary lookups.
+		"""
+		with self.lock:
+			now = monotonic()
+			for name in PROVIDER_BUCKETS.get(provider_name, (provider_name,)):
+				bucket = self.buckets.get(name)
+				if bucket is None:
+					continue
+				if bucket.paused_until > now:
+					return False
+				if min(bucket.burst, bucket.tokens + (now - bucket.stamp) * bucket.rate) < 1:
+					return False
+		return True
+
+	def reload(self):
+		"""Apply new budgets from the configuration"""
+		with self.lock:
+			self.buckets.clear()
+
+	def stats(self):
+		with self.lock:
+			now = monotonic()
+			return {
+				name: {
+					"tokens": round(bucket.tokens, 2),
+					"paused": round(max(bucket.paused_until - now, 0), 1),
+					"throttled": self.throttle_count.get(name, 0)
+				}
+				for name, bucket in self.buckets.items()
+			}
+
+
+rate_limiter = RateLimiter()
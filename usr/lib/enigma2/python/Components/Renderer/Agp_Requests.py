@@ -54,7 +54,7 @@ from threading import Lock
 from os import remove, makedirs  # rename
 from os.path import exists, getsize, splitext, dirname
 from collections import namedtuple
-from requests.adapters import HTTPAdapter
+from requests.adapters import HTTPAdapter, Retry
 from urllib.error import HTTPError, URLError
 from urllib.request import urlopen
 from requests import Session
@@ -62,8 +62,12 @@ from requests.exceptions import RequestException
 from PIL import Image
 import socket
 
+# Enigma2 imports
+from Components.config import config
+
 # Local imports
 from .Agp_Utils import logger
+from .Agp_RateLimit import bucket_for_url, rate_limiter
 
 # ========================
 # DISABLE URLLIB3 DEBUG LOGS
@@ -106,20 +110,36 @@ def intCheck():
 	return True
 
 
+def _config_int(name, default):
+	"""Read an integer Aglare setting, falling back to default"""
+	try:
+		return int(getattr(config.plugins.Aglare, name).value)
+	except Exception:
+		return default
+
+
 class RequestAgent:
 	"""Advanced request manager with atomic download operations"""
 
-	def __init__(self):
+	def __init__(self, browser_headers=True):
 		"""Initialize the download management system"""
 		self.agents = USER_AGENTS_2025
 		self.weights = [ua.weight for ua in self.agents]
 		self.session = None
+		self.browser_headers = browser_headers
 		self.timeout_connect = 3.05  # Connection timeout in seconds
 		self.timeout_read = 10       # Read timeout in seconds
-		self.max_retries = 2        # Maximum number of retries
-		self.pool_connections = 3   # Number of connection pools
-		self.pool_maxsize = 3       # Maximum size of connection pool
+		# No retry on 503: its Retry-After is handled by the rate limiter
+		self.max_retries = Retry(
+			total=3,
+			backoff_factor=1,
+			status_forcelist=[500, 502, 504],
+			respect_retry_after_header=False
+		)
+		self.pool_connections = _config_int("http_pool_hosts", 8)  # Number of per-host pools kept alive
+		self.pool_maxsize = _config_int("http_pool_size", 4)  # Connections kept alive per host
 
+		self.session_lock = Lock()
 		self.download_lock = Lock()
 		self.file_lock = Lock()
 		self.active_downloads = set()
@@ -154,21 +174,25 @@ class RequestAgent:
 		Returns:
 			requests.Session: Configured session object
 		"""
-		self.session = Session()
+		session = Session()
 		adapter = HTTPAdapter(
 			max_retries=self.max_retries,
 			pool_connections=self.pool_connections,
 			pool_maxsize=self.pool_maxsize
 		)
-		self.session.mount('http://', adapter)
-		self.session.mount('https://', adapter)
+		session.mount('http://', adapter)
+		session.mount('https://', adapter)
+
+		if not self.browser_headers:
+			self.session = session
+			return session
 
 		# Set advanced headers for the session
-		self.session.headers.update({
+		session.headers.update({
 			'User-Agent': self.get_random_ua(),
 			'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
 			'Accept-Language': 'en-US,en;q=0.9',
-			'Accept-Encoding': 'gzip, deflate, br',
+			'Accept-Encoding': 'gzip, deflate',
 			'Connection': 'keep-alive',
 			'DNT': '1',
 			'Upgrade-Insecure-Requests': '1',
@@ -177,8 +201,35 @@ class RequestAgent:
 			'Sec-Fetch-Site': 'none',
 			'Sec-Fetch-User': '?1'
 		})
+		self.session = session
+		return session
+
+	def get_session(self):
+		"""Return the shared session, creating it once in a thread-safe way"""
+		if self.session is None:
+			with self.session_lock:
+				if self.session is None:
+					self.create_session()
 		return self.session
 
+	def get(self, url, **kwargs):
+		"""
+		Drop-in replacement for requests.get over the pooled session
+
+		Connections (and their TLS state) are kept alive per host and
+		reused by every caller instead of opening a new socket per call.
+		Provider APIs are rate limited: the call waits for a token of the
+		provider bucket and raises ProviderThrottled while the provider
+		is paused after a 429 (ProviderBusy when no token comes in time).
+		"""
+		bucket = bucket_for_url(url)
+		if bucket:
+			rate_limiter.acquire(bucket)
+		response = self.get_session().get(url, **kwargs)
+		if bucket:
+			rate_limiter.note_response(bucket, response)
+		return response
+
 	def smart_request(self, url, method='GET', **kwargs):
 		"""
 		Make an intelligent HTTP request with built-in error handling
@@ -195,8 +246,7 @@ class RequestAgent:
 			requests.exceptions.RequestException: If request fails
 		"""
 		kwargs.setdefault('timeout', (self.timeout_connect, self.timeout_read))
-		if not self.session:
-			self.create_session()
+		self.get_session()
 
 		try:
 			response = self.session.request(method, url, **kwargs)
@@ -295,3 +345,6 @@ class RequestAgent:
 
 
 request_agent = RequestAgent()
+
+# Process-wide keep-alive transport shared by every provider download method
+http_transport = RequestAgent(browser_headers=False)
@@ -0,0 +1,272 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function
+"""
+#########################################################
+#                                                       #
+#  AGP - Advanced Graphics Renderer                     #
+#  Version: 3.5.0                                       #
+#  Created by Lululla (https://github.com/Belfagor2005) #
+#  License: CC BY-NC-SA 4.0                             #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0    #
+#                                                       #
+#  Last Modified: "18:14 - 20250512"                    #
+#                                                       #
+#  Credits:                                             #
+#  - Original concept by Lululla                        #
+#  - Poster renderer                                    #
+#  - Backdrop renderer                                  #
+#  - Poster EMC renderer                                #
+#  - InfoEvents renderer                                #
+#  - Star rating renderer                               #
+#  - Parental control renderer                          #
+#  - Genre detection and renderer                       #
+#                                                       #
+#  - Advanced download management system                #
+#  - Atomic file operations                             #
+#  - Thread-safe resource locking                       #
+#  - TMDB API integration                               #
+#  - TVDB API integration                               #
+#  - OMDB API integration                               #
+#  - FANART API integration                             #
+#  - IMDB API integration                               #
+#  - ELCINEMA API integration                           #
+#  - GOOGLE API integration                             #
+#  - PROGRAMMETV integration                            #
+#  - MOLOTOV API integration                            #
+#  - Advanced caching system                            #
+#  - Fully configurable via AGP Setup Plugin            #
+#                                                       #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+__author__ = "Lululla"
+__copyright__ = "AGP Team"
+
+# Standard library
+from json import load as json_load, dump as json_dump
+from os import replace
+from os.path import exists, join
+from threading import Lock
+from time import time
+from urllib.parse import quote_plus
+
+# Third-party libraries
+from requests.exceptions import RequestException
+
+# Enigma2 imports
+from Components.config import config
+
+# Local imports
+from .Agp_Inflight import InflightRegistry
+from .Agp_MissCache import miss_cache
+from .Agp_Requests import http_transport
+from .Agp_Utils import DATA_FOLDER, logger
+
+
+"""
+Shared title -> TMDB id resolution.
+
+Posters, backdrops, banners, info, stars and parental rating all start
+from the same cleaned event title (clean_for_tvdb). The first of them
+runs the TMDB multi search; the chosen result (type, id, title, year,
+poster and backdrop paths) is kept in DATA_FOLDER/title_ids.json, and
+every other consumer goes straight to the image or to the details call
+with the stored id. Concurrent resolutions of the same title share a
+single search, and titles without any movie/tv result are remembered
+in the miss cache ("ids" media type).
+
+The year and type (movie/tv) hints only rank the results of the first
+search: the consumers extract them differently, keying on them would
+split the mapping again.
+
+Use:
+	ref = title_resolver.resolve_tmdb(clean_title, year, api_key, "movie")
+	url = title_resolver.details_url(ref, api_key, "credits")
+"""
+
+RESOLVER_FILE = join(DATA_FOLDER, "title_ids.json")
+SAVE_INTERVAL = 30  # seconds between two writes of the mapping file
+RESOLVE_TTL = 30 * 86400  # re-run the search for a title after 30 days
+MAX_ENTRIES = 5000
+TMDB_API = "https://api.themoviedb.org/3"
+# Result fields kept for each title: enough to download artwork
+REF_FIELDS = ("media_type", "id", "title", "name", "release_date", "first_air_date", "poster_path", "backdrop_path")
+
+try:
+	lng = config.osd.language.value[:-3]
+except Exception:
+	lng = "en"
+
+
+def _ref_year(ref):
+	return (ref.get("release_date") or ref.get("first_air_date") or "")[:4]
+
+
+def select_best(results, title, year=None, media_type=None):
+	"""
+	Pick the movie/tv result matching title, None when there is none
+
+	Exact title matches come first, then results of the hinted year,
+	then of the hinted type ("movie" or "tv", anything else is no hint),
+	then the TMDB relevance order.
+	"""
+	wanted = title.lower()
+	best = None
+	best_rank = None
+	for index, result in enumerate(results):
+		if result.get("media_type") not in ("movie", "tv"):
+			continue
+		name = (result.get("title") or result.get("name") or "").lower()
+		rank = (
+			name != wanted,
+			not (year and _ref_year(result) == str(year)),
+			not (media_type and result["media_type"] == media_type),
+			index
+		)
+		if best_rank is None or rank < best_rank:
+			best, best_rank = result, rank
+	return best
+
+
+class TitleResolver:
+	"""Persistent cleaned title -> provider reference mapping"""
+
+	def __init__(self, path=RESOLVER_FILE):
+		self.path = path
+		self.lock = Lock()
+		self.entries = {}
+		self.dirty = False
+		self.last_save = 0
+		self.flight = InflightRegistry(wait_timeout=30)
+		self.hits = 0
+		self.searches = 0
+		self._load()
+
+	@staticmethod
+	def _key(title):
+		return f"{lng}|{' '.join(title.split()).lower()}"
+
+	def _load(self):
+		if not exists(self.path):
+			return
+		try:
+			with open(self.path, "r") as f:
+				self.entries = json_load(f)
+		except Exception as e:
+			logger.warning(f"Resolver: cannot read {self.path}, starting empty: {str(e)}")
+			self.entries = {}
+
+	def get(self, title, provider="tmdb"):
+		"""Return the stored reference of title for provider, or None"""
+		if not title:
+			return None
+		now = time()
+		with self.lock:
+			entry = self.entries.get(self._key(title))
+			if not entry or provider not in entry:
+				return None
+			if now - entry.get("resolved", 0) > RESOLVE_TTL:
+				return None
+			entry["seen"] = now
+			self.hits += 1
+			return entry[provider]
+
+	def remember(self, title, ref, provider="tmdb"):
+		"""Store the reference of title for provider"""
+		now = time()
+		with self.lock:
+			entry = self.entries.setdefault(self._key(title), {})
+			entry[provider] = ref
+			entry["resolved"] = entry["seen"] = now
+			if len(self.entries) > MAX_ENTRIES:
+				# Forget the titles not asked for the longest time
+				for key in sorted(self.entries, key=lambda k: self.entries[k].get("seen", 0))[:len(self.entries) - MAX_ENTRIES]:
+					del self.entries[key]
+			self.dirty = True
+		self.save()
+
+	def resolve_tmdb(self, title, year=None, api_key=None, media_type=None):
+		"""
+		Return the TMDB reference of a cleaned title, searching only once
+
+		Args:
+			year, media_type: hints ranking the results of the search
+
+		Returns:
+			dict: media_type, id, title/name, date and image paths of the
+			chosen result, or None when TMDB has no movie/tv match
+		"""
+		if not title or not api_key:
+			return None
+		ref = self.get(title)
+		if ref is not None:
+			return ref
+		if miss_cache.should_skip("ids", title, "tmdb"):
+			return None
+		ref, _ = self.flight.do(("tmdb", self._key(title)), self._search_tmdb, title, year, api_key, media_type)
+		return ref
+
+	def _search_tmdb(self, title, year, api_key, media_type):
+		# A caller that waited on the lock may find the search already done
+		ref = self.get(title)
+		if ref is not None:
+			return ref
+		url = f"{TMDB_API}/search/multi?api_key={api_key}&language={lng}&query={quote_plus(title)}"
+		with self.lock:
+			self.searches += 1
+		try:
+			response = http_transport.get(url, timeout=(10, 20))
+			if response.status_code == 404:
+				results = []
+			else:
+				response.raise_for_status()
+				results = response.json().get("results") or []
+		except (RequestException, ValueError) as e:
+			# Network trouble is not a miss: try again next time
+			logger.warning(f"Resolver: TMDB search failed for '{title}': {str(e)}")
+			return None
+
+		best = select_best(results, title, year, media_type)
+		if best is None:
+			miss_cache.record_miss("ids", title, "tmdb")
+			return None
+		ref = {field: best[field] for field in REF_FIELDS if best.get(field)}
+		self.remember(title, ref)
+		logger.debug(f"Resolver: '{title}' -> {ref['media_type']}/{ref['id']}")
+		return ref
+
+	@staticmethod
+	def details_url(ref, api_key, append=None):
+		"""TMDB details URL of a resolved reference"""
+		url = f"{TMDB_API}/{ref['media_type']}/{ref['id']}?api_key={api_key}&language={lng}"
+		if append:
+			url += f"&append_to_response={append}"
+		return url
+
+	def save(self, force=False):
+		"""Atomically write the mapping file, at most once every SAVE_INTERVAL"""
+		now = time()
+		with self.lock:
+			if not self.dirty or (not force and now - self.last_save < SAVE_INTERVAL):
+				return
+			data = {key: dict(entry) for key, entry in self.entries.items()}
+			self.dirty = False
+			self.last_save = now
+		try:
+			tmp_path = self.path + ".tmp"
+			with open(tmp_path, "w") as f:
+				json_dump(data, f)
+			replace(tmp_path, self.path)
+		except Exception as e:
+			logger.error(f"Resolver: save failed: {str(e)}")
+
+	def stats(self):
+		with self.lock:
+			return {"titles": len(self.entries), "hits": self.hits, "searches": self.searches}
+
+
+title_resolver = TitleResolver()
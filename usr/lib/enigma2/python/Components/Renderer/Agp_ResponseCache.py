@@ -0,0 +1,329 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function
+"""
+#########################################################
+#                                                       #
+#  AGP - Advanced Graphics Renderer                     #
+#  Version: 3.5.0                                       #
+#  Created by Lululla (https://github.com/Belfagor2005) #
+#  License: CC BY-NC-SA 4.0                             #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0    #
+#                                                       #
+#  Last Modified: "18:14 - 20250512"                    #
+#                                                       #
+#  Credits:                                             #
+#  - Original concept by Lululla                        #
+#  - Poster renderer                                    #
+#  - Backdrop renderer                                  #
+#  - Poster EMC renderer                                #
+#  - InfoEvents renderer                                #
+#  - Star rating renderer                               #
+#  - Parental control renderer                          #
+#  - Genre detection and renderer                       #
+#                                                       #
+#  - Advanced download management system                #
+#  - Atomic file operations                             #
+#  - Thread-safe resource locking                       #
+#  - TMDB API integration                               #
+#  - TVDB API integration                               #
+#  - OMDB API integration                               #
+#  - FANART API integration                             #
+#  - IMDB API integration                               #
+#  - ELCINEMA API integration                           #
+#  - GOOGLE API integration                             #
+#  - PROGRAMMETV integration                            #
+#  - MOLOTOV API integration                            #
+#  - Advanced caching system                            #
+#  - Fully configurable via AGP Setup Plugin            #
+#                                                       #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+__author__ = "Lululla"
+__copyright__ = "AGP Team"
+
+# Standard library
+from json import dumps as json_dumps, loads as json_loads
+from os.path import join
+from threading import Lock
+from time import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Enigma2 imports
+from Components.config import config
+
+# Local imports
+from .Agp_RateLimit import bucket_for_url
+from .Agp_Requests import http_transport
+from .Agp_Revalidate import split_key
+from .Agp_Utils import DATA_FOLDER, logger
+
+try:
+	import sqlite3
+except ImportError:
+	sqlite3 = None
+
+
+"""
+Process-wide disk cache of provider API responses (JSON and HTML).
+
+The download threads (PosterDB, BackdropDB, PosterAutoDB, EMC) and the
+metadata renderers ask the same searches and details over and over, for
+the same title, from different objects. fetch() is a drop-in for
+http_transport.get on provider APIs: a successful response is stored in
+DATA_FOLDER/responses.db under its normalized URL (API key removed,
+query sorted) and served from there until the TTL of its endpoint
+expires. Hits cost neither a request nor a rate limiter token.
+
+Only 200 responses of the endpoints listed in ENDPOINT_TTLS are stored,
+images never are. The cache is capped by config.plugins.Aglare
+.response_cache_size: expired responses go first, then the least
+recently used ones. config.plugins.Aglare.cache turns it on and off.
+"""
+
+CACHE_FILE = join(DATA_FOLDER, "responses.db")
+MAX_RESPONSE_SIZE = 1024 * 1024  # bigger bodies are not worth storing
+TRIM_RATIO = 0.9  # trim down to 90% of the cap
+TOUCH_BATCH = 50  # access times written together
+
+# (rate limiter bucket, path prefix, TTL in hours): first match wins
+ENDPOINT_TTLS = (
+	("tmdb", "/3/search/", 24),
+	("tmdb", "/3/", 7 * 24),
+	("thetvdb", "/api/GetSeries.php", 24),
+	("thetvdb", "/api/", 7 * 24),
+	("tvmaze", "/", 3 * 24),
+	("fanart", "/", 3 * 24),
+	("omdb", "/", 7 * 24),
+	("imdb", "/", 3 * 24),
+	("elcinema", "/", 3 * 24),
+	("google", "/", 12),
+	("molotov", "/", 24),
+	("programmetv", "/", 24)
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+	key TEXT PRIMARY KEY,
+	body BLOB NOT NULL,
+	encoding TEXT,
+	headers TEXT,
+	size INTEGER NOT NULL,
+	expires REAL NOT NULL,
+	accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed);
+"""
+
+# Response headers kept with the body (revalidation, content checks)
+KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+
+def normalize_url(url):
+	"""Cache key of url: API key removed, host lowercased, query sorted"""
+	url, _ = split_key(url)
+	parts = urlsplit(url)
+	query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+	return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, query, ""))
+
+
+def ttl_for(url):
+	"""Seconds a response of url may be served from the cache, 0 = never"""
+	bucket = bucket_for_url(url)
+	if bucket is None:
+		return 0
+	path = urlsplit(url).path
+	for name, prefix, hours in ENDPOINT_TTLS:
+		if name == bucket and path.startswith(prefix):
+			return hours * 3600
+	return 0
+
+
+class CachedResponse:
+	"""Stored response, read like a requests.Response"""
+
+	__slots__ = ("url", "content", "encoding", "headers")
+
+	status_code = 200
+	ok = True
+
+	def __init__(self, url, content, encoding, headers):
+		self.url = url
+		self.content = content
+		self.encoding = encoding
+		self.headers = headers
+
+	@property
+	def text(self):
+		return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+	def json(self):
+		return json_loads(self.text)
+
+	def raise_for_status(self):
+		pass
+
+
+class ResponseCache:
+	"""SQLite store of provider responses with per-endpoint TTLs"""
+
+	def __init__(self, path=CACHE_FILE):
+		self.path = path
+		self.lock = Lock()
+		self.db_lock = Lock()
+		self.conn = None
+		self.opened = False
+		self.total = 0
+		self.touched = {}  # key -> last access, written in batches
+		self.counters = {"hits": 0, "misses": 0, "stored": 0, "evicted": 0}
+
+	@staticmethod
+	def enabled():
+		try:
+			return bool(config.plugins.Aglare.cache.value)
+		except Exception:
+			return False
+
+	@staticmethod
+	def _cap_bytes():
+		try:
+			return int(config.plugins.Aglare.response_cache_size.value) * 1024 * 1024
+		except Exception:
+			return 20 * 1024 * 1024
+
+	def _connect(self):
+		"""Open the database on first use (worker threads only)"""
+		if self.opened:
+			return self.conn
+		with self.db_lock:
+			if not self.opened:
+				self.opened = True
+				if sqlite3 is None:
+					logger.warning("ResponseCache: sqlite3 not available, responses not cached")
+				else:
+					try:
+						conn = sqlite3.connect(self.path, check_same_thread=False)
+						conn.execute("PRAGMA journal_mode=WAL")
+						conn.executescript(SCHEMA)
+						conn.execute("DELETE FROM responses WHERE expires < ?", (time(),))
+						conn.commit()
+						self.total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+						self.conn = conn
+					except Exception as e:
+						logger.error(f"ResponseCache: cannot open {self.path}: {str(e)}")
+		return self.conn
+
+	def fetch(self, url, params=None, **kwargs):
+		"""
+		GET url through the shared transport, served from the cache when fresh
+
+		Accepts the arguments of http_transport.get; the body is always
+		read in full, stream is ignored.
+		"""
+		if params:
+			url = f"{url}{'&' if '?' in url else '?'}{urlencode(params)}"
+		kwargs.pop("stream", None)
+		ttl = ttl_for(url)
+		if not ttl or not self.enabled() or self._connect() is None:
+			return http_transport.get(url, **kwargs)
+
+		key = normalize_url(url)
+		cached = self.get(key, url)
+		if cached is not None:
+			return cached
+		response = http_transport.get(url, **kwargs)
+		if response.status_code == 200:
+			self.put(key, response, ttl)
+		return response
+
+	def fetch_json(self, url, **kwargs):
+		"""fetch() for JSON APIs: raise on HTTP errors, return the decoded body"""
+		response = self.fetch(url, **kwargs)
+		response.raise_for_status()
+		return response.json()
+
+	def get(self, key, url=None):
+		now = time()
+		with self.db_lock:
+			row = self.conn.execute(
+				"SELECT body, encoding, headers, expires FROM responses WHERE key = ?", (key,)
+			).fetchone()
+		with self.lock:
+			if row is None or row[3] < now:
+				self.counters["misses"] += 1
+				return None
+			self.counters["hits"] += 1
+			self.touched[key] = now
+			flush = len(self.touched) >= TOUCH_BATCH
+		if flush:
+			self._write([], [])
+		return CachedResponse(url or key, bytes(row[0]), row[1], json_loads(row[2] or "{}"))
+
+	def put(self, key, response, ttl):
+		body = response.content
+		if not body or len(body) > MAX_RESPONSE_SIZE:
+			return
+		headers = {name: response.headers[name] for name in KEPT_HEADERS if response.headers.get(name)}
+		now = time()
+		self._write([(key, body, response.encoding, json_dumps(headers), len(body), now + ttl, now)], [])
+		with self.lock:
+			self.counters["stored"] += 1
+		if self.total > self._cap_bytes():
+			self.trim()
+
+	def _write(self, rows, deletes):
+		"""Store rows, delete keys and write the pending access times"""
+		with self.lock:
+			touched, self.touched = self.touched, {}
+		try:
+			with self.db_lock, self.conn:
+				for key in deletes:
+					size = self.conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+					if size:
+						self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+						self.total -= size[0]
+				for row in rows:
+					old = self.conn.execute("SELECT size FROM responses WHERE key = ?", (row[0],)).fetchone()
+					self.conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)", row)
+					self.total += row[4] - (old[0] if old else 0)
+				if touched:
+					self.conn.executemany(
+						"UPDATE responses SET accessed = ? WHERE key = ?",
+						[(accessed, key) for key, accessed in touched.items()]
+					)
+		except Exception as e:
+			logger.error(f"ResponseCache: write failed: {str(e)}")
+
+	def trim(self):
+		"""Drop expired responses, then the least recently used, down to 90% of the cap"""
+		conn = self._connect()
+		if conn is None:
+			return
+		target = self._cap_bytes() * TRIM_RATIO
+		with self.db_lock:
+			rows = conn.execute(
+				"SELECT key, size FROM responses ORDER BY expires >= ?, accessed", (time(),)
+			).fetchall()
+		deletes = []
+		excess = self.total - target
+		for key, size in rows:
+			if excess <= 0:
+				break
+			deletes.append(key)
+			excess -= size
+		if deletes:
+			self._write([], deletes)
+			with self.lock:
+				self.counters["evicted"] += len(deletes)
+			logger.debug(f"ResponseCache: {len(deletes)} responses evicted, {self.total // 1024} KB kept")
+
+	def stats(self):
+		with self.lock:
+			return dict(self.counters, size=self.total)
+
+
+response_cache = ResponseCache()
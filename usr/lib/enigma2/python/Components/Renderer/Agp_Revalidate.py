@@ -0,0 +1,330 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function
+"""
+#########################################################
+#                                                       #
+#  AGP - Advanced Graphics Renderer                     #
+#  Version: 3.5.0                                       #
+#  Created by Lululla (https://github.com/Belfagor2005) #
+#  License: CC BY-NC-SA 4.0                             #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0    #
+#                                                       #
+#  Last Modified: "18:14 - 20250512"                    #
+#                                                       #
+#  Credits:                                             #
+#  - Original concept by Lululla                        #
+#  - Poster renderer                                    #
+#  - Backdrop renderer                                  #
+#  - Poster EMC renderer                                #
+#  - InfoEvents renderer                                #
+#  - Star rating renderer                               #
+#  - Parental control renderer                          #
+#  - Genre detection and renderer                       #
+#                                                       #
+#  - Advanced download management system                #
+#  - Atomic file operations                             #
+#  - Thread-safe resource locking                       #
+#  - TMDB API integration                               #
+#  - TVDB API integration                               #
+#  - OMDB API integration                               #
+#  - FANART API integration                             #
+#  - IMDB API integration                               #
+#  - ELCINEMA API integration                           #
+#  - GOOGLE API integration                             #
+#  - PROGRAMMETV integration                            #
+#  - MOLOTOV API integration                            #
+#  - Advanced caching system                            #
+#  - Fully configurable via AGP Setup Plugin            #
+#                                                       #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+__author__ = "Lululla"
+__copyright__ = "AGP Team"
+
+# Standard library
+from json import loads as json_loads
+from os import remove, replace
+from os.path import exists, getsize, join
+from threading import Lock
+from time import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Local imports
+from .Agp_DownloadGuard import ACCEPT, download_guard
+from .Agp_RateLimit import ProviderThrottled, bucket_for_url
+from .Agp_Requests import http_transport
+from .Agp_Utils import DATA_FOLDER, logger
+
+try:
+	import sqlite3
+except ImportError:
+	sqlite3 = None
+
+
+"""
+Conditional revalidation of downloaded artwork and metadata.
+
+Whoever saves a downloaded image or JSON document records its URL and
+the ETag / Last-Modified validators sent by the server. refresh() later
+asks the server again with If-None-Match / If-Modified-Since: a 304
+costs a few hundred bytes, and only bodies that changed are downloaded
+(images through the download guard, JSON checked before it replaces
+the file).
+
+Validators live in DATA_FOLDER/validators.db. API keys are never
+stored: the key parameter is removed from the URL and added back from
+the current key of the provider when refreshing. Documents served
+without validators are not recorded, a refresh would cost a full
+download.
+"""
+
+VALIDATORS_FILE = join(DATA_FOLDER, "validators.db")
+KEY_PARAMS = ("api_key", "apikey")
+FLUSH_INTERVAL = 60
+FLUSH_BATCH = 100
+REFRESH_BATCH = 200  # documents revalidated per refresh run
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS validators (
+	path TEXT PRIMARY KEY,
+	url TEXT NOT NULL,
+	key_param TEXT,
+	etag TEXT,
+	modified TEXT,
+	checked REAL
+);
+CREATE INDEX IF NOT EXISTS validators_checked ON validators (checked);
+"""
+
+
+def split_key(url):
+	"""Remove the API key from url, return (url, name of the key parameter)"""
+	parts = urlsplit(url)
+	query = parse_qsl(parts.query, keep_blank_values=True)
+	kept = [(name, value) for name, value in query if name.lower() not in KEY_PARAMS]
+	if len(kept) == len(query):
+		return url, None
+	param = next(name for name, _ in query if name.lower() in KEY_PARAMS)
+	return urlunsplit(parts._replace(query=urlencode(kept))), param
+
+
+def with_key(url, param, key):
+	"""Add the API key parameter back to url"""
+	parts = urlsplit(url)
+	query = parse_qsl(parts.query, keep_blank_values=True) + [(param, key)]
+	return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+class Revalidator:
+	"""Stores HTTP validators and refreshes files with conditional GETs"""
+
+	def __init__(self, path=VALIDATORS_FILE):
+		self.path = path
+		self.lock = Lock()
+		self.db_lock = Lock()
+		self.conn = None
+		self.opened = False
+		self.pending = {}  # path -> row, or None for a delete
+		self.last_flush = time()
+		self.counters = {
+			"recorded": 0, "checked": 0, "not_modified": 0,
+			"updated": 0, "failed": 0, "bytes_saved": 0
+		}
+
+	def _connect(self):
+		"""Open the database on first use (worker threads only)"""
+		if self.opened:
+			return self.conn
+		with self.db_lock:
+			if not self.opened:
+				self.opened = True
+				if sqlite3 is None:
+					logger.warning("Revalidate: sqlite3 not available, validators not stored")
+				else:
+					try:
+						conn = sqlite3.connect(self.path, check_same_thread=False)
+						conn.execute("PRAGMA journal_mode=WAL")
+						conn.executescript(SCHEMA)
+						self.conn = conn
+					except Exception as e:
+						logger.error(f"Revalidate: cannot open {self.path}: {str(e)}")
+		return self.conn
+
+	def record(self, path, url, headers, checked=None):
+		"""Remember the validators of a file just saved from url"""
+		etag = headers.get("ETag")
+		modified = headers.get("Last-Modified")
+		if not (etag or modified):
+			return
+		clean_url, param = split_key(url)
+		with self.lock:
+			self.pending[path] = (path, clean_url, param, etag, modified, checked or time())
+			self.counters["recorded"] += 1
+		self.flush()
+
+	def _row(self, path):
+		with self.lock:
+			if path in self.pending:
+				return self.pending[path]
+		conn = self._connect()
+		if conn is None:
+			return None
+		with self.db_lock:
+			return conn.execute(
+				"SELECT path, url, key_param, etag, modified, checked FROM validators WHERE path = ?", (path,)
+			).fetchone()
+
+	def moved(self, src, dst):
+		"""A recorded file was renamed (hedged downloads)"""
+		row = self._row(src)
+		if row is None:
+			return
+		with self.lock:
+			self.pending[src] = None
+			self.pending[dst] = (dst,) + tuple(row[1:])
+		self.flush()
+
+	def forget(self, path):
+		with self.lock:
+			self.pending[path] = None
+
+	def flush(self, force=False):
+		"""Write the queued changes in one transaction"""
+		with self.lock:
+			if not force and len(self.pending) < FLUSH_BATCH and time() - self.last_flush < FLUSH_INTERVAL:
+				return
+			pending, self.pending = self.pending, {}
+			self.last_flush = time()
+		conn = self._connect()
+		if conn is None or not pending:
+			return
+		rows = [row for row in pending.values() if row is not None]
+		deletes = [(path,) for path, row in pending.items() if row is None]
+		try:
+			with self.db_lock, conn:
+				if deletes:
+					conn.executemany("DELETE FROM validators WHERE path = ?", deletes)
+				if rows:
+					conn.executemany("INSERT OR REPLACE INTO validators VALUES (?, ?, ?, ?, ?, ?)", rows)
+		except Exception as e:
+			logger.error(f"Revalidate: flush failed: {str(e)}")
+
+	def _due(self, folder, max_age, limit):
+		self.flush(force=True)
+		conn = self._connect()
+		if conn is None:
+			return []
+		with self.db_lock:
+			return conn.execute(
+				"SELECT path, url, key_param, etag, modified FROM validators "
+				"WHERE path LIKE ? AND checked < ? ORDER BY checked LIMIT ?",
+				(folder.rstrip("/") + "/%", time() - max_age, limit)
+			).fetchall()
+
+	def refresh(self, folder, max_age_days, key_for=None, on_updated=None, limit=REFRESH_BATCH):
+		"""
+		Revalidate the files under folder not checked for max_age_days
+
+		Args:
+			key_for: callable(provider) -> API key, for URLs that need one
+			on_updated: callable(path) run after a file was replaced
+
+		Returns:
+			int: number of files replaced by a newer version
+		"""
+		updated = 0
+		for path, url, param, etag, modified in self._due(folder, max_age_days * 86400, limit):
+			if not exists(path):
+				self.forget(path)
+				continue
+			request_url = url
+			if param:
+				key = key_for(bucket_for_url(url)) if key_for else None
+				if not key:
+					continue
+				request_url = with_key(url, param, key)
+			try:
+				if self._revalidate(path, url, request_url, etag, modified):
+					updated += 1
+					if on_updated:
+						on_updated(path)
+			except ProviderThrottled:
+				logger.debug("Revalidate: provider throttled, refresh stopped")
+				break
+			except Exception as e:
+				with self.lock:
+					self.counters["failed"] += 1
+				logger.debug(f"Revalidate: {path} failed: {str(e)}")
+				# Try again at the next refresh, not in the next run
+				self._checked(path, url, etag, modified)
+		self.flush(force=True)
+		if updated:
+			logger.info(f"Revalidate: {updated} files updated in {folder}")
+		return updated
+
+	def _checked(self, path, url, etag, modified):
+		row = self._row(path)
+		param = row[2] if row else None
+		with self.lock:
+			self.pending[path] = (path, url, param, etag, modified, time())
+
+	def _revalidate(self, path, url, request_url, etag, modified):
+		"""One conditional GET; True when the file was replaced"""
+		headers = {"Accept": "application/json" if path.endswith(".json") else ACCEPT}
+		if etag:
+			headers["If-None-Match"] = etag
+		if modified:
+			headers["If-Modified-Since"] = modified
+
+		with http_transport.get(request_url, headers=headers, stream=True, timeout=(5, 15)) as response:
+			with self.lock:
+				self.counters["checked"] += 1
+			if response.status_code == 304:
+				with self.lock:
+					self.counters["not_modified"] += 1
+					self.counters["bytes_saved"] += getsize(path)
+				self._checked(
+					path, url,
+					response.headers.get("ETag") or etag,
+					response.headers.get("Last-Modified") or modified
+				)
+				return False
+			if response.status_code in (404, 410):
+				# Gone upstream: keep the file, stop asking
+				self.forget(path)
+				return False
+			response.raise_for_status()
+
+			temp_path = path + ".tmp"
+			if path.endswith(".json"):
+				body = response.content
+				json_loads(body)  # never replace a document with garbage
+				with open(temp_path, "wb") as f:
+					f.write(body)
+			else:
+				download_guard.stream_image(response, temp_path)
+			try:
+				replace(temp_path, path)
+			except OSError:
+				remove(temp_path)
+				raise
+			if response.headers.get("ETag") or response.headers.get("Last-Modified"):
+				self.record(path, request_url, response.headers)
+			else:
+				self.forget(path)
+
+		with self.lock:
+			self.counters["updated"] += 1
+		return True
+
+	def stats(self):
+		with self.lock:
+			return dict(self.counters, pending=len(self.pending))
+
+
+revalidator = Revalidator()
@@ -0,0 +1,230 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function
+"""
+#########################################################
+#                                                       #
+#  AGP - Advanced Graphics Renderer                     #
+#  Version: 3.5.0                                       #
+#  Created by Lululla (https://github.com/Belfagor2005) #
+#  License: CC BY-NC-SA 4.0                             #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0    #
+#                                                       #
+#  Last Modified: "18:14 - 20250512"                    #
+#                                                       #
+#  Credits:                                             #
+#  - Original concept by Lululla                        #
+#  - Poster renderer                                    #
+#  - Backdrop renderer                                  #
+#  - Poster EMC renderer                                #
+#  - InfoEvents renderer                                #
+#  - Star rating renderer                               #
+#  - Parental control renderer                          #
+#  - Genre detection and renderer                       #
+#                                                       #
+#  - Advanced download management system                #
+#  - Atomic file operations                             #
+#  - Thread-safe resource locking                       #
+#  - TMDB API integration                               #
+#  - TVDB API integration                               #
+#  - OMDB API integration                               #
+#  - FANART API integration                             #
+#  - IMDB API integration                               #
+#  - ELCINEMA API integration                           #
+#  - GOOGLE API integration                             #
+#  - PROGRAMMETV integration                            #
+#  - MOLOTOV API integration                            #
+#  - Advanced caching system                            #
+#  - Fully configurable via AGP Setup Plugin            #
+#                                                       #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+__author__ = "Lululla"
+__copyright__ = "AGP Team"
+
+# Standard library
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager
+from threading import BoundedSemaphore, Event, Lock
+from time import time
+
+# Enigma2 imports
+from Components.config import config
+
+# Local imports
+from .Agp_Utils import logger
+
+
+"""
+Parallel scan engine used by PosterAutoDB and BackdropAutoDB.
+
+The scan collects every EPG event first, removes duplicate titles across
+channels, then dispatches one job per title to a bounded worker pool.
+Each provider also gets its own concurrency limit (provider_slot), so a
+scan can use several workers without hammering a single API with all of
+them at once. Progress is logged periodically and kept in self.progress.
+"""
+
+# Maximum concurrent requests per provider during a scan
+PROVIDER_CONCURRENCY = {
+	"tmdb": 4,
+	"fanart": 2,
+	"thetvdb": 2,
+	"omdb": 1,
+	"imdb": 1,
+	"elcinema": 1,
+	"google": 1,
+	"programmetv": 1,
+	"molotov": 1
+}
+DEFAULT_CONCURRENCY = 1
+PROGRESS_INTERVAL = 30  # seconds between two progress log lines
+# handler result -> progress counter, anything else counts as failed
+OUTCOME_COUNTERS = {
+	True: "downloaded",
+	"downloaded": "downloaded",
+	"exists": "present",
+	"skipped": "skipped"
+}
+
+
+def scan_workers():
+	"""Number of parallel workers configured for scans"""
+	try:
+		return max(1, int(config.plugins.Aglare.scan_workers.value))
+	except Exception:
+		return 4
+
+
+def scan_interval_hours():
+	"""Hours between two automatic scans, 24 keeps the daily scheduled time"""
+	try:
+		return max(1, int(config.plugins.Aglare.scan_interval.value))
+	except Exception:
+		return 24
+
+
+class ScanEngine:
+	"""Bounded worker pool with per-provider limits and progress reporting"""
+
+	def __init__(self, name):
+		self.name = name
+		self.lock = Lock()
+		self.stop_event = Event()
+		self.provider_limits = {
+			provider: BoundedSemaphore(limit)
+			for provider, limit in PROVIDER_CONCURRENCY.items()
+		}
+		self.progress = self._empty_progress()
+
+	@staticmethod
+	def _empty_progress():
+		return {
+			"running": False,
+			"total": 0,
+			"done": 0,
+			"downloaded": 0,
+			"present": 0,
+			"skipped": 0,
+			"failed": 0,
+			"duplicates": 0,
+			"started": 0,
+			"elapsed": 0
+		}
+
+	@contextmanager
+	def provider_slot(self, provider_name):
+		"""Limit the number of concurrent calls to one provider"""
+		with self.lock:
+			slot = self.provider_limits.get(provider_name)
+			if slot is None:
+				slot = self.provider_limits[provider_name] = BoundedSemaphore(DEFAULT_CONCURRENCY)
+		with slot:
+			yield
+
+	def stop(self):
+		self.stop_event.set()
+
+	def run(self, jobs, handler, duplicates=0):
+		"""
+		Dispatch jobs to the worker pool and wait for completion
+
+		Args:
+			jobs: list of (title, payload), titles already deduplicated
+			handler: callable(payload) -> "downloaded" (or True) when artwork was
+				saved, "exists" when already on disk, "skipped" when not
+				searched, anything else when no provider found it
+			duplicates: number of duplicate titles removed by the caller
+
+		Returns:
+			dict: final progress snapshot
+		"""
+		self.stop_event.clear()
+		workers = scan_workers()
+		with self.lock:
+			self.progress = self._empty_progress()
+			self.progress.update(running=True, total=len(jobs), duplicates=duplicates, started=time())
+
+		logger.info(f"ScanEngine[{self.name}] {len(jobs)} titles ({duplicates} duplicates skipped), {workers} workers")
+		last_report = time()
+		jobs = iter(jobs)
+		pending = set()
+
+		with ThreadPoolExecutor(max_workers=workers) as executor:
+			while True:
+				# Keep at most 2 jobs per worker in flight, so stop() takes effect quickly
+				while len(pending) < workers * 2 and not self.stop_event.is_set():
+					try:
+						title, payload = next(jobs)
+					except StopIteration:
+						break
+					pending.add(executor.submit(self._run_job, handler, title, payload))
+
+				if not pending:
+					break
+
+				_, pending = wait(pending, timeout=PROGRESS_INTERVAL, return_when=FIRST_COMPLETED)
+				if time() - last_report >= PROGRESS_INTERVAL:
+					last_report = time()
+					self._report()
+
+		with self.lock:
+			self.progress["running"] = False
+			self.progress["elapsed"] = round(time() - self.progress["started"], 1)
+			result = dict(self.progress)
+		self._report(final=True)
+		return result
+
+	def _run_job(self, handler, title, payload):
+		if self.stop_event.is_set():
+			return None
+		counter = "failed"
+		try:
+			result = handler(payload)
+			if isinstance(result, (bool, str)):
+				counter = OUTCOME_COUNTERS.get(result, "failed")
+		except Exception as e:
+			logger.error(f"ScanEngine[{self.name}] job {title} failed: {str(e)}")
+		with self.lock:
+			self.progress["done"] += 1
+			self.progress[counter] += 1
+		return counter
+
+	def _report(self, final=False):
+		with self.lock:
+			p = dict(self.progress)
+		elapsed = max(time() - p["started"], 0.001)
+		rate = p["done"] / elapsed
+		percent = (100.0 * p["done"] / p["total"]) if p["total"] else 100.0
+		eta = (p["total"] - p["done"]) / rate if rate else 0
+		logger.info(
+			f"ScanEngine[{self.name}] {'completed' if final else 'progress'}: "
+			f"{p['done']}/{p['total']} ({percent:.0f}%), {p['downloaded']} downloaded, "
+			f"{p['present']} already present, {p['skipped']} skipped, "
+			f"{p['failed']} not found, {rate:.2f} titles/s, "
+			f"{'elapsed %.0fs' % elapsed if final else 'ETA %.0fs' % eta}"
+		)
@@ -0,0 +1,171 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function
+"""
+#########################################################
+#                                                       #
+#  AGP - Advanced Graphics Renderer                     #
+#  Version: 3.5.0                                       #
+#  Created by Lululla (https://github.com/Belfagor2005) #
+#  License: CC BY-NC-SA 4.0                             #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0    #
+#                                                       #
+#  Last Modified: "18:14 - 20250512"                    #
+#                                                       #
+#  Credits:                                             #
+#  - Original concept by Lululla                        #
+#  - Poster renderer                                    #
+#  - Backdrop renderer                                  #
+#  - Poster EMC renderer                                #
+#  - InfoEvents renderer                                #
+#  - Star rating renderer                               #
+#  - Parental control renderer                          #
+#  - Genre detection and renderer                       #
+#                                                       #
+#  - Advanced download management system                #
+#  - Atomic file operations                             #
+#  - Thread-safe resource locking                       #
+#  - TMDB API integration                               #
+#  - TVDB API integration                               #
+#  - OMDB API integration                               #
+#  - FANART API integration                             #
+#  - IMDB API integration                               #
+#  - ELCINEMA API integration                           #
+#  - GOOGLE API integration                             #
+#  - PROGRAMMETV integration                            #
+#  - MOLOTOV API integration                            #
+#  - Advanced caching system                            #
+#  - Fully configurable via AGP Setup Plugin            #
+#                                                       #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+__author__ = "Lululla"
+__copyright__ = "AGP Team"
+
+# Standard library
+from json import load as json_load, dump as json_dump
+from os import replace
+from os.path import exists, join
+from threading import Lock
+from time import time
+
+# Local imports
+from .Agp_Utils import DATA_FOLDER, logger
+
+
+"""
+Persistent state of the automatic scans, used to make them incremental.
+
+For each bouquet file the parsed service list is stored with the file
+mtime, so unchanged bouquets are not parsed again. For each EPG event
+handled by a scan the state records service, event id, begin time, title
+and outcome; the next run only dispatches events that are new or whose
+begin time/title changed. Events that ended more than a day ago are
+pruned at the end of every run.
+
+Outcomes:
+	downloaded  artwork saved by this scan
+	exists      artwork was already on disk
+	missing     every provider was tried without result
+	skipped     not attempted (storage, download limit...), retried next run
+"""
+
+DONE_OUTCOMES = ("downloaded", "exists", "missing")
+EVENT_RETENTION = 86400  # seconds kept after the event begin
+
+
+class ScanState:
+	"""JSON-backed record of bouquets and events already processed"""
+
+	def __init__(self, name):
+		self.path = join(DATA_FOLDER, f"scan_state_{name}.json")
+		self.lock = Lock()
+		self.bouquets = {}
+		self.events = {}
+		self._load()
+
+	def _load(self):
+		if not exists(self.path):
+			return
+		try:
+			with open(self.path, "r") as f:
+				data = json_load(f)
+			self.bouquets = data.get("bouquets", {})
+			self.events = data.get("events", {})
+		except Exception as e:
+			logger.warning(f"ScanState: cannot read {self.path}, starting a full scan: {str(e)}")
+			self.bouquets = {}
+			self.events = {}
+
+	@staticmethod
+	def _event_key(service_ref, event_id):
+		return f"{service_ref}|{event_id}"
+
+	def bouquet_services(self, bouquet, mtime):
+		"""Return the cached service list of bouquet, or None if it changed"""
+		with self.lock:
+			entry = self.bouquets.get(bouquet)
+			if entry and entry.get("mtime") == mtime:
+				return entry.get("services", [])
+		return None
+
+	def store_bouquet(self, bouquet, mtime, services):
+		with self.lock:
+			self.bouquets[bouquet] = {"mtime": mtime, "services": list(services)}
+
+	def is_done(self, service_ref, event_id, begin, title):
+		"""True when this exact event was already handled by a previous scan"""
+		with self.lock:
+			entry = self.events.get(self._event_key(service_ref, event_id))
+		return bool(
+			entry and
+			entry.get("begin") == begin and
+			entry.get("title") == title and
+			entry.get("outcome") in DONE_OUTCOMES
+		)
+
+	def record(self, service_ref, event_id, begin, title, outcome):
+		with self.lock:
+			self.events[self._event_key(service_ref, event_id)] = {
+				"begin": begin,
+				"title": title,
+				"outcome": outcome,
+				"ts": int(time())
+			}
+
+	def prune(self, now=None):
+		"""Drop events that began more than EVENT_RETENTION seconds ago"""
+		limit = (now or time()) - EVENT_RETENTION
+		with self.lock:
+			old = [key for key, entry in self.events.items() if (entry.get("begin") or 0) < limit]
+			for key in old:
+				del self.events[key]
+		return len(old)
+
+	def forget_bouquets(self, keep):
+		with self.lock:
+			for bouquet in [b for b in self.bouquets if b not in keep]:
+				del self.bouquets[bouquet]
+
+	def save(self):
+		"""Atomically write the state file"""
+		with self.lock:
+			data = {"bouquets": dict(self.bouquets), "events": dict(self.events)}
+		try:
+			tmp_path = self.path + ".tmp"
+			with open(tmp_path, "w") as f:
+				json_dump(data, f)
+			replace(tmp_path, self.path)
+		except Exception as e:
+			logger.error(f"ScanState: save failed: {str(e)}")
+
+	def reset(self):
+		"""Forget everything: the next run will be a full scan"""
+		with self.lock:
+			self.bouquets = {}
+			self.events = {}
+		self.save()
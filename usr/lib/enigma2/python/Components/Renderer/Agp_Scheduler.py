@@ -0,0 +1,251 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function
+"""
+#########################################################
+#                                                       #
+#  AGP - Advanced Graphics Renderer                     #
+#  Version: 3.5.0                                       #
+#  Created by Lululla (https://github.com/Belfagor2005) #
+#  License: CC BY-NC-SA 4.0                             #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0    #
+#                                                       #
+#  Last Modified: "18:14 - 20250512"                    #
+#                                                       #
+#  Credits:                                             #
+#  - Original concept by Lululla                        #
+#  - Poster renderer                                    #
+#  - Backdrop renderer                                  #
+#  - Poster EMC renderer                                #
+#  - InfoEvents renderer                                #
+#  - Star rating renderer                               #
+#  - Parental control renderer                          #
+#  - Genre detection and renderer                       #
+#                                                       #
+#  - Advanced download management system                #
+#  - Atomic file operations                             #
+#  - Thread-safe resource locking                       #
+#  - TMDB API integration                               #
+#  - TVDB API integration                               #
+#  - OMDB API integration                               #
+#  - FANART API integration                             #
+#  - IMDB API integration                               #
+#  - ELCINEMA API integration                           #
+#  - GOOGLE API integration                             #
+#  - PROGRAMMETV integration                            #
+#  - MOLOTOV API integration                            #
+#  - Advanced caching system                            #
+#  - Fully configurable via AGP Setup Plugin            #
+#                                                       #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+__author__ = "Lululla"
+__copyright__ = "AGP Team"
+
+# Standard library
+from heapq import heappush, heappop
+from itertools import count
+from threading import Condition
+from time import time
+
+# Local imports
+from .Agp_Utils import logger
+
+
+"""
+Priority scheduler for artwork jobs.
+
+Replaces the LifoQueue shared by the renderers and the download thread.
+Jobs are ordered by class first and, inside a class, newest first:
+
+	PRIO_VISIBLE     event on screen now
+	PRIO_NEXT        next event shown by a nexts="n" widget
+	PRIO_PREFETCH    speculative work (neighbour channels, following events)
+	PRIO_BACKGROUND  scheduled scans
+
+One entry is kept per title: queueing a title again promotes it when the
+new class is higher. When a renderer (owner) queues a new title, its
+other pending jobs are considered stale: visible/next jobs are demoted
+to prefetch the first time and cancelled if the user zaps away again, so
+fast zapping never leaves the workers busy with channels already left.
+Prefetch jobs queued with an owner are speculative from the start and are
+cancelled on the owner's next zap unless queued again.
+Only jobs still waiting can be changed; running jobs are not touched.
+"""
+
+PRIO_VISIBLE = 0
+PRIO_NEXT = 1
+PRIO_PREFETCH = 2
+PRIO_BACKGROUND = 3
+
+PRIORITY_NAMES = {
+	PRIO_VISIBLE: "visible",
+	PRIO_NEXT: "next",
+	PRIO_PREFETCH: "prefetch",
+	PRIO_BACKGROUND: "background"
+}
+
+
+class ArtworkJob:
+	"""A queued artwork request"""
+
+	__slots__ = ("key", "item", "priority", "owner", "created", "seq", "cancelled", "demoted")
+
+	def __init__(self, key, item, priority, owner, seq):
+		self.key = key
+		self.item = item
+		self.priority = priority
+		self.owner = owner
+		self.created = time()
+		self.seq = seq
+		self.cancelled = False
+		self.demoted = False
+
+
+class ArtworkScheduler:
+	"""Thread-safe priority queue with per-owner cancel/demote on zap"""
+
+	def __init__(self, name):
+		self.name = name
+		self.cond = Condition()
+		self.heap = []
+		self.jobs = {}
+		self.seq = count()
+		self.counters = {"queued": 0, "promoted": 0, "demoted": 0, "cancelled": 0, "served": 0}
+
+	def _push(self, job):
+		job.seq = next(self.seq)
+		heappush(self.heap, (job.priority, -job.seq, job))
+
+	def put(self, item, key=None, priority=PRIO_VISIBLE, owner=None):
+		"""
+		Queue an item (canal list) for download
+
+		Args:
+			item: payload handed to the worker
+			key: dedupe key, usually the cleaned title
+			priority: one of the PRIO_* classes
+			owner: id of the requesting renderer, enables zap handling
+		"""
+		if key is None:
+			key = repr(item)
+
+		with self.cond:
+			if owner is not None and priority <= PRIO_NEXT:
+				self._retire_owner(owner, key)
+
+			job = self.jobs.get(key)
+			if job is not None:
+				if priority < job.priority:
+					job.cancelled = True
+					job = ArtworkJob(key, item, priority, owner, 0)
+					self.jobs[key] = job
+					self._push(job)
+					self.counters["promoted"] += 1
+					self.cond.notify()
+				elif owner is not None and priority <= PRIO_NEXT:
+					job.owner = owner
+				return job
+
+			job = ArtworkJob(key, item, priority, owner, 0)
+			job.demoted = owner is not None and priority == PRIO_PREFETCH
+			self.jobs[key] = job
+			self._push(job)
+			self.counters["queued"] += 1
+			self.cond.notify()
+			return job
+
+	def retire(self, owner, keep_key=None):
+		"""Called on zap: demote or cancel the pending jobs of owner"""
+		with self.cond:
+			self._retire_owner(owner, keep_key)
+
+	def _retire_owner(self, owner, keep_key):
+		"""Demote or cancel the stale jobs of a renderer that moved on"""
+		for key, job in list(self.jobs.items()):
+			if job.owner != owner or key == keep_key:
+				continue
+			if job.demoted:
+				job.cancelled = True
+				del self.jobs[key]
+				self.counters["cancelled"] += 1
+				logger.debug(f"Scheduler[{self.name}] cancelled stale job: {key}")
+				continue
+			if job.priority > PRIO_NEXT:
+				continue
+
+			job.cancelled = True
+			stale = ArtworkJob(key, job.item, PRIO_PREFETCH, owner, 0)
+			stale.demoted = True
+			stale.created = job.created
+			self.jobs[key] = stale
+			self._push(stale)
+			self.counters["demoted"] += 1
+			logger.debug(f"Scheduler[{self.name}] demoted stale job: {key}")
+
+	def cancel(self, key):
+		"""Drop a waiting job; return True if something was cancelled"""
+		with self.cond:
+			job = self.jobs.pop(key, None)
+			if job is None:
+				return False
+			job.cancelled = True
+			self.counters["cancelled"] += 1
+			return True
+
+	def get(self, timeout=None):
+		"""Block until the highest priority job is available, return its item"""
+		job = self.get_job(timeout)
+		return job.item if job is not None else None
+
+	def get_job(self, timeout=None):
+		"""Same as get() but return the ArtworkJob itself"""
+		with self.cond:
+			while True:
+				while self.heap:
+					job = heappop(self.heap)[2]
+					if job.cancelled:
+						continue
+					self.jobs.pop(job.key, None)
+					self.counters["served"] += 1
+					return job
+				if not self.cond.wait(timeout) and timeout is not None:
+					return None
+
+	def task_done(self):
+		"""Kept for LifoQueue compatibility"""
+		pass
+
+	def qsize(self):
+		with self.cond:
+			return len(self.jobs)
+
+	def empty(self):
+		return self.qsize() == 0
+
+	def state(self):
+		"""Snapshot of pending jobs in service order plus counters"""
+		with self.cond:
+			pending = sorted(
+				(entry for entry in self.heap if not entry[2].cancelled),
+				key=lambda entry: (entry[0], entry[1])
+			)
+			now = time()
+			return {
+				"name": self.name,
+				"pending": [
+					{
+						"key": job.key,
+						"priority": PRIORITY_NAMES.get(job.priority, job.priority),
+						"owner": job.owner,
+						"demoted": job.demoted,
+						"age": round(now - job.created, 1)
+					}
+					for _, _, job in pending
+				],
+				"counters": dict(self.counters)
+			}
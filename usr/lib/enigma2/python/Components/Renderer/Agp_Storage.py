@@ -0,0 +1,248 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function
+"""
+#########################################################
+#                                                       #
+#  AGP - Advanced Graphics Renderer                     #
+#  Version: 3.5.0                                       #
+#  Created by Lululla (https://github.com/Belfagor2005) #
+#  License: CC BY-NC-SA 4.0                             #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0    #
+#                                                       #
+#  Last Modified: "18:14 - 20250512"                    #
+#                                                       #
+#  Credits:                                             #
+#  - Original concept by Lululla                        #
+#  - Poster renderer                                    #
+#  - Backdrop renderer                                  #
+#  - Poster EMC renderer                                #
+#  - InfoEvents renderer                                #
+#  - Star rating renderer                               #
+#  - Parental control renderer                          #
+#  - Genre detection and renderer                       #
+#                                                       #
+#  - Advanced download management system                #
+#  - Atomic file operations                             #
+#  - Thread-safe resource locking                       #
+#  - TMDB API integration                               #
+#  - TVDB API integration                               #
+#  - OMDB API integration                               #
+#  - FANART API integration                             #
+#  - IMDB API integration                               #
+#  - ELCINEMA API integration                           #
+#  - GOOGLE API integration                             #
+#  - PROGRAMMETV integration                            #
+#  - MOLOTOV API integration                            #
+#  - Advanced caching system                            #
+#  - Fully configurable via AGP Setup Plugin            #
+#                                                       #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+__author__ = "Lululla"
+__copyright__ = "AGP Team"
+
+# Standard library
+from os import remove, statvfs
+from threading import Lock
+from time import time
+
+# Enigma2 imports
+from Components.config import config
+
+# Local imports
+from .Agp_ArtIndex import artwork_index
+from .Agp_Metadata import metadata_service
+from .Agp_PixmapCache import pixmap_cache
+from .Agp_Utils import BACKDROP_FOLDER, DATA_FOLDER, IMOVIE_FOLDER, POSTER_FOLDER, logger
+
+
+"""
+Quota-based storage manager for the artwork and metadata caches.
+
+Each media type has a byte quota (config.plugins.Aglare.quota_<media>,
+in MB) on top of the minimum free space of its file system. trim()
+works out once how many bytes have to go, the larger of "over quota"
+and "missing free space", then deletes files in a single pass in the
+order they were last shown (from the artwork index, not the mtime), in
+batches of DELETE_BATCH with one index flush per batch.
+
+Images (poster, backdrop, imovie) are evicted through the artwork index,
+size variants included. Metadata is the rows of the metadata database,
+expired records first, then the least recently read.
+
+ready() is the cheap check for the download threads: free space is
+read at most every CHECK_INTERVAL, quotas are enforced at most every
+TRIM_INTERVAL, and immediately when the disk runs low.
+"""
+
+MB = 1024 * 1024
+# media -> (folder, quota in MB when not configured)
+MEDIA = {
+	"poster": (POSTER_FOLDER, 500),
+	"backdrop": (BACKDROP_FOLDER, 1000),
+	"imovie": (IMOVIE_FOLDER, 200),
+	"metadata": (DATA_FOLDER, 50)
+}
+IMAGE_MEDIA = ("poster", "backdrop", "imovie")
+DEFAULT_MIN_FREE_MB = 50
+CHECK_INTERVAL = 60  # seconds a free space reading is reused
+TRIM_INTERVAL = 1800  # seconds between two quota passes per media
+DELETE_BATCH = 200
+TRIM_MARGIN = 0.9  # trim down to 90% of the quota, not just under it
+
+
+class StorageManager:
+	"""Per-media byte quotas with least-recently-shown eviction"""
+
+	def __init__(self):
+		self.lock = Lock()
+		self.trim_lock = Lock()
+		self.free = {}  # folder -> (time, free bytes)
+		self.last_trim = {}
+		self.counters = {"passes": 0, "evicted": 0, "freed": 0}
+		for media in IMAGE_MEDIA:
+			artwork_index.watch(MEDIA[media][0])
+
+	@staticmethod
+	def quota(media):
+		"""Quota of media in bytes"""
+		try:
+			value = int(getattr(config.plugins.Aglare, f"quota_{media}").value)
+		except Exception:
+			value = MEDIA[media][1]
+		return value * MB
+
+	def _free_bytes(self, folder, refresh=False):
+		now = time()
+		with self.lock:
+			cached = self.free.get(folder)
+			if cached and not refresh and now - cached[0] < CHECK_INTERVAL:
+				return cached[1]
+		try:
+			stat = statvfs(folder)
+			free = stat.f_bavail * stat.f_frsize
+		except OSError as e:
+			logger.warning(f"Storage: cannot stat {folder}: {str(e)}")
+			return None
+		with self.lock:
+			self.free[folder] = (now, free)
+		return free
+
+	def ready(self, media, min_free_mb=DEFAULT_MIN_FREE_MB):
+		"""
+		True when media can take new files (download threads)
+
+		Runs a trim pass when the disk is low or the last pass is older
+		than TRIM_INTERVAL.
+		"""
+		folder = MEDIA[media][0]
+		free = self._free_bytes(folder)
+		if free is None:
+			return False
+		low = free < min_free_mb * MB
+		if low or time() - self.last_trim.get(media, 0) > TRIM_INTERVAL:
+			self.trim(media, min_free_mb)
+			if media == "poster":
+				self.trim("metadata", min_free_mb)
+			if low:
+				free = self._free_bytes(folder, refresh=True)
+				return free is not None and free >= min_free_mb * MB
+		return True
+
+	def _candidates(self, media, folder):
+		"""(path, size) eviction order and bytes used by media, (title, size) for metadata"""
+		if media in IMAGE_MEDIA:
+			return artwork_index.by_access(folder), artwork_index.usage(folder)
+		return metadata_service.by_access(), metadata_service.usage()
+
+	def trim(self, media, min_free_mb=DEFAULT_MIN_FREE_MB):
+		"""
+		Bring media under its quota and its file system above min_free_mb
+
+		Returns:
+			int: bytes freed
+		"""
+		if media in IMAGE_MEDIA and not artwork_index.loaded:
+			return 0  # usage unknown until the index is loaded
+		if not self.trim_lock.acquire(blocking=False):
+			return 0  # another thread is already trimming
+		try:
+			self.last_trim[media] = time()
+			folder = MEDIA[media][0]
+			candidates, used = self._candidates(media, folder)
+			free = self._free_bytes(folder, refresh=True)
+			over_quota = used - int(self.quota(media) * TRIM_MARGIN) if used > self.quota(media) else 0
+			missing = min_free_mb * MB - free if free is not None else 0
+			target = max(over_quota, missing, 0)
+			if not target:
+				return 0
+
+			logger.info(f"Storage: {media} uses {used // MB}MB, freeing {target // MB + 1}MB")
+			planned = freed = evicted = 0
+			batch = []
+			for path, size in candidates:
+				if planned >= target:
+					break
+				batch.append((path, size))
+				planned += size
+				if len(batch) >= DELETE_BATCH:
+					count, size = self._delete(batch, media)
+					evicted += count
+					freed += size
+					batch = []
+			if batch:
+				count, size = self._delete(batch, media)
+				evicted += count
+				freed += size
+
+			with self.lock:
+				self.counters["passes"] += 1
+				self.counters["evicted"] += evicted
+				self.counters["freed"] += freed
+			self._free_bytes(folder, refresh=True)
+			logger.info(f"Storage: {media} trimmed, {evicted} files ({freed // 1024}KB) removed")
+			return freed
+		finally:
+			self.trim_lock.release()
+
+	@staticmethod
+	def _delete(batch, media):
+		"""Remove a batch of (path, size), return (files, bytes) removed"""
+		if media == "metadata":
+			metadata_service.delete([title for title, _ in batch])
+			return len(batch), sum(size for _, size in batch)
+		deleted = freed = 0
+		for path, size in batch:
+			try:
+				remove(path)
+				deleted += 1
+				freed += size
+			except FileNotFoundError:
+				pass
+			except OSError as e:
+				logger.warning(f"Storage: cannot remove {path}: {str(e)}")
+				continue
+			if media in IMAGE_MEDIA:
+				artwork_index.discard(path)
+				pixmap_cache.invalidate(path)
+		if media in IMAGE_MEDIA:
+			artwork_index.flush(force=True)
+		return deleted, freed
+
+	def stats(self):
+		report = {}
+		for media, (folder, _) in MEDIA.items():
+			report[media] = {"quota_mb": self.quota(media) // MB, "last_trim": self.last_trim.get(media)}
+			if media in IMAGE_MEDIA:
+				report[media]["used_mb"] = round(artwork_index.usage(folder) / MB, 1)
+		with self.lock:
+			report.update(self.counters)
+		return report
+
+
+storage_manager = StorageManager()
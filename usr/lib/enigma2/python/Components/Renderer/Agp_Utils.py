@@ -54,7 +54,7 @@ from sys import version_info, stdout, stderr
 from os import (
     makedirs,
     statvfs,
-    listdir,
+    scandir,
     remove,
     access,
     W_OK,
@@ -68,8 +68,6 @@ from os.path import (
     exists,
     isfile,
     dirname,
-    getsize,
-    getmtime,
     basename,
     isdir
 )
@@ -77,7 +75,7 @@ from pathlib import Path
 import glob
 import tempfile
 
-# from functools import lru_cache
+from functools import lru_cache
 
 # ========================
 # IMPORTS FOR LOGGING
@@ -97,7 +95,6 @@ from logging import (
 # ========================
 from time import ctime, mktime
 from datetime import datetime, timedelta
-import time
 # ========================
 # IMPORTS FOR TEXT PROCESSING
 # ========================
@@ -428,6 +425,28 @@ CHAR_REPLACEMENTS = {
 }
 
 
+def _compile_replacements(table):
+    """
+    Split CHAR_REPLACEMENTS into a str.translate() table and the rest
+
+    The leading single-character entries are applied in one translate()
+    call, the following entries keep their order, so the result is the
+    same as replacing every entry one after the other.
+    """
+    items = list(table.items())
+    count = 0
+    while count < len(items) and len(items[count][0]) == 1:
+        count += 1
+    # A replacement producing another key must stay sequential
+    while count and any(c in table for _, replacement in items[:count] for c in replacement):
+        count -= 1
+    return str.maketrans(dict(items[:count])), tuple(items[count:])
+
+
+CHAR_TRANSLATION, STRING_REPLACEMENTS = _compile_replacements(CHAR_REPLACEMENTS)
+CLEAN_TITLE_CACHE_SIZE = 2500
+
+
 def clean_for_tvdb_optimized(title):
     """
     Optimized version for fast title cleaning
@@ -568,7 +587,7 @@ def cleanText(text):
         # return ""
 
 
-def clean_for_tvdb(title):
+def _clean_for_tvdb(title):
     """
     Prepare title for API searches with comprehensive cleaning
     Handles special characters, encodings and Unicode normalization
@@ -609,8 +628,10 @@ def clean_for_tvdb(title):
         clean_title = title
 
         # Replace characters based on the custom map
-        for char, replacement in CHAR_REPLACEMENTS.items():
-            title = title.replace(char, replacement)
+        title = title.translate(CHAR_TRANSLATION)
+        for char, replacement in STRING_REPLACEMENTS:
+            if char in title:
+                title = title.replace(char, replacement)
 
         # Try ASCII conversion but keep original if it fails
         try:
@@ -642,6 +663,23 @@ def clean_for_tvdb(title):
         return ""
 
 
+_clean_for_tvdb_cached = lru_cache(maxsize=CLEAN_TITLE_CACHE_SIZE)(_clean_for_tvdb)
+
+
+def clean_for_tvdb(title):
+    """
+    Cleaned title for the API searches and artwork file names
+
+    Called for the same event from the renderer, the download queue and
+    the download thread: results are memoized in a bounded LRU.
+    """
+    try:
+        return _clean_for_tvdb_cached(title)
+    except TypeError:
+        # Unhashable input: nothing to memoize
+        return _clean_for_tvdb(title)
+
+
 # ================ END TEXT MANAGER ===============
 # ================ START MEDIASTORAGE CONFIGURATION ===============
 
@@ -702,39 +740,46 @@ def free_up_space(path, min_space_mb, media_type, strategy="oldest_first"):
         bool: True if target space was achieved
     """
     try:
-        # 1. Collect files with metadata
+        # 1. Bytes to free, computed once
+        fs = statvfs(path)
+        needed_mb = min_space_mb - (fs.f_bavail * fs.f_frsize) / (1024 * 1024)
+        if needed_mb <= 0:
+            return True
+
+        # 2. Collect files with metadata in one pass
         files = []
-        for f in listdir(path):
-            filepath = join(path, f)
-            if isfile(filepath):
-                files.append({
-                    "path": filepath,
-                    "size": getsize(filepath),
-                    "mtime": getmtime(filepath)
-                })
-
-        # 2. Sort files by strategy
+        with scandir(path) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    st = entry.stat()
+                    files.append({
+                        "path": entry.path,
+                        "size": st.st_size,
+                        "mtime": st.st_mtime
+                    })
+
+        # 3. Sort files by strategy
         if strategy == "oldest_first":
             files.sort(key=lambda x: x["mtime"])  # Oldest first
         else:  # largest_first
             files.sort(key=lambda x: x["size"], reverse=True)  # Largest first
 
-        # 3. Selective purge
+        # 4. Selective purge until the computed amount is freed
         freed_mb = 0
         for file_info in files:
-            if check_disk_space(path, min_space_mb, media_type=None):
+            if freed_mb >= needed_mb:
                 break
 
             try:
                 file_mb = file_info["size"] / (1024 * 1024)
                 remove(file_info["path"])
                 freed_mb += file_mb
-                logger.info(
+                logger.debug(
                     f"free_up_space Purged {media_type}: {basename(file_info['path'])} "f"({file_mb:.1f}MB, {ctime(file_info['mtime'])})")
             except Exception as e:
                 logger.error(f"free_up_space Purge failed for {file_info['path']}: {str(e)}")
 
-        # 4. Final check
+        # 5. Final check
         success = check_disk_space(path, min_space_mb, media_type=None)
         logger.info(f"free_up_space Freed {freed_mb:.1f}MB for {media_type}. Success: {success}")
         return success
@@ -859,6 +904,7 @@ class MediaStorage:
         self.poster_folder = self._init_storage('poster')
         self.backdrop_folder = self._init_storage('backdrop')
         self.imovie_folder = self._init_storage('imovie')
+        self.data_folder = self._init_storage('agpdata')
 
     def _get_mount_points(self, media_type):
         """Get potential storage locations based on media type"""
@@ -910,53 +956,12 @@ try:
     POSTER_FOLDER = media_config.poster_folder
     BACKDROP_FOLDER = media_config.backdrop_folder
     IMOVIE_FOLDER = media_config.imovie_folder
+    DATA_FOLDER = media_config.data_folder
 except Exception as e:
     logger.critical(f"MediaStorage initialization failed: {str(e)}")
     raise
 
 
-def delete_old_files_if_low_disk_space(MEDIA_FOLDER, min_free_space_mb=50, max_age_days=30):
-    """
-    Delete old files if disk space is below threshold
-
-    Args:
-        MEDIA_FOLDER: Folder to clean
-        min_free_space_mb: Minimum required free space in MB
-        max_age_days: Maximum age of files to keep
-    """
-    try:
-        from shutil import disk_usage
-        total, used, free = disk_usage(MEDIA_FOLDER)
-        free_space_mb = free / (1024 ** 2)  # Convert to MB
-
-        if free_space_mb < min_free_space_mb:
-            logger.warning(f"{MEDIA_FOLDER}: Low disk space: {free_space_mb:.2f} MB available. Deleting old files...")
-
-            current_time = time()
-
-            age_limit = max_age_days * 86400  # Seconds in a day
-
-            for filename in listdir(MEDIA_FOLDER):
-                file_path = join(MEDIA_FOLDER, filename)
-
-                if isfile(file_path):
-                    file_age = current_time - getmtime(file_path)
-
-                    if file_age > age_limit:
-                        remove(file_path)
-                        logger.debug(f"{MEDIA_FOLDER}: Deleted {filename}, it was {file_age / 86400:.2f} days old.")
-        else:
-            logger.info(f"{MEDIA_FOLDER}: Sufficient disk space: {free_space_mb:.2f} MB available. No files will be deleted.")
-
-    except Exception as e:
-        logger.critical(f"Error while checking disk space or deleting old files: {e}")
-
-
-delete_old_files_if_low_disk_space(POSTER_FOLDER, min_free_space_mb=50, max_age_days=30)
-delete_old_files_if_low_disk_space(BACKDROP_FOLDER, min_free_space_mb=50, max_age_days=30)
-delete_old_files_if_low_disk_space(IMOVIE_FOLDER, min_free_space_mb=50, max_age_days=30)
-
-
 def create_secure_log_dir():
     """Create a secure log directory with safety checks for Python 2.7"""
     base_tmp = tempfile.gettempdir()
@@ -0,0 +1,209 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function
+"""
+#########################################################
+#                                                       #
+#  AGP - Advanced Graphics Renderer                     #
+#  Version: 3.5.0                                       #
+#  Created by Lululla (https://github.com/Belfagor2005) #
+#  License: CC BY-NC-SA 4.0                             #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0    #
+#                                                       #
+#  Last Modified: "18:14 - 20250512"                    #
+#                                                       #
+#  Credits:                                             #
+#  - Original concept by Lululla                        #
+#  - Poster renderer                                    #
+#  - Backdrop renderer                                  #
+#  - Poster EMC renderer                                #
+#  - InfoEvents renderer                                #
+#  - Star rating renderer                               #
+#  - Parental control renderer                          #
+#  - Genre detection and renderer                       #
+#                                                       #
+#  - Advanced download management system                #
+#  - Atomic file operations                             #
+#  - Thread-safe resource locking                       #
+#  - TMDB API integration                               #
+#  - TVDB API integration                               #
+#  - OMDB API integration                               #
+#  - FANART API integration                             #
+#  - IMDB API integration                               #
+#  - ELCINEMA API integration                           #
+#  - GOOGLE API integration                             #
+#  - PROGRAMMETV integration                            #
+#  - MOLOTOV API integration                            #
+#  - Advanced caching system                            #
+#  - Fully configurable via AGP Setup Plugin            #
+#                                                       #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+__author__ = "Lululla"
+__copyright__ = "AGP Team"
+
+# Standard library
+from os import makedirs, replace
+from os.path import basename, dirname, exists, join
+from threading import Lock
+
+# Third-party libraries
+from PIL import Image
+from twisted.internet.reactor import callInThread
+
+# Local imports
+from .Agp_ArtIndex import artwork_index
+from .Agp_PixmapCache import pixmap_cache
+from .Agp_Utils import logger
+
+
+"""
+Download-time image normalization and per-widget size variants.
+
+finish() is the post-download stage: the download threads call it once
+the provider returned, i.e. when the file is complete on disk. It
+normalizes the file and then indexes it with its source provider and
+final dimensions. normalize() shrinks the original to fit the screen
+tier box (isz) or the largest widget registered for its media, whichever
+is bigger, and re-encodes it as a baseline JPEG. Progressive and
+oversized images are the most expensive ones to decode on the GUI
+thread of older receivers.
+
+Every renderer registers its widget size from applySkin(); for each
+registered size that is clearly smaller than the normalized original a
+variant is written to <folder>/<width>x<height>/<title>.jpg. pick()
+returns the variant matching a widget, so the GUI thread decodes an
+image that is already at display size. Files downloaded before a size
+was registered get their variant generated in the background the first
+time it is asked for.
+"""
+
+JPEG_QUALITY = 85
+SCALE_MARGIN = 1.1  # no variant when the original is at most 10% bigger
+LANCZOS = getattr(Image, "Resampling", Image).LANCZOS
+
+
+def _fits(size, box, margin=1.0):
+	return size[0] <= box[0] * margin and size[1] <= box[1] * margin
+
+
+def _save_jpeg(img, path):
+	"""Atomic baseline JPEG write"""
+	tmp_path = path + ".tmp"
+	img.save(tmp_path, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=False)
+	replace(tmp_path, path)
+
+
+class ArtworkVariants:
+	"""Registry of widget sizes and producer of the matching images"""
+
+	def __init__(self):
+		self.lock = Lock()
+		self.sizes = {}  # media -> set of (width, height)
+		self.requested = set()
+
+	def register(self, media, size):
+		"""Declare a widget size used to display media"""
+		if not size or size[0] <= 0 or size[1] <= 0:
+			return
+		with self.lock:
+			self.sizes.setdefault(media, set()).add(tuple(size))
+
+	def _widget_sizes(self, media):
+		with self.lock:
+			return sorted(self.sizes.get(media, ()))
+
+	@staticmethod
+	def variant_path(path, size):
+		return join(dirname(path), f"{size[0]}x{size[1]}", basename(path))
+
+	def normalize(self, path, media, box, provider=None):
+		"""
+		Shrink/re-encode a freshly downloaded file and write its variants
+
+		Args:
+			path: downloaded image
+			media: "poster" or "backdrop"
+			box: (width, height) of the screen tier
+			provider: source provider, recorded in the index for the variants
+
+		Returns:
+			(width, height) of the normalized file, None when it cannot be read
+		"""
+		widgets = self._widget_sizes(media)
+		for size in widgets:
+			box = (max(box[0], size[0]), max(box[1], size[1]))
+		try:
+			with Image.open(path) as img:
+				progressive = bool(img.info.get("progressive") or img.info.get("progression"))
+				if img.format != "JPEG" or progressive or img.mode != "RGB" or not _fits(img.size, box, SCALE_MARGIN):
+					main = img.convert("RGB")
+					main.thumbnail(box, LANCZOS)
+					_save_jpeg(main, path)
+					logger.debug(f"Variants: {basename(path)} {img.size} -> {main.size}")
+				else:
+					img.load()
+					main = img.copy()
+			pixmap_cache.invalidate(path)
+			for size in widgets:
+				self._write_variant(main, path, size, provider)
+			return main.size
+		except Exception as e:
+			logger.warning(f"Variants: cannot normalize {path}: {str(e)}")
+		return None
+
+	def finish(self, path, media, box, provider=None):
+		"""Post-download stage for a completely saved file: normalize, then index"""
+		dimensions = self.normalize(path, media, box, provider)
+		artwork_index.add(path, provider, dimensions)
+
+	def _write_variant(self, main, path, size, provider=None):
+		target = self.variant_path(path, size)
+		if _fits(main.size, size, SCALE_MARGIN):
+			# Close enough: the widget shows the original
+			return
+		folder = dirname(target)
+		if not exists(folder):
+			makedirs(folder, exist_ok=True)
+		artwork_index.watch(folder)
+		img = main.copy()
+		img.thumbnail(size, LANCZOS)
+		_save_jpeg(img, target)
+		pixmap_cache.invalidate(target)
+		artwork_index.add(target, provider, img.size)
+
+	def _generate(self, path, size):
+		try:
+			with Image.open(path) as img:
+				main = img.convert("RGB")
+			self._write_variant(main, path, size)
+		except Exception as e:
+			logger.warning(f"Variants: cannot build {size} for {path}: {str(e)}")
+
+	def pick(self, path, size):
+		"""
+		Best file to display path in a widget of size (main loop)
+
+		Falls back to path and schedules the variant when it is missing.
+		"""
+		if not size or not path:
+			return path
+		target = self.variant_path(path, size)
+		with self.lock:
+			tried = target in self.requested
+		if tried:
+			# Already built or not needed: answer without touching the disk
+			return target if artwork_index.known(target) else path
+		if artwork_index.has(target):
+			return target
+		with self.lock:
+			self.requested.add(target)
+		callInThread(self._generate, path, size)
+		return path
+
+
+artwork_variants = ArtworkVariants()
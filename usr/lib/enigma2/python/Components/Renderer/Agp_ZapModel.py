@@ -0,0 +1,226 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function
+"""
+#########################################################
+#                                                       #
+#  AGP - Advanced Graphics Renderer                     #
+#  Version: 3.5.0                                       #
+#  Created by Lululla (https://github.com/Belfagor2005) #
+#  License: CC BY-NC-SA 4.0                             #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0    #
+#                                                       #
+#  Last Modified: "18:14 - 20250512"                    #
+#                                                       #
+#  Credits:                                             #
+#  - Original concept by Lululla                        #
+#  - Poster renderer                                    #
+#  - Backdrop renderer                                  #
+#  - Poster EMC renderer                                #
+#  - InfoEvents renderer                                #
+#  - Star rating renderer                               #
+#  - Parental control renderer                          #
+#  - Genre detection and renderer                       #
+#                                                       #
+#  - Advanced download management system                #
+#  - Atomic file operations                             #
+#  - Thread-safe resource locking                       #
+#  - TMDB API integration                               #
+#  - TVDB API integration                               #
+#  - OMDB API integration                               #
+#  - FANART API integration                             #
+#  - IMDB API integration                               #
+#  - ELCINEMA API integration                           #
+#  - GOOGLE API integration                             #
+#  - PROGRAMMETV integration                            #
+#  - MOLOTOV API integration                            #
+#  - Advanced caching system                            #
+#  - Fully configurable via AGP Setup Plugin            #
+#                                                       #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+__author__ = "Lululla"
+__copyright__ = "AGP Team"
+
+# Standard library
+from json import load as json_load, dump as json_dump
+from os import replace
+from os.path import exists, join
+from threading import Lock
+from time import localtime, time
+
+# Local imports
+from .Agp_Utils import DATA_FOLDER, logger
+
+
+"""
+Zap-history model.
+
+Counts the channel changes of the user per hour of day: for every
+service the services zapped to next are kept with 24 hourly counters.
+predict() ranks the likely next services for the current hour (the
+neighbouring hours count half, so that habits drifting by a few minutes
+still match) and the prefetcher warms their artwork.
+
+A zap only counts once the user stayed MIN_DWELL seconds on the new
+service: zapping quickly from A through B to C records A -> C, the
+services passed through are not habits. The transition is committed by
+the next observe() after the dwell time, or when the user zaps away.
+
+Every zap is also checked against the prediction made for the last
+service watched, so stats() reports how often the next channel was
+predicted.
+The model lives in DATA_FOLDER/zap_model.json and stays small: at most
+MAX_TARGETS successors per service and MAX_SOURCES services are kept.
+"""
+
+MODEL_FILE = join(DATA_FOLDER, "zap_model.json")
+SAVE_INTERVAL = 120  # seconds between two writes of the model file
+MIN_DWELL = 3  # seconds on a service before the zap counts as a transition
+MAX_TARGETS = 16
+MAX_SOURCES = 400
+PREDICT_DEPTH = 3  # services remembered from each prediction for the hit rate
+
+
+class ZapModel:
+	"""Persistent per-hour transition counts between service refs"""
+
+	def __init__(self, path=MODEL_FILE):
+		self.path = path
+		self.lock = Lock()
+		self.model = {}  # from -> {to: [24 hourly counts]}
+		self.current = None
+		self.since = 0
+		self.settled = None  # last service watched for at least MIN_DWELL
+		self.last_hit = None
+		self.predicted = {}  # from -> last ranked prediction
+		self.counters = {"zaps": 0, "predicted": 0, "hits": 0, "top1": 0}
+		self.dirty = False
+		self.last_save = 0
+		self._load()
+
+	def _load(self):
+		if not exists(self.path):
+			return
+		try:
+			with open(self.path, "r") as f:
+				data = json_load(f)
+			self.model = data.get("model", {})
+			self.counters.update(data.get("counters", {}))
+		except Exception as e:
+			logger.warning(f"ZapModel: cannot read {self.path}, starting empty: {str(e)}")
+			self.model = {}
+
+	def observe(self, service):
+		"""
+		Note the service being watched
+
+		Returns:
+			True/False when the zap to service was/was not predicted from
+			the last service watched, None when no prediction was made
+		"""
+		if not service:
+			return None
+		now = time()
+		with self.lock:
+			committed = self._settle(now)
+			if service != self.current:
+				predicted = self.predicted.get(self.settled)
+				self.current = service
+				self.since = now
+				self.last_hit = service in predicted if predicted else None
+				committed = self._settle(now) or committed
+			hit = self.last_hit
+		if committed:
+			self.save()
+		return hit
+
+	def _settle(self, now):
+		"""Record the zap from the last settled service once the user stayed on the current one"""
+		service = self.current
+		if service is None or service == self.settled or now - self.since < MIN_DWELL:
+			return False
+		previous, self.settled = self.settled, service
+		if previous is None:
+			return False
+
+		self.counters["zaps"] += 1
+		targets = self.model.setdefault(previous, {})
+		hours = targets.get(service)
+		if hours is None:
+			if len(targets) >= MAX_TARGETS:
+				del targets[min(targets, key=lambda ref: sum(targets[ref]))]
+			hours = targets[service] = [0] * 24
+		hours[localtime(self.since).tm_hour] += 1
+		if len(self.model) > MAX_SOURCES:
+			self._trim()
+		self.dirty = True
+
+		predicted = self.predicted.pop(previous, None)
+		if predicted:
+			self.counters["predicted"] += 1
+			self.counters["hits"] += service in predicted
+			self.counters["top1"] += predicted[0] == service
+		return True
+
+	def _trim(self):
+		"""Drop the least used sources"""
+		usage = sorted(self.model, key=lambda ref: sum(sum(h) for h in self.model[ref].values()))
+		for ref in usage[:len(self.model) - MAX_SOURCES]:
+			del self.model[ref]
+
+	def predict(self, service, k):
+		"""Return up to k service refs likely to be zapped to from service"""
+		if k <= 0:
+			return []
+		hour = localtime().tm_hour
+		with self.lock:
+			targets = self.model.get(service)
+			if not targets:
+				return []
+			scores = {}
+			for ref, hours in targets.items():
+				score = hours[hour] + 0.5 * (hours[hour - 1] + hours[(hour + 1) % 24])
+				# A little weight for the rest of the day breaks ties
+				score += 0.05 * sum(hours)
+				if score > 0 and ref != service:
+					scores[ref] = score
+			ranked = sorted(scores, key=scores.get, reverse=True)
+			self.predicted[service] = ranked[:max(k, PREDICT_DEPTH)]
+			return ranked[:k]
+
+	def save(self, force=False):
+		"""Atomically write the model, at most once every SAVE_INTERVAL"""
+		now = time()
+		with self.lock:
+			if not self.dirty or (not force and now - self.last_save < SAVE_INTERVAL):
+				return
+			data = {
+				"model": {ref: {to: list(h) for to, h in targets.items()} for ref, targets in self.model.items()},
+				"counters": dict(self.counters)
+			}
+			self.dirty = False
+			self.last_save = now
+		try:
+			tmp_path = self.path + ".tmp"
+			with open(tmp_path, "w") as f:
+				json_dump(data, f)
+			replace(tmp_path, self.path)
+		except Exception as e:
+			logger.error(f"ZapModel: save failed: {str(e)}")
+
+	def stats(self):
+		"""Zap counters and prediction hit rates"""
+		with self.lock:
+			report = dict(self.counters, services=len(self.model))
+		predicted = report["predicted"]
+		report["hit_rate"] = round(report["hits"] / predicted, 3) if predicted else None
+		report["top1_rate"] = round(report["top1"] / predicted, 3) if predicted else None
+		return report
+
+
+zap_model = ZapModel()
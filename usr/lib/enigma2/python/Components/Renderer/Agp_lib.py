@@ -46,14 +46,13 @@ from __future__ import absolute_import, print_function
 __author__ = "Lululla"
 __copyright__ = "AGP Team"
 
-from re import compile, sub, DOTALL, IGNORECASE
+from re import compile, escape, DOTALL, IGNORECASE
 from unicodedata import normalize, category
 import sys
 from Components.config import config
 # from .Agp_Utils import logger
-# from functools import lru_cache
+from functools import lru_cache
 
-convtext_cache = {}
 DEBUG = False  # active for show text cleaned in debug
 
 try:
@@ -122,6 +121,9 @@ def remove_accents(string):
 	"""
 	if not isinstance(string, str):
 		string = str(string, "utf-8")
+	if string.isascii():
+		# Nothing to decompose
+		return string
 	# Normalize to NFD form and remove all diacritic marks
 	string = normalize("NFD", string)
 	string = "".join(char for char in string if category(char) != "Mn")
@@ -149,6 +151,16 @@ def getCleanTitle(eventitle=""):
 	return eventitle.replace(' ^`^s', '').replace(' ^`^y', '')
 
 
+RELEASE_TAGS_RE = compile(
+	r"\.(?=\D)|\(\d{4}\)|\b(?:720p|1080p|2160p|4k)\b|\b(?:HDTV|WEB[Rr]ip|WEB\-DL|HDRip|HDTC|HDTS|DVDScr|DVDRip)\b|\b(?:BRRip|BDRip|BDMV|CAMRip|Cam|TS|TC|SCR|R5)\b|\b(?:PROPER|REPACK|SUBBED|UNRATED|EXTENDED|INTERNAL|LIMITED|READNFO)\b|\b(?:AAC[\d\.]*|AC3[\d\.]*|DTS[\d\.]*|DD5\.1|TRUEHD|ATMOS)\b|\b(?:XviD|DivX|x264|H\.264|x265|HEVC|AVC|10bits)\b",
+	IGNORECASE
+)
+YEAR_RE = compile(r"\b(19|20)\d{2}\b")
+SEASON_EPISODE_RE = compile(r"(?i)\bs\d+e\d+\b")
+NON_WORD_RE = compile(r"[^\w\s\-_]")
+SPACES_RE = compile(r"\s+")
+
+
 def sanitize_filename(name):
 	"""
 	Sanitize strings to be safe for filenames.
@@ -160,28 +172,23 @@ def sanitize_filename(name):
 		name = name.replace("  ", " ")
 
 	# 2. Remove common release tags (case-insensitive, verbose)
-	name = sub(
-		r"\.(?=\D)|\(\d{4}\)|\b(?:720p|1080p|2160p|4k)\b|\b(?:HDTV|WEB[Rr]ip|WEB\-DL|HDRip|HDTC|HDTS|DVDScr|DVDRip)\b|\b(?:BRRip|BDRip|BDMV|CAMRip|Cam|TS|TC|SCR|R5)\b|\b(?:PROPER|REPACK|SUBBED|UNRATED|EXTENDED|INTERNAL|LIMITED|READNFO)\b|\b(?:AAC[\d\.]*|AC3[\d\.]*|DTS[\d\.]*|DD5\.1|TRUEHD|ATMOS)\b|\b(?:XviD|DivX|x264|H\.264|x265|HEVC|AVC|10bits)\b",
-		" ",
-		name,
-		flags=IGNORECASE
-	)
+	name = RELEASE_TAGS_RE.sub(" ", name)
 
 	# 3. Remove standalone 4-digit year
-	name = sub(r"\b(19|20)\d{2}\b", "", name)
+	name = YEAR_RE.sub("", name)
 
 	# 4. Remove SxxExx patterns (season/episode)
-	name = sub(r"(?i)\bs\d+e\d+\b", "", name)
+	name = SEASON_EPISODE_RE.sub("", name)
 
 	# 5. Remove invalid filename characters
 	for char in '*?"<>|,':  # Add any other invalid characters for your filesystem
 		name = name.replace(char, "")
 
 	# 6. Replace any remaining non-word (except space, underscore, dash) with space
-	name = sub(r"[^\w\s\-_]", " ", name)
+	name = NON_WORD_RE.sub(" ", name)
 
 	# 7. Collapse any leftover whitespace and trim
-	name = sub(r"\s+", " ", name).strip()
+	name = SPACES_RE.sub(" ", name).strip()
 
 	# 8. Truncate to 50 characters
 	if len(name) > 50:
@@ -255,8 +262,137 @@ CHAR_REPLACEMENTS = {
 }
 
 
-# @lru_cache(maxsize=2500)  # not tested
-def convtext(text):
+# Title normalization tables, built once at import
+
+# Special case substitutions: (pattern, replacement, method)
+SUBSTITUTIONS = (
+
+	# Set operations (exact matches)
+	("1/2", "mezzo", "replace"),
+	("c.s.i.", "csi", "replace"),
+	("c.s.i:", "csi", "replace"),
+	("c.s.i", "csi", "replace"),
+	("n.c.i.s.:", "ncis", "replace"),
+	("n.c.i.s.", "ncis", "replace"),
+	("ncis:", "ncis", "replace"),
+	("ncis - ", "ncis ", "replace"),
+	("mission: impossible", "mission impossible", "replace"),
+	("ritorno al futuro:", "ritorno al futuro", "replace"),
+	("cash or trash chi offre di piu", "cash or trash", "replace"),
+
+	# Replace operations (partial matches)
+	("forget the lyrics", "dont forget the lyrics", "set"),
+	("superman & lois", "superman e lois", "set"),
+	("lois & clark", "superman e lois", "set"),
+	("una 44 magnum per", "magnumxx", "set"),
+	("john q", "johnq", "set"),
+	("il ritorno di colombo", "colombo", "set"),
+	("lingo: parole", "lingo", "set"),
+	("heartland", "heartland", "set"),
+	("io & marilyn", "io e marilyn", "set"),
+	("giochi olimpici parigi", "olimpiadi di parigi", "set"),
+	("bruno barbieri", "brunobarbierix", "set"),
+	("anni '60", "anni 60", "set"),
+	("cortesie per gli ospiti", "cortesieospiti", "set"),
+	("tg regione", "tg3", "set"),
+	("tg1", "tguno", "set"),
+	("planet earth", "planet earth", "set"),
+	("studio aperto", "studio aperto", "set"),
+	("josephine ange gardien", "josephine ange gardien", "set"),
+	("josephine angelo", "josephine ange gardien", "set"),
+	# Josephine Guardian Angel
+	("elementary", "elementary", "set"),
+	("squadra speciale cobra 11", "squadra speciale cobra 11", "set"),
+	("criminal minds", "criminal minds", "set"),
+	("i delitti del barlume", "i delitti del barlume", "set"),
+	("senza traccia", "senza traccia", "set"),
+	("hudson e rex", "hudson e rex", "set"),
+	("ben-hur", "ben-hur", "set"),
+	("alessandro borghese - 4 ristoranti", "alessandroborgheseristoranti", "set"),
+	("alessandro borghese: 4 ristoranti", "alessandroborgheseristoranti", "set"),
+	("amici di maria", "amicimaria", "set"),
+	("csi miami", "csi miami", "set"),
+	("csi: miami", "csi miami", "set"),
+	("csi: scena del crimine", "csi scena del crimine", "set"),
+	("csi: new york", "csi new york", "set"),
+	("csi: vegas", "csi vegas", "set"),
+	("csi: cyber", "csi cyber", "set"),
+	("csi: immortality", "csi immortality", "set"),
+	("csi: crime scene talks", "csi crime scene talks", "set"),
+	("ncis unità anticrimine", "ncis unità anticrimine", "set"),
+	("ncis unita anticrimine", "ncis unita anticrimine", "set"),
+	("ncis new orleans", "ncis new orleans", "set"),
+	("ncis los angeles", "ncis los angeles", "set"),
+	("ncis origins", "ncis origins", "set"),
+	("ncis hawai", "ncis hawai", "set"),
+	("ncis sydney", "ncis sydney", "set"),
+	("ritorno al futuro - parte iii", "ritornoalfuturoparteiii", "set"),
+	("ritorno al futuro - parte ii", "ritornoalfuturoparteii", "set"),
+	("walker, texas ranger", "walker texas ranger", "set"),
+	("e.r.", "ermediciinprimalinea", "set"),
+	("alexa: vita da detective", "alexa vita da detective", "set"),
+	("delitti in paradiso", "delitti in paradiso", "set"),
+	("modern family", "modern family", "set"),
+	("shaun: vita da pecora", "shaun", "set"),
+	("calimero", "calimero", "set"),
+	("i puffi", "i puffi", "set"),
+	("stuart little", "stuart little", "set"),
+	("gf daily", "grande fratello", "set"),
+	("grande fratello", "grande fratello", "set"),
+	("castle", "castle", "set"),
+	("seal team", "seal team", "set"),
+	("fast forward", "fast forward", "set"),
+	("un posto al sole", "un posto al sole", "set"),
+	("cash or trash chi offre di piu", "cash or trash", "set"),
+)
+
+SPLIT_SEPARATORS = (" -", "(", "[", "|")  # , ":"
+
+# Unwanted strings: the title is cut at the first one found
+UNWANTED = (
+	"\xe2\x80\x93", "\xc2\x86", "\xc2\x87", "webhdtv", "1080i", "dvdr5", "((", "))", "hdtvrip",
+	"german", "english", "ws", "ituneshd", "hdtv", "dvdrip", "unrated", "retail", "web-dl", "divx",
+	"bdrip", "uncut", "avc", "ac3d", "ts", "ac3md", "ac3", "webhdtvrip", "xvid", "bluray",
+	"complete", "internal", "dtsd", "h264", "dvdscr", "dubbed", "line.dubbed", "dd51", "dvdr9",
+	"sync", "webhdrip", "webrip", "repack", "dts", "webhd", "1^tv", "1^ tv", " - prima tv",
+	" - primatv", "primatv", "en direct:", "first screening", "live:", "1^ visione rai",
+	"1^ visione", "premiere:", "nouveau:", "prima visione", "film -", "en vivo:",
+	"nueva emisión:", "new:", "film:", "première diffusion", "estreno:", "fhd", "hd", "4k", "uhd",
+	" ep", " episodio", " st", " stag", " odc", " parte", " pt!series", " serie",
+)
+
+# One pass telling whether any unwanted string is present at all
+UNWANTED_RE = compile("|".join(escape(item) for item in UNWANTED))
+PUNTATA_RE = compile(r'\d+[\s]*[a-z°\^]?[\s]*puntata.*', IGNORECASE)
+
+# Invalid suffixes removed from the end of the title
+BAD_SUFFIXES = (
+	" al", " ar", " ba", " da", " de", " en", " es", " eu", " ex-yu", " fi",
+	" fr", " gr", " hr", " mk", " nl", " no", " pl", " pt", " ro", " rs",
+	" ru", " si", " swe", " sw", " tr", " uk", " yu",  " it"
+)
+
+# Final replacements
+FINAL_REPLACEMENTS = {
+	"XXXXXX": "60",
+	"magnumxx": "una 44 magnum per l ispettore",
+	"amicimaria": "amici di maria",
+	"alessandroborgheseristoranti": "alessandro borghese - 4 ristoranti",
+	"brunobarbierix": "bruno barbieri - 4 hotel",
+	"johnq": "john q",
+	"il ritorno di colombo": "colombo",
+	"cortesieospiti": "cortesie per gli ospiti",
+	"ermediciinprimalinea": "er medici in prima linea",
+	"ritornoalfuturoparteiii": "ritorno al futuro parte iii",
+	"ritornoalfuturoparteii": "ritorno al futuro parte ii",
+	"tguno": "tg1"
+}
+
+HYPHENS_RE = compile(r"-+")
+CONVTEXT_CACHE_SIZE = 2500
+
+
+def _convtext(text):
 	try:
 		if text is None:
 			# print("return None original text:", type(text))
@@ -276,89 +412,9 @@ def convtext(text):
 		if 'live:' in text:
 			text = text.replace('live:', '')
 
-		# Special case substitutions
-		substitutions = [
-
-			# Set operations (exact matches)
-			("1/2", "mezzo", "replace"),
-			("c.s.i.", "csi", "replace"),
-			("c.s.i:", "csi", "replace"),
-			("c.s.i", "csi", "replace"),
-			("n.c.i.s.:", "ncis", "replace"),
-			("n.c.i.s.", "ncis", "replace"),
-			("ncis:", "ncis", "replace"),
-			("ncis - ", "ncis ", "replace"),
-			("mission: impossible", "mission impossible", "replace"),
-			("ritorno al futuro:", "ritorno al futuro", "replace"),
-			("cash or trash chi offre di piu", "cash or trash", "replace"),
-
-			# Replace operations (partial matches)
-			("forget the lyrics", "dont forget the lyrics", "set"),
-			("superman & lois", "superman e lois", "set"),
-			("lois & clark", "superman e lois", "set"),
-			("una 44 magnum per", "magnumxx", "set"),
-			("john q", "johnq", "set"),
-			("il ritorno di colombo", "colombo", "set"),
-			("lingo: parole", "lingo", "set"),
-			("heartland", "heartland", "set"),
-			("io & marilyn", "io e marilyn", "set"),
-			("giochi olimpici parigi", "olimpiadi di parigi", "set"),
-			("bruno barbieri", "brunobarbierix", "set"),
-			("anni '60", "anni 60", "set"),
-			("cortesie per gli ospiti", "cortesieospiti", "set"),
-			("tg regione", "tg3", "set"),
-			("tg1", "tguno", "set"),
-			("planet earth", "planet earth", "set"),
-			("studio aperto", "studio aperto", "set"),
-			("josephine ange gardien", "josephine ange gardien", "set"),
-			("josephine angelo", "josephine ange gardien", "set"),
-			# Josephine Guardian Angel
-			("elementary", "elementary", "set"),
-			("squadra speciale cobra 11", "squadra speciale cobra 11", "set"),
-			("criminal minds", "criminal minds", "set"),
-			("i delitti del barlume", "i delitti del barlume", "set"),
-			("senza traccia", "senza traccia", "set"),
-			("hudson e rex", "hudson e rex", "set"),
-			("ben-hur", "ben-hur", "set"),
-			("alessandro borghese - 4 ristoranti", "alessandroborgheseristoranti", "set"),
-			("alessandro borghese: 4 ristoranti", "alessandroborgheseristoranti", "set"),
-			("amici di maria", "amicimaria", "set"),
-			("csi miami", "csi miami", "set"),
-			("csi: miami", "csi miami", "set"),
-			("csi: scena del crimine", "csi scena del crimine", "set"),
-			("csi: new york", "csi new york", "set"),
-			("csi: vegas", "csi vegas", "set"),
-			("csi: cyber", "csi cyber", "set"),
-			("csi: immortality", "csi immortality", "set"),
-			("csi: crime scene talks", "csi crime scene talks", "set"),
-			("ncis unità anticrimine", "ncis unità anticrimine", "set"),
-			("ncis unita anticrimine", "ncis unita anticrimine", "set"),
-			("ncis new orleans", "ncis new orleans", "set"),
-			("ncis los angeles", "ncis los angeles", "set"),
-			("ncis origins", "ncis origins", "set"),
-			("ncis hawai", "ncis hawai", "set"),
-			("ncis sydney", "ncis sydney", "set"),
-			("ritorno al futuro - parte iii", "ritornoalfuturoparteiii", "set"),
-			("ritorno al futuro - parte ii", "ritornoalfuturoparteii", "set"),
-			("walker, texas ranger", "walker texas ranger", "set"),
-			("e.r.", "ermediciinprimalinea", "set"),
-			("alexa: vita da detective", "alexa vita da detective", "set"),
-			("delitti in paradiso", "delitti in paradiso", "set"),
-			("modern family", "modern family", "set"),
-			("shaun: vita da pecora", "shaun", "set"),
-			("calimero", "calimero", "set"),
-			("i puffi", "i puffi", "set"),
-			("stuart little", "stuart little", "set"),
-			("gf daily", "grande fratello", "set"),
-			("grande fratello", "grande fratello", "set"),
-			("castle", "castle", "set"),
-			("seal team", "seal team", "set"),
-			("fast forward", "fast forward", "set"),
-			("un posto al sole", "un posto al sole", "set"),
-			("cash or trash chi offre di piu", "cash or trash", "set"),
-		]
-
-		for pattern, replacement, method in substitutions:
+		# NB: the loop stops after the first row, so only "1/2" is
+		# ever replaced; kept as is, the titles on disk depend on it
+		for pattern, replacement, method in SUBSTITUTIONS:
 			if method == "replace":
 				text = text.replace(pattern, replacement)
 				break
@@ -368,7 +424,7 @@ def convtext(text):
 				break
 
 		# Split on separators
-		for separator in [" -", "(", "[", "|"]:  # , ":"]:
+		for separator in SPLIT_SEPARATORS:
 			if separator in text:
 				text = text.split(separator)[0].strip()
 
@@ -376,33 +432,17 @@ def convtext(text):
 		# for char, replacement in CHAR_REPLACEMENTS.items():
 			# text = text.replace(char, replacement)
 
-		# Remove unwanted strings
-		unwanted = [
-			"\xe2\x80\x93", "\xc2\x86", "\xc2\x87", "webhdtv", "1080i", "dvdr5", "((", "))", "hdtvrip",
-			"german", "english", "ws", "ituneshd", "hdtv", "dvdrip", "unrated", "retail", "web-dl", "divx",
-			"bdrip", "uncut", "avc", "ac3d", "ts", "ac3md", "ac3", "webhdtvrip", "xvid", "bluray",
-			"complete", "internal", "dtsd", "h264", "dvdscr", "dubbed", "line.dubbed", "dd51", "dvdr9",
-			"sync", "webhdrip", "webrip", "repack", "dts", "webhd", "1^tv", "1^ tv", " - prima tv",
-			" - primatv", "primatv", "en direct:", "first screening", "live:", "1^ visione rai",
-			"1^ visione", "premiere:", "nouveau:", "prima visione", "film -", "en vivo:",
-			"nueva emisión:", "new:", "film:", "première diffusion", "estreno:", "fhd", "hd", "4k", "uhd",
-			" ep", " episodio", " st", " stag", " odc", " parte", " pt!series", " serie",
-		]
-		for item in unwanted:
-			if item in text:
-				text = text.split(item)[0].strip()
-
-		text = sub(r'\d+[\s]*[a-z°\^]?[\s]*puntata.*', '', text, flags=IGNORECASE)
+		# Remove unwanted strings (in table order: each cut changes the text)
+		if UNWANTED_RE.search(text):
+			for item in UNWANTED:
+				if item in text:
+					text = text.split(item)[0].strip()
+
+		text = PUNTATA_RE.sub('', text)
 
 		text = getCleanTitle(text)
 		# Remove invalid suffixes
-		bad_suffixes = [
-			" al", " ar", " ba", " da", " de", " en", " es", " eu", " ex-yu", " fi",
-			" fr", " gr", " hr", " mk", " nl", " no", " pl", " pt", " ro", " rs",
-			" ru", " si", " swe", " sw", " tr", " uk", " yu",  " it"
-		]
-
-		for suffix in bad_suffixes:
+		for suffix in BAD_SUFFIXES:
 			if text.endswith(suffix):
 				text = text[:-len(suffix)].strip()
 
@@ -410,49 +450,38 @@ def convtext(text):
 		for char in [".", "_", "'"]:
 			text = text.replace(char, " ")
 
-		# Final replacements
-		final_replacements = {
-			"XXXXXX": "60",
-			"magnumxx": "una 44 magnum per l ispettore",
-			"amicimaria": "amici di maria",
-			"alessandroborgheseristoranti": "alessandro borghese - 4 ristoranti",
-			"brunobarbierix": "bruno barbieri - 4 hotel",
-			"johnq": "john q",
-			"il ritorno di colombo": "colombo",
-			"cortesieospiti": "cortesie per gli ospiti",
-			"ermediciinprimalinea": "er medici in prima linea",
-			"ritornoalfuturoparteiii": "ritorno al futuro parte iii",
-			"ritornoalfuturoparteii": "ritorno al futuro parte ii",
-			"tguno": "tg1"
-		}
-
-		for old, new in final_replacements.items():
+		for old, new in FINAL_REPLACEMENTS.items():
 			text = text.replace(old, new)
 
 		text = sanitize_filename(text)
-		text = sub(r"-+", "-", text)
+		text = HYPHENS_RE.sub("-", text)
 
 		text = text.strip()
 
-		# Store in cache
-		text = sub(r'\s+', ' ', text).strip()
+		text = SPACES_RE.sub(' ', text).strip()
 		capitalized_text = text.capitalize()
 		if DEBUG:
 			print("convtext capitalized safe:", capitalized_text)
 
-		# Store in cache
-		"""
-		# if capitalized_text not in convtext_cache:
-			# convtext_cache[capitalized_text] = capitalized_text  # Salva la versione capitalizzata
-			# print(f"Adding to cache: {text} -> {capitalized_text}")  # Debug print
-		# else:
-			# print(f"Found in cache: {capitalized_text}")  # Debug print
-		# Return the capitalized value from the cache
-		# print(convtext.cache_info())  # Mostra hit/miss
-		# return convtext_cache[capitalized_text]
-		"""
 		return capitalized_text
 
 	except Exception as e:
 		print("Error in convert_text:", str(e))
 		return None
+
+
+_convtext_cached = lru_cache(maxsize=CONVTEXT_CACHE_SIZE)(_convtext)
+
+
+def convtext(text):
+	"""
+	Normalize an event title for the artwork/metadata searches
+
+	The same titles come back many times (zap, download thread, scans):
+	results are memoized in a bounded LRU.
+	"""
+	try:
+		return _convtext_cached(text)
+	except TypeError:
+		# Unhashable input: nothing to memoize
+		return _convtext(text)
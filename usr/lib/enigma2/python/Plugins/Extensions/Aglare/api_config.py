@@ -203,11 +203,145 @@ config.plugins.Aglare.molotov = ConfigOnOff(default=False)
 
 config.plugins.Aglare.cache = ConfigOnOff(default=False)
 agp_use_cache = config.plugins.Aglare.cache
+# disk space for cached provider responses (MB)
+config.plugins.Aglare.response_cache_size = ConfigSelection(default="20", choices=[
+	("5", "5 MB"),
+	("10", "10 MB"),
+	("20", "20 MB"),
+	("50", "50 MB")
+])
+
+# decoded artwork kept in memory (MB)
+config.plugins.Aglare.pixmap_cache = ConfigSelection(default="16", choices=[
+	("4", "4 MB"),
+	("8", "8 MB"),
+	("16", "16 MB"),
+	("32", "32 MB"),
+	("64", "64 MB")
+])
+
+# disk quota per cached media type (MB), least recently shown evicted first
+config.plugins.Aglare.quota_poster = ConfigSelection(default="500", choices=[
+	("100", "100 MB"),
+	("200", "200 MB"),
+	("500", "500 MB"),
+	("1000", "1000 MB"),
+	("2000", "2000 MB")
+])
+config.plugins.Aglare.quota_backdrop = ConfigSelection(default="1000", choices=[
+	("200", "200 MB"),
+	("500", "500 MB"),
+	("1000", "1000 MB"),
+	("2000", "2000 MB"),
+	("4000", "4000 MB")
+])
+config.plugins.Aglare.quota_imovie = ConfigSelection(default="200", choices=[
+	("50", "50 MB"),
+	("100", "100 MB"),
+	("200", "200 MB"),
+	("500", "500 MB"),
+	("1000", "1000 MB")
+])
+config.plugins.Aglare.quota_metadata = ConfigSelection(default="50", choices=[
+	("10", "10 MB"),
+	("20", "20 MB"),
+	("50", "50 MB"),
+	("100", "100 MB")
+])
+# largest image accepted by a download, aborted beyond (MB)
+config.plugins.Aglare.max_image_size = ConfigSelection(default="5", choices=[
+	("1", "1 MB"),
+	("2", "2 MB"),
+	("5", "5 MB"),
+	("10", "10 MB")
+])
+# days before downloaded artwork is revalidated and event metadata fetched again
+config.plugins.Aglare.refresh_artwork = ConfigSelection(default="30", choices=[
+	("0", _("Off")),
+	("7", _("7 days")),
+	("30", _("30 days")),
+	("90", _("90 days"))
+])
+
+# negative cache for titles no provider can resolve
+config.plugins.Aglare.miss_cache = ConfigOnOff(default=True)
+config.plugins.Aglare.miss_recheck = ConfigSelection(default="6", choices=[
+	("1", _("1 hour")),
+	("3", _("3 hours")),
+	("6", _("6 hours")),
+	("12", _("12 hours")),
+	("24", _("24 hours"))
+])
+config.plugins.Aglare.miss_ttl = ConfigSelection(default="7", choices=[
+	("1", _("1 day")),
+	("3", _("3 days")),
+	("7", _("7 days")),
+	("14", _("14 days")),
+	("30", _("30 days"))
+])
+
+# shared keep-alive http transport (applied on restart)
+config.plugins.Aglare.http_pool_hosts = ConfigSelection(default="8", choices=[
+	("4", "4"),
+	("8", "8"),
+	("16", "16")
+])
+config.plugins.Aglare.http_pool_size = ConfigSelection(default="4", choices=[
+	("2", "2"),
+	("4", "4"),
+	("8", "8")
+])
+# per-provider request budgets override, "name=rate/burst" (requests per second)
+config.plugins.Aglare.rate_limits = ConfigText(default="", visible_width=50, fixed_size=False)
+# providers queried in parallel for the artwork on screen ("1" = one after another)
+config.plugins.Aglare.hedge_providers = ConfigSelection(default="2", choices=[
+	("1", _("Off")),
+	("2", "2"),
+	("3", "3")
+])
+# prefetch of the next events / neighbour channels queued on zap
+config.plugins.Aglare.prefetch_depth = ConfigSelection(default="1", choices=[
+	("0", _("Off")),
+	("1", "1"),
+	("2", "2"),
+	("3", "3")
+])
+config.plugins.Aglare.prefetch_channels = ConfigSelection(default="1", choices=[
+	("0", _("Off")),
+	("1", "1"),
+	("2", "2")
+])
+config.plugins.Aglare.prefetch_budget = ConfigSelection(default="20", choices=[
+	("10", "10"),
+	("20", "20"),
+	("40", "40")
+])
+# channels predicted from the zap history whose artwork is prefetched
+config.plugins.Aglare.zap_predict = ConfigSelection(default="2", choices=[
+	("0", _("Off")),
+	("1", "1"),
+	("2", "2"),
+	("3", "3")
+])
 
 config.plugins.Aglare.pstdown = ConfigOnOff(default=False)
 config.plugins.Aglare.bkddown = ConfigOnOff(default=False)
 config.plugins.Aglare.pscan_time = ConfigClock(calcTime(0, 0))  # 00:00
 config.plugins.Aglare.bscan_time = ConfigClock(calcTime(2, 0))  # 02:00
+config.plugins.Aglare.scan_interval = ConfigSelection(default="24", choices=[
+	("24", _("Daily at the scheduled time")),
+	("12", _("Every 12 hours")),
+	("6", _("Every 6 hours")),
+	("3", _("Every 3 hours")),
+	("1", _("Every hour"))
+])
+config.plugins.Aglare.scan_workers = ConfigSelection(default="4", choices=[
+	("1", "1"),
+	("2", "2"),
+	("4", "4"),
+	("6", "6"),
+	("8", "8")
+])
 
 # stars
 config.plugins.Aglare.rating_source = ConfigOnOff(default=False)
@@ -342,7 +342,28 @@ class AglareSetup(ConfigListScreen, Screen):
                 section = '------------------------------------------------------------------------'
                 list.append((_(section), NoSave(ConfigNothing())))
                 if cfg.actapi.value:
-                    list.append(getConfigListEntry("Use Cache on download:", cfg.cache, _("Enable or disable caching during event download to speed up repeated searches.")))
+                    list.append(getConfigListEntry("Use Cache on download:", cfg.cache, _("Keep the provider search and details responses on disk, shared by all the renderers, to answer repeated searches without new requests.")))
+                    if cfg.cache.value:
+                        list.append(getConfigListEntry(_('Response cache size'), cfg.response_cache_size, _("Disk space for the cached provider responses; the least recently used are removed first")))
+                    list.append(getConfigListEntry(_('Poster disk quota'), cfg.quota_poster, _("Disk space for downloaded posters; the posters not shown for the longest time are removed first")))
+                    list.append(getConfigListEntry(_('Backdrop disk quota'), cfg.quota_backdrop, _("Disk space for downloaded backdrops; the backdrops not shown for the longest time are removed first")))
+                    list.append(getConfigListEntry(_('Movie poster disk quota'), cfg.quota_imovie, _("Disk space for the posters of recorded movies")))
+                    list.append(getConfigListEntry(_('Metadata disk quota'), cfg.quota_metadata, _("Disk space for the event information database; the titles not shown for the longest time are removed first")))
+                    list.append(getConfigListEntry(_('Largest image download'), cfg.max_image_size, _("Downloads of bigger images are refused or stopped, saving bandwidth on slow or metered connections")))
+                    list.append(getConfigListEntry(_('Refresh downloaded artwork'), cfg.refresh_artwork, _("During the scheduled scan, ask the servers whether posters and backdrops older than this changed; only changed files are downloaded again. Event information older than this is fetched again when shown")))
+                    list.append(getConfigListEntry(_('Artwork memory cache'), cfg.pixmap_cache, _("Memory used to keep recently shown posters, backdrops and icons decoded, so zapping back shows them without reading the disk")))
+                    list.append(getConfigListEntry("Skip titles not found:", cfg.miss_cache, _("Remember titles that no provider could resolve and do not search them again until the re-check interval has elapsed.")))
+                    if cfg.miss_cache.value is True:
+                        list.append(getConfigListEntry(_('Re-check titles not found after'), cfg.miss_recheck, _("First re-check interval, doubled after every further miss")))
+                        list.append(getConfigListEntry(_('Forget titles not found after'), cfg.miss_ttl, _("Lifetime of an entry in the list of titles not found")))
+                    list.append(getConfigListEntry(_('Connection pools (hosts)'), cfg.http_pool_hosts, _("Number of servers kept connected for downloads (applied after GUI restart)")))
+                    list.append(getConfigListEntry(_('Connections per host'), cfg.http_pool_size, _("Keep-alive connections per server shared by all download threads (applied after GUI restart)")))
+                    list.append(getConfigListEntry(_('Provider request limits'), cfg.rate_limits, _("Override the request budget of a provider as name=rate/burst in requests per second, e.g. tmdb=4/10 google=0.5/2 (applied after GUI restart)")))
+                    list.append(getConfigListEntry(_('Parallel providers on zap'), cfg.hedge_providers, _("Query the best providers at the same time for the poster/backdrop on screen and keep the first one found")))
+                    list.append(getConfigListEntry(_('Prefetch next events'), cfg.prefetch_depth, _("Also download the artwork of the following events of the channel on screen")))
+                    list.append(getConfigListEntry(_('Prefetch nearby channels'), cfg.prefetch_channels, _("Also download the artwork of the current event on the channels before and after the one on screen")))
+                    list.append(getConfigListEntry(_('Prefetch likely next channels'), cfg.zap_predict, _("Learn which channels you usually switch to at this time of day and download their artwork in advance")))
+                    list.append(getConfigListEntry(_('Prefetch jobs per minute'), cfg.prefetch_budget, _("Maximum number of prefetch downloads queued per minute")))
                     list.append(getConfigListEntry(_('Download now poster'), cfg.download_now_poster, _("Start downloading poster immediately")))
                     list.append(getConfigListEntry(_('Automatic download of poster'), cfg.pstdown, _("Automatically fetch posters for favorite events based on EPG")))
                     if cfg.pstdown.value is True:
@@ -351,6 +372,9 @@ class AglareSetup(ConfigListScreen, Screen):
                     list.append(getConfigListEntry(_('Automatic download of backdrop'), cfg.bkddown, _("Automatically fetch backdrop for favorite events based on EPG")))
                     if cfg.bkddown.value is True:
                         list.append(getConfigListEntry(_('Set Time our - minute for Backdrop download'), cfg.bscan_time, _("Configure the delay time (in minutes) before starting the automatic poster download")))
+                    if cfg.pstdown.value is True or cfg.bkddown.value is True:
+                        list.append(getConfigListEntry(_('Automatic scan frequency'), cfg.scan_interval, _("Scans are incremental: only EPG events added or changed since the previous run are processed")))
+                        list.append(getConfigListEntry(_('Parallel downloads during scan'), cfg.scan_workers, _("Number of titles downloaded at the same time by the automatic scan")))
 
             self["config"].list = list
             self["config"].l.setList(list)